@@ -1,33 +1,67 @@
 import uuid
-import atexit
+import json
+import asyncio
 import shutil
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional, List, Dict
+from urllib.parse import quote
 from datetime import datetime as dt
 
 from fastapi import FastAPI, File, UploadFile, Form, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-from utils.file_processor import extract_text_from_file
+from utils.file_processor import (
+    extract_text_from_file, save_upload, get_cached_extraction, cache_extraction, UploadTooLargeError, MAX_UPLOAD_SIZE
+)
 from utils.text_processor import init_nltk, get_sentences
-from utils.text_translator import get_text_translated
-from utils.audio_generator import generate_audio, list_voices, AUDIO_DIR
+from utils.text_translator import init_translators
+from utils.audio_generator import list_voices, AUDIO_DIR
+from utils.voice_catalog import VOICE_CATALOG
+from utils.exporter import iter_zip, EXPORT_RENDERER
+from utils.pipeline import translate_and_synthesize
 from utils.language_detector import detect_language, LANGUAGE_CODES, LANGUAGE_NAMES, TTS_LOCALES
+from utils.job_manager import Job, JobManager, JOB_DONE
+from utils.janitor import Janitor, RetentionRule
+from utils.process_pool import shutdown_process_pool
+from utils.session_store import SESSION_STORE, SESSION_COOKIE_NAME, SESSION_TTL_SECONDS
 from utils.logger import logger
 
-# 存储临时文件路径的全局变量
-TEMP_FILE_PATH: Optional[Path] = None
-
 # 临时目录 导出目录
 TEMP_DIR = "temp"
 EXPORT_DIR = "exports"
 
-# 存储当前的UUID
-CURRENT_UUID: str = ""
+# 各目录中条目的保留时长（秒）和目录总大小上限（字节），由后台清理服务定期执行
+# 音频至少保留到会话过期，保证结果页面和导出可用
+AUDIO_RETENTION_SECONDS = SESSION_TTL_SECONDS
+AUDIO_RETENTION_MAX_BYTES = 2 * 1024 * 1024 * 1024
+TEMP_RETENTION_SECONDS = 3600
+TEMP_RETENTION_MAX_BYTES = 1024 * 1024 * 1024
+EXPORT_RETENTION_SECONDS = 7 * 24 * 3600
+EXPORT_RETENTION_MAX_BYTES = 5 * 1024 * 1024 * 1024
+
+# 生成任务的各个阶段：分句 翻译 音频生成
+GENERATE_STAGES = ["split", "translate", "tts"]
 
-app = FastAPI()
+class NoSentencesError(ValueError):
+    """文本中未能分割出句子"""
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    服务启动时在后台加载音色目录并启动后台清理，退出时取消未完成的刷新和清理，并关闭共享进程池
+    """
+    load_task = asyncio.create_task(VOICE_CATALOG.load())
+    janitor.start()
+    yield
+    load_task.cancel()
+    await VOICE_CATALOG.close()
+    await janitor.close()
+    await asyncio.to_thread(shutdown_process_pool)
+
+app = FastAPI(lifespan=lifespan)
 
 # 创建音频目录
 Path(AUDIO_DIR).mkdir(exist_ok=True)
@@ -42,39 +76,118 @@ app.mount("/templates", StaticFiles(directory="templates"), name="templates")
 # 配置模板
 templates = Jinja2Templates(directory="templates")
 
-def cleanup_temp_files():
+# 后台生成任务管理器
+job_manager = JobManager()
+
+# 正在生成中的音频目录标题，包括同步请求和后台任务
+generating_titles: set = set()
+
+def get_protected_paths() -> List[Path]:
     """
-    清理临时文件和音频文件
+    获取正在生成中的音频目录，后台清理时跳过
     """
-    try:
-        # 清理temp目录
-        temp_dir = Path(TEMP_DIR)
-        if temp_dir.exists():
-            shutil.rmtree(temp_dir)
-            temp_dir.mkdir(exist_ok=True)
-            logger.info("temp 文件夹已清理")
+    return [Path(AUDIO_DIR, title) for title in generating_titles]
+
+# 后台清理服务，按保留策略清理音频、临时文件和导出文件
+janitor = Janitor([
+    RetentionRule(AUDIO_DIR, AUDIO_RETENTION_SECONDS, AUDIO_RETENTION_MAX_BYTES),
+    RetentionRule(TEMP_DIR, TEMP_RETENTION_SECONDS, TEMP_RETENTION_MAX_BYTES),
+    RetentionRule(EXPORT_DIR, EXPORT_RETENTION_SECONDS, EXPORT_RETENTION_MAX_BYTES),
+], protected=get_protected_paths)
+
+@app.middleware("http")
+async def session_middleware(request: Request, call_next):
+    """
+    为每个请求确定会话 ID，新用户在响应中下发会话 Cookie
+    
+    上传的临时文件、最近一次生成的标题等状态按会话保存，多个用户之间互不影响
+    """
+    session_id = request.cookies.get(SESSION_COOKIE_NAME)
+    is_new = not session_id
+    if is_new:
+        session_id = SESSION_STORE.new_id()
+    request.state.session_id = session_id
+    response = await call_next(request)
+    if is_new:
+        response.set_cookie(SESSION_COOKIE_NAME, session_id, max_age=int(SESSION_TTL_SECONDS), httponly=True, samesite="lax")
+    return response
+
+class UploadSizeMiddleware:
+    """
+    限制上传请求的请求体大小，超过上限时返回 413
+    
+    声明的大小超过上限时直接返回，不再读取请求体；没有声明大小（如分块传输）时，
+    在读取请求体的过程中累计大小，超过上限后立即返回 413 并停止读取，
+    而不是等整个请求体都写入临时文件后再由 save_upload 检查。
+    """
+
+    def __init__(self, app, path: str = "/upload"):
+        self.app = app
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
         
-        # 清理audios目录
-        audio_dir = Path(AUDIO_DIR)
-        if audio_dir.exists():
-            shutil.rmtree(audio_dir)
-            audio_dir.mkdir(exist_ok=True)
-            logger.info("audios 文件夹已清理")
-    except Exception as e:
-        logger.error(f"清理临时文件时出错: {e}")
+        request = Request(scope)
+        # 预留 multipart 边界和表单头部的开销
+        limit = MAX_UPLOAD_SIZE + 64 * 1024
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > limit:
+            await self.reject(request, receive, send)
+            return
+        
+        received = 0
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # 先返回 413，再让应用按客户端断开处理，应用之后的响应被丢弃
+                    rejected = True
+                    await self.reject(request, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            if not rejected:
+                await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
+
+    @staticmethod
+    async def reject(request: Request, receive, send):
+        """返回 413 和上传页面的错误提示"""
+        response = templates.TemplateResponse(request, "text.html", {
+            "error": f"文件大小超过上限 {MAX_UPLOAD_SIZE // (1024 * 1024)} MB，请压缩后重新上传或手动填写",
+            "text": ""
+        }, status_code=413)
+        await response(request.scope, receive, send)
+
+app.add_middleware(UploadSizeMiddleware)
 
-# 注册程序退出时的清理函数
-atexit.register(cleanup_temp_files)
+def remove_session_temp_file(session_id: str):
+    """
+    删除会话中记录的上传临时文件
+    """
+    temp_file = SESSION_STORE.get(session_id).get("temp_file")
+    if temp_file and Path(temp_file).exists():
+        Path(temp_file).unlink()
+    SESSION_STORE.update(session_id, temp_file=None)
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     """
     根路由，返回工具介绍和文件上传页面
     """
-    # 清理全局变量
-    global TEMP_FILE_PATH, CURRENT_UUID
-    TEMP_FILE_PATH = None
-    CURRENT_UUID = ""
+    # 清理当前会话的状态
+    SESSION_STORE.reset(request.state.session_id)
     
     return templates.TemplateResponse(request, "index.html")
 
@@ -90,39 +203,43 @@ async def upload_file(request: Request, file: UploadFile = File(...)):
     """
     处理文件上传，提取文本内容
     """
-    # 创建临时文件保存上传的文件
-    temp_dir = Path(TEMP_DIR)
-    temp_dir.mkdir(exist_ok=True)
-    
-    # 生成唯一的文件名
-    filename = file.filename or "unknown"
-    file_extension = Path(filename).suffix
-    temp_file_name = f"{uuid.uuid4()}{file_extension}"
-    temp_file_path = temp_dir / temp_file_name
-    
-    # 保存上传的文件
-    with open(temp_file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # 分块保存上传的文件，以内容哈希和会话命名，不同会话上传相同的文件时互不影响
+    try:
+        temp_file_path, content_hash = await save_upload(file, TEMP_DIR, MAX_UPLOAD_SIZE, owner=request.state.session_id)
+    except UploadTooLargeError as e:
+        logger.warning(f"上传文件 {file.filename} 被拒绝: {e}")
+        return templates.TemplateResponse(request, "text.html", {
+            "error": f"{e}，请压缩后重新上传或手动填写",
+            "text": ""
+        }, status_code=413)
     
     # 提取文本
+    # 提取、语言检测和读写缓存都在线程中进行，避免阻塞事件循环上的其他请求和进度推送
     try:
-        extracted_text = extract_text_from_file(str(temp_file_path))
-        if not extracted_text:
-            return templates.TemplateResponse(request, "text.html", {
-                "error": "无法从文件中提取文本，请确保文件格式正确且包含文本内容，再重新上传或手动填写",
-                "text": ""
-            })
-        
-        # 检测语言类型
-        detect_result = detect_language(extracted_text)
+        # 相同文件之前已提取过时直接使用缓存，无需再打开文件
+        cached = await asyncio.to_thread(get_cached_extraction, content_hash, temp_file_path.suffix)
+        if cached is not None:
+            logger.info(f"{file.filename} 命中提取结果缓存")
+            extracted_text, detect_result = cached["text"], cached["language"]
+        else:
+            extracted_text = await asyncio.to_thread(extract_text_from_file, str(temp_file_path))
+            if not extracted_text:
+                return templates.TemplateResponse(request, "text.html", {
+                    "error": "无法从文件中提取文本，请确保文件格式正确且包含文本内容，再重新上传或手动填写",
+                    "text": ""
+                })
+            
+            # 检测语言类型
+            detect_result = await asyncio.to_thread(detect_language, extracted_text)
+            await asyncio.to_thread(cache_extraction, content_hash, temp_file_path.suffix, extracted_text, detect_result)
         detect_error = detect_result.get("error")
         detect_name = detect_result.get("name")
         detect_locale = detect_result.get("locale")
         
-        # 保存临时文件路径到全局变量
-        global TEMP_FILE_PATH
-        TEMP_FILE_PATH = temp_file_path
+        # 保存临时文件路径到当前会话，替换掉之前上传的其他文件
+        if SESSION_STORE.get(request.state.session_id).get("temp_file") != str(temp_file_path):
+            remove_session_temp_file(request.state.session_id)
+        SESSION_STORE.update(request.state.session_id, temp_file=str(temp_file_path))
         
         # 跳转到文本确认页面
         return templates.TemplateResponse(request, "text.html", {
@@ -139,30 +256,125 @@ async def upload_file(request: Request, file: UploadFile = File(...)):
         })
 
 @app.post("/generate")
-async def generate(request: Request, text: str = Form(""), voice: str = Form(""), lang: str = Form("")):
+async def generate(request: Request, text: str = Form(""), voice: str = Form(""), lang: str = Form(""), mode: str = Form("")):
     """
     处理用户确认的文本，进行分句、翻译和音频生成
+    
+    mode 为 job 时立即返回任务 ID，处理过程在后台执行，可通过 /jobs/{job_id}/events 订阅进度
     """
+    if mode == "job":
+        session_id = request.state.session_id
+        job = job_manager.create(GENERATE_STAGES, lambda job: run_generate(text, voice, lang, session_id, job), context={"text": text})
+        return {
+            "job_id": job.id,
+            "status_url": f"/jobs/{job.id}",
+            "events_url": f"/jobs/{job.id}/events",
+            "result_url": f"/jobs/{job.id}/result",
+        }
+    
     try:
-        # 对文本进行分句
-        sentences = get_sentences(paragraph=text, lang=LANGUAGE_CODES.get(lang, "english"))
-        
-        if not sentences:
-            return templates.TemplateResponse(request, "text.html", {
-                "text": text,
-                "error": "未能从文本中分割出句子，请仔细检查文本内容"
-            })
-        
-        # 生成标题（用于音频文件夹名称）
-        title = str(uuid.uuid4())[:8]
+        output = await run_generate(text, voice, lang, request.state.session_id)
+        return render_results(request, output)
+    except NoSentencesError as e:
+        return templates.TemplateResponse(request, "text.html", {
+            "text": text,
+            "error": str(e)
+        })
+    except Exception as e:
+        logger.error(f"生成过程中发生错误: {str(e)}")
+        return templates.TemplateResponse(request, "text.html", {
+            "text": text,
+            "error": f"生成过程中发生错误: {str(e)}"
+        })
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    获取生成任务的状态和各阶段进度
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "任务不存在或已过期"}, status_code=404)
+    return job.snapshot()
+
+@app.get("/jobs/{job_id}/events")
+async def get_job_events(job_id: str):
+    """
+    通过 SSE 推送生成任务的状态和进度，任务结束后关闭连接
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "任务不存在或已过期"}, status_code=404)
+    
+    async def event_stream():
+        async for snapshot in job.events():
+            yield f"data: {json.dumps(snapshot, ensure_ascii=False)}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        # 避免反向代理缓冲事件流
+        "X-Accel-Buffering": "no",
+    })
+
+@app.get("/jobs/{job_id}/result", response_class=HTMLResponse)
+async def get_job_result(request: Request, job_id: str):
+    """
+    获取已完成的生成任务的结果页面
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "任务不存在或已过期"}, status_code=404)
+    if not job.finished:
+        return JSONResponse({"error": "任务尚未完成", "status": job.status}, status_code=409)
+    if job.status != JOB_DONE:
+        return templates.TemplateResponse(request, "text.html", {
+            "text": job.context.get("text", ""),
+            "error": job.error if isinstance(job.exception, NoSentencesError) else f"生成过程中发生错误: {job.error}"
+        })
+    return render_results(request, job.result)
+
+async def run_generate(text: str, voice: str, lang: str, session_id: str, job: Optional[Job] = None) -> dict:
+    """
+    执行分句、翻译和音频生成
+    
+    Args:
+        text (str): 用户确认的文本
+        voice (str): 音色名称
+        lang (str): 语言代码
+        session_id (str): 会话 ID，用于清理该会话上传的临时文件
+        job (Optional[Job], optional): 后台任务，提供时上报各阶段进度
         
-        # 翻译句子
+    Returns:
+        dict: title音频目录标题 results结果列表 warning警告信息
+    """
+    def progress(stage: str):
+        return job.progress_callback(stage) if job is not None else None
+    
+    # 对文本进行分句
+    if job is not None:
+        job.set_stage("split")
+    sentences = await asyncio.to_thread(get_sentences, paragraph=text, lang=LANGUAGE_CODES.get(lang, "english"))
+    
+    if not sentences:
+        raise NoSentencesError("未能从文本中分割出句子，请仔细检查文本内容")
+    
+    # 生成标题（用于音频文件夹名称）
+    title = str(uuid.uuid4())[:8]
+    # 生成过程中音频目录不会被后台清理
+    generating_titles.add(title)
+    try:
+        # 同时翻译句子和生成音频
         lang_code = lang if lang in LANGUAGE_CODES else "en"
-        translated_sentences = get_text_translated(sentences, from_lang=lang_code)
-        
-        # 生成音频
         voice_name = voice if voice else "en-US-ChristopherNeural"
-        audio_dir, audio_filenames, warning_msg = await generate_audio(sentences, voice_name, title)
+        if job is not None:
+            job.set_stage("translate", len(sentences))
+            job.set_stage("tts", len(sentences))
+        output = await translate_and_synthesize(
+            sentences, voice_name, title, from_lang=lang_code,
+            translate_progress=progress("translate"), tts_progress=progress("tts")
+        )
+        translated_sentences = output["translations"]
+        audio_dir, audio_filenames, warning_msg = output["audio_dir"], output["filenames"], output["warning"]
         
         # 构建结果列表
         results = []
@@ -175,34 +387,29 @@ async def generate(request: Request, text: str = Form(""), voice: str = Form("")
             })
         
         # 清理临时文件
-        global TEMP_FILE_PATH
-        if TEMP_FILE_PATH and TEMP_FILE_PATH.exists():
-            TEMP_FILE_PATH.unlink()
-            TEMP_FILE_PATH = None
-        
-        # 保存html文件 用于后续导出
-        save_html(title, {"results": results})
+        remove_session_temp_file(session_id)
         
-        # 保存当前的UUID标题
-        global CURRENT_UUID
-        CURRENT_UUID = title
-        
-        # 返回结果页面
-        if warning_msg:
-            return templates.TemplateResponse(request, "results.html", {
-                "results": results,
-                "warning": warning_msg
-            })
+        return {"title": title, "results": results, "warning": warning_msg}
+    finally:
+        generating_titles.discard(title)
+
+def render_results(request: Request, output: dict):
+    """
+    返回结果页面，并在当前会话中记录UUID标题和结果列表用于导出
+    """
+    # 保存当前的UUID标题和结果列表，导出时据此渲染页面
+    SESSION_STORE.update(request.state.session_id, title=output["title"], results=output["results"])
+    janitor.touch(Path(AUDIO_DIR, output["title"]))
+    
+    # 返回结果页面
+    if output["warning"]:
         return templates.TemplateResponse(request, "results.html", {
-            "results": results
-        })
-        
-    except Exception as e:
-        logger.error(f"生成过程中发生错误: {str(e)}")
-        return templates.TemplateResponse(request, "text.html", {
-            "text": text,
-            "error": f"生成过程中发生错误: {str(e)}"
+            "results": output["results"],
+            "warning": output["warning"]
         })
+    return templates.TemplateResponse(request, "results.html", {
+        "results": output["results"]
+    })
 
 @app.get("/voices")
 async def get_voices(locale: str = "en-US"):
@@ -235,37 +442,74 @@ async def get_languages():
         logger.error(f"获取语言列表时出错: {str(e)}")
         return {"error": f"获取语言列表时出错: {str(e)}"}
 
+# 导出页面依赖的静态文件：(导出目录中的相对路径, 源文件)
+EXPORT_STATIC_FILES = [
+    ("css/common.css", Path("static", "css", "common.css")),
+    ("css/results.css", Path("static", "css", "results.css")),
+    ("css/theme.css", Path("static", "css", "theme.css")),
+    ("js/results.js", Path("static", "js", "results.js")),
+    ("img/favicon.png", Path("static", "img", "favicon.png")),
+]
+
+def get_export_files(title: str) -> List[tuple]:
+    """
+    列出导出内容包含的静态文件和音频文件，页面本身在导出时渲染
+    
+    Args:
+        title (str): 标题
+        
+    Returns:
+        List[tuple]: (导出目录中的相对路径, 源文件) 列表
+    """
+    audio_dir = Path(AUDIO_DIR, title)
+    files = list(EXPORT_STATIC_FILES)
+    missing = [str(source) for _, source in files if not source.is_file()]
+    if not audio_dir.is_dir():
+        missing.append(str(audio_dir))
+    if missing:
+        raise FileNotFoundError(f"导出所需的文件不存在: {', '.join(missing)}")
+    
+    # 音频保持 audios/<标题>/ 的目录结构，与页面中引用的相对路径一致
+    for audio_file in sorted(audio_dir.rglob("*")):
+        if audio_file.is_file():
+            files.append((audio_file.as_posix(), audio_file))
+    return files
+
 @app.get("/export")
-async def export_content():
+async def export_content(request: Request, mode: str = "folder"):
     """
-    导出当前结果页面和音频文件
+    导出当前会话的结果页面和音频文件
+    
+    mode 为 folder 时复制到服务器的 exports 目录下并返回路径；
+    为 zip 时直接以 ZIP 压缩包的形式流式下载，不在服务器上生成副本
     """
     try:
-        # 创建导出目录
-        export_dir = Path(EXPORT_DIR)
-        export_dir.mkdir(exist_ok=True)
+        session = SESSION_STORE.get(request.state.session_id)
+        title = session.get("title")
+        if not title:
+            raise ValueError("当前会话没有可导出的结果，请先生成")
         
-        # 创建一个文件夹存放本次导出的文件
-        export_folder = export_dir / f"TingJu_{dt.now().strftime('%Y-%m-%d_%H-%M-%S')}"
-        export_folder.mkdir(exist_ok=True)
-        index_html= Path(export_folder, "index.html")
-        css_dir = Path(export_folder, "css")
-        css_dir.mkdir(exist_ok=True)
-        js_dir = Path(export_folder, "js")
-        js_dir.mkdir(exist_ok=True)
-        img_dir = Path(export_folder, "img")
-        img_dir.mkdir(exist_ok=True)
-        audios_dir = Path(export_folder, AUDIO_DIR)
-        audios_dir.mkdir(exist_ok=True)
+        folder_name = f"TingJu_{dt.now().strftime('%Y-%m-%d_%H-%M-%S')}_{title}"
+        janitor.touch(Path(AUDIO_DIR, title))
+        files = get_export_files(title)
+        results = session.get("results", [])
         
-        # 将html css js favicon.png audios 复制到 export_folder 下
-        shutil.copy(Path(TEMP_DIR, f"{CURRENT_UUID}.html"), index_html)
-        shutil.copy(Path("static", "css", "common.css"), css_dir)
-        shutil.copy(Path("static", "css", "results.css"), css_dir)
-        shutil.copy(Path("static", "css", "theme.css"), css_dir)
-        shutil.copy(Path("static", "js", "results.js"), js_dir)
-        shutil.copy(Path("static", "img", "favicon.png"), img_dir)
-        shutil.copytree(Path(AUDIO_DIR, CURRENT_UUID), Path(audios_dir, CURRENT_UUID))
+        if mode == "zip":
+            entries = [(f"{folder_name}/index.html", EXPORT_RENDERER.stream(results=results))]
+            entries += [(f"{folder_name}/{name}", source) for name, source in files]
+            filename = quote(f"{folder_name}.zip")
+            return StreamingResponse(iter_zip(entries), media_type="application/zip", headers={
+                "Content-Disposition": f"attachment; filename*=UTF-8''{filename}"
+            })
+        
+        # 创建一个文件夹存放本次导出的文件
+        export_folder = Path(EXPORT_DIR, folder_name)
+        Path(export_folder, AUDIO_DIR, title).mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(write_export_page, Path(export_folder, "index.html"), results)
+        for name, source in files:
+            dest = export_folder / name
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy(source, dest)
         
         return {
             "status": "success",
@@ -274,30 +518,20 @@ async def export_content():
         }
     except Exception as e:
         logger.error(f"导出文件时出错: {str(e)}")
-        return {
+        return JSONResponse({
             "status": "error",
             "message": str(e),
             "path": ""
-        }
+        }, status_code=404 if mode == "zip" else 200)
 
-def save_html(title: str, data: Dict[str, List[Dict[str, str]]]):
+def write_export_page(file_path: Path, results: List[Dict[str, str]]):
     """
-    保存HTML文件
+    流式渲染导出页面并写入文件
     """
-    try:
-        import jinja2
-        # 读取模板文件
-        with open("templates/export_template.html", encoding="utf-8") as f:
-            template_content = f.read()
-        template = jinja2.Template(template_content)
-        html_content = template.render(**data)
-        # 保存HTML文件到temp目录
-        html_file_path = Path(TEMP_DIR) / f"{title}.html"
-        with open(html_file_path, "w", encoding="utf-8") as f:
-            f.write(html_content)
-    except Exception as e:
-        logger.error(f"保存HTML文件失败: {e}")
-        
+    with open(file_path, "w", encoding="utf-8") as f:
+        for chunk in EXPORT_RENDERER.stream(results=results):
+            f.write(chunk)
+
 def get_local_ips():
     """
     获取所有有效的本地IP地址
@@ -336,9 +570,13 @@ def open_browser(url: str):
         logger.warning(f"自动打开浏览器时出错: {e}")
         
 if __name__ == "__main__":
+    import multiprocessing
     import uvicorn
     import threading
     
+    # 打包后的程序中，进程池的子进程会重新执行本程序，需在启动服务之前交由 multiprocessing 处理
+    multiprocessing.freeze_support()
+    
     try:
         print("--------------------------------------------------")
         
@@ -356,6 +594,9 @@ if __name__ == "__main__":
         # 初始化NLTK
         init_nltk()
         
+        # 后台探测翻译器，为翻译器排序和熔断提供初始数据
+        threading.Thread(target=init_translators, daemon=True).start()
+        
         # 启动浏览器
         threading.Thread(target=open_browser, args=("http://127.0.0.1:51122",), daemon=True).start()
         
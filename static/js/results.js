@@ -266,4 +266,12 @@ document.addEventListener('DOMContentLoaded', function () {
             }, 10000); // 10000毫秒 = 10秒
         });
     }
+
+    // 下载功能：由浏览器直接接收服务器流式生成的 ZIP 压缩包
+    const downloadBtn = document.getElementById('download-btn');
+    if (downloadBtn) {
+        downloadBtn.addEventListener('click', function () {
+            window.location.href = '/export?mode=zip';
+        });
+    }
 });
\ No newline at end of file
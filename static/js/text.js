@@ -224,6 +224,13 @@ document.addEventListener('DOMContentLoaded', function () {
                 loadingOverlay.style.display = 'flex';
             }
 
+            // 浏览器支持 SSE 时以后台任务方式生成，避免长时间占用连接
+            if (window.EventSource && window.fetch) {
+                e.preventDefault();
+                submitGenerateJob(form);
+                return false;
+            }
+
             return true;
         });
     }
@@ -239,4 +246,63 @@ document.addEventListener('DOMContentLoaded', function () {
     if (savedFontTheme) {
         document.documentElement.setAttribute('font-theme', savedFontTheme);
     }
-});
\ No newline at end of file
+});
+
+// 各阶段的显示名称
+const STAGE_NAMES = {
+    split: '分句',
+    translate: '翻译',
+    tts: '音频生成',
+};
+
+// 以后台任务方式提交生成请求，并通过 SSE 显示进度
+async function submitGenerateJob(form) {
+    const progressText = document.getElementById('loading-progress');
+    try {
+        const formData = new FormData(form);
+        formData.append('mode', 'job');
+        const response = await fetch('/generate', { method: 'POST', body: formData });
+        if (!response.ok) {
+            throw new Error(response.status + ' ' + response.statusText);
+        }
+        const job = await response.json();
+
+        const source = new EventSource(job.events_url);
+        source.onmessage = function (event) {
+            const snapshot = JSON.parse(event.data);
+            const stage = snapshot.stage ? snapshot.progress[snapshot.stage] : null;
+            if (progressText && stage) {
+                const name = STAGE_NAMES[snapshot.stage] || snapshot.stage;
+                progressText.textContent = stage.total > 0 ? `${name}中... ${stage.done}/${stage.total}` : `${name}中...`;
+            }
+            if (['done', 'failed', 'cancelled'].includes(snapshot.status)) {
+                source.close();
+                window.location.href = job.result_url;
+            }
+        };
+        source.onerror = function () {
+            // 连接中断时改为直接请求结果页面，任务未完成时稍后重试
+            source.close();
+            waitForJobResult(job);
+        };
+    } catch (error) {
+        console.error('提交生成任务时出错:', error);
+        // 回退为普通表单提交
+        form.submit();
+    }
+}
+
+// 轮询任务状态，完成后跳转到结果页面
+async function waitForJobResult(job) {
+    try {
+        const response = await fetch(job.status_url);
+        const snapshot = await response.json();
+        if (!response.ok || ['done', 'failed', 'cancelled'].includes(snapshot.status)) {
+            window.location.href = job.result_url;
+            return;
+        }
+    } catch (error) {
+        console.error('查询任务状态时出错:', error);
+    }
+    setTimeout(() => waitForJobResult(job), 2000);
+}
@@ -0,0 +1,58 @@
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator
+from unittest import mock
+from utils import audio_generator, file_processor, text_translator
+from utils.disk_cache import DiskCache
+from utils.translator_health import TranslatorHealth
+
+@contextmanager
+def temp_audio_cache(max_bytes: int = 1024 * 1024) -> Iterator[DiskCache]:
+    """
+    在临时目录中创建音频缓存并替换全局的 AUDIO_CACHE，退出时恢复并删除临时目录
+
+    Args:
+        max_bytes (int, optional): 缓存大小上限（字节）。默认为 1 MB
+
+    Yields:
+        DiskCache: 临时的音频缓存
+    """
+    cache_dir = tempfile.mkdtemp()
+    try:
+        cache = DiskCache(cache_dir, max_bytes=max_bytes, suffix=".mp3")
+        with mock.patch.object(audio_generator, "AUDIO_CACHE", cache):
+            yield cache
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+@contextmanager
+def temp_text_cache(max_bytes: int = 1024 * 1024) -> Iterator[DiskCache]:
+    """
+    在临时目录中创建提取文本缓存并替换全局的 TEXT_CACHE，退出时恢复并删除临时目录
+
+    Args:
+        max_bytes (int, optional): 缓存大小上限（字节）。默认为 1 MB
+
+    Yields:
+        DiskCache: 临时的提取文本缓存
+    """
+    cache_dir = tempfile.mkdtemp()
+    try:
+        cache = DiskCache(cache_dir, max_bytes=max_bytes, suffix=".json")
+        with mock.patch.object(file_processor, "TEXT_CACHE", cache):
+            yield cache
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+@contextmanager
+def temp_translator_health() -> Iterator[TranslatorHealth]:
+    """
+    使用不持久化的健康状态替换全局的 TRANSLATOR_HEALTH，测试中的翻译结果不会写入 cache/translator_health.json
+
+    Yields:
+        TranslatorHealth: 临时的翻译器健康状态
+    """
+    health = TranslatorHealth(file_path=None)
+    with mock.patch.object(text_translator, "TRANSLATOR_HEALTH", health):
+        yield health
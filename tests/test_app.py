@@ -1,11 +1,20 @@
 import unittest
+import asyncio
 import tempfile
+import json
+import io
 import os
 import shutil
+import zipfile
 from pathlib import Path
+from unittest import mock
 from fastapi.testclient import TestClient
 
-from app import app, TEMP_DIR, EXPORT_DIR, AUDIO_DIR, cleanup_temp_files
+import app as app_module
+from utils.pipeline import translate_and_synthesize
+from utils.tts_scheduler import TTSScheduler, FakeTTSBackend
+from app import app, TEMP_DIR, EXPORT_DIR, AUDIO_DIR
+from tests.helpers import temp_audio_cache, temp_text_cache, temp_translator_health
 
 class TestApp(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
@@ -13,6 +22,26 @@ class TestApp(unittest.IsolatedAsyncioTestCase):
         self.app = app
         self.client = TestClient(self.app)
         
+        # 使用不持久化的翻译器健康状态和临时音频缓存，测试不写入 cache 目录
+        for context in (temp_translator_health(), temp_audio_cache()):
+            context.__enter__()
+            self.addCleanup(context.__exit__, None, None, None)
+        
+        # 使用本地的翻译函数和模拟 TTS 后端，测试不依赖在线翻译器和语音服务
+        def fake_translate(text, from_lang, to_lang, translator):
+            return f"[{to_lang}] {text}"
+        
+        async def offline_translate_and_synthesize(sentences, voice_name, title, **kwargs):
+            return await translate_and_synthesize(
+                sentences, voice_name, title, **kwargs,
+                translate_func=fake_translate, memory=None, health=None,
+                scheduler=TTSScheduler(FakeTTSBackend(latency=0.001))
+            )
+        
+        patcher = mock.patch.object(app_module, "translate_and_synthesize", offline_translate_and_synthesize)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
         # 创建必要的目录
         Path(TEMP_DIR).mkdir(exist_ok=True)
         Path(AUDIO_DIR).mkdir(exist_ok=True)
@@ -20,14 +49,11 @@ class TestApp(unittest.IsolatedAsyncioTestCase):
 
     def tearDown(self):
         """在每个测试之后执行"""
-        # 清理临时文件
-        cleanup_temp_files()
-                    
-        # 清理导出文件
-        export_dir = Path(EXPORT_DIR)
-        if export_dir.exists():
-            shutil.rmtree(export_dir)
-            export_dir.mkdir(exist_ok=True)
+        # 清理临时文件、音频文件和导出文件
+        for directory in (TEMP_DIR, AUDIO_DIR, EXPORT_DIR):
+            if Path(directory).exists():
+                shutil.rmtree(directory)
+                Path(directory).mkdir(exist_ok=True)
 
     async def test_read_root(self):
         """测试根路径访问"""
@@ -65,8 +91,8 @@ class TestApp(unittest.IsolatedAsyncioTestCase):
             tmp_file_path = tmp_file.name
 
         try:
-            # 上传文件
-            with open(tmp_file_path, 'rb') as f:
+            # 上传文件，提取结果写入临时缓存目录
+            with open(tmp_file_path, 'rb') as f, temp_text_cache():
                 response = self.client.post("/upload", files={"file": f})
             
             # 检查响应
@@ -79,6 +105,66 @@ class TestApp(unittest.IsolatedAsyncioTestCase):
             # 清理临时文件
             os.unlink(tmp_file_path)
 
+    async def test_upload_file_cached(self):
+        """测试重复上传相同文件时使用提取结果缓存，不再打开文件"""
+        content = "This is a cached test sentence. This is another cached test sentence.".encode("utf-8")
+        with temp_text_cache():
+            response = self.client.post("/upload", files={"file": ("book.txt", content)})
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("This is a cached test sentence.", response.text)
+            
+            with mock.patch.object(app_module, "extract_text_from_file") as extract:
+                response = self.client.post("/upload", files={"file": ("copy.txt", content)})
+                extract.assert_not_called()
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("This is a cached test sentence.", response.text)
+
+    async def test_upload_off_event_loop(self):
+        """测试上传时的文本提取和语言检测在线程中进行，不阻塞事件循环"""
+        def in_event_loop():
+            try:
+                asyncio.get_running_loop()
+                return True
+            except RuntimeError:
+                return False
+
+        calls = []
+
+        def fake_extract(file_path):
+            calls.append(in_event_loop())
+            return "This is a test sentence."
+
+        def fake_detect(text):
+            calls.append(in_event_loop())
+            return {"name": "english", "locale": "en-US"}
+
+        with mock.patch.object(app_module, "extract_text_from_file", fake_extract), \
+             mock.patch.object(app_module, "detect_language", fake_detect), \
+             mock.patch.object(app_module, "get_cached_extraction", return_value=None), \
+             mock.patch.object(app_module, "cache_extraction"):
+            response = self.client.post("/upload", files={"file": ("thread.txt", b"This is a test sentence.")})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(calls, [False, False])
+
+    async def test_upload_session_isolation(self):
+        """测试不同会话上传相同的文件时各自保存，一个会话删除临时文件不影响另一个会话"""
+        content = b"This is a shared test sentence. This is another shared test sentence."
+        client_a, client_b = TestClient(self.app), TestClient(self.app)
+        with mock.patch.object(app_module, "get_cached_extraction", return_value=None), \
+             mock.patch.object(app_module, "cache_extraction"):
+            for client in (client_a, client_b):
+                response = client.post("/upload", files={"file": ("book.txt", content)})
+                self.assertEqual(response.status_code, 200)
+        
+        session_a, session_b = client_a.cookies["tingju_session"], client_b.cookies["tingju_session"]
+        file_a = app_module.SESSION_STORE.get(session_a)["temp_file"]
+        file_b = app_module.SESSION_STORE.get(session_b)["temp_file"]
+        self.assertNotEqual(file_a, file_b)
+        
+        app_module.remove_session_temp_file(session_a)
+        self.assertFalse(Path(file_a).exists())
+        self.assertTrue(Path(file_b).exists())
+
     async def test_upload_file_unsupported(self):
         """测试上传不支持的文件类型"""
         # 创建一个不支持的文件类型
@@ -99,6 +185,30 @@ class TestApp(unittest.IsolatedAsyncioTestCase):
             # 清理临时文件
             os.unlink(tmp_file_path)
 
+    async def test_upload_file_too_large(self):
+        """测试上传超出大小上限的文件时返回 413"""
+        with mock.patch.object(app_module, "MAX_UPLOAD_SIZE", 16):
+            response = self.client.post("/upload", files={"file": ("big.txt", b"This is a test sentence. " * 10)})
+        self.assertEqual(response.status_code, 413)
+        self.assertIn("文件大小超过上限", response.text)
+
+    async def test_upload_file_too_large_chunked(self):
+        """测试没有声明大小的分块上传在读取请求体的过程中超过上限时返回 413"""
+        def body():
+            yield b'--boundary\r\nContent-Disposition: form-data; name="file"; filename="big.txt"\r\n\r\n'
+            for _ in range(100):
+                yield b"x" * 4096
+            yield b"\r\n--boundary--\r\n"
+
+        with mock.patch.object(app_module, "MAX_UPLOAD_SIZE", 16), \
+             mock.patch.object(app_module, "save_upload") as save:
+            response = self.client.post("/upload", content=body(),
+                                        headers={"content-type": "multipart/form-data; boundary=boundary"})
+        self.assertEqual(response.status_code, 413)
+        self.assertIn("文件大小超过上限", response.text)
+        # 在请求体读完之前就已拒绝，请求没有到达上传处理函数
+        save.assert_not_called()
+
     async def test_generate(self):
         """测试生成音频和翻译功能"""
         test_text = "This is a test sentence. This is another test sentence."
@@ -118,6 +228,36 @@ class TestApp(unittest.IsolatedAsyncioTestCase):
         self.assertIn("This is a test sentence.", response.text)
         self.assertIn("This is another test sentence.", response.text)
 
+    async def test_generate_job(self):
+        """测试以后台任务方式生成，并通过 SSE 获取进度"""
+        test_text = "This is a test sentence. This is another test sentence."
+        with TestClient(self.app) as client:
+            response = client.post("/generate", data={
+                "text": test_text,
+                "voice": "en-US-ChristopherNeural",
+                "lang": "en",
+                "mode": "job"
+            })
+            self.assertEqual(response.status_code, 200)
+            job = response.json()
+            self.assertIn("job_id", job)
+            
+            # 订阅进度直到任务结束
+            with client.stream("GET", job["events_url"]) as events:
+                self.assertIn("text/event-stream", events.headers["content-type"])
+                snapshots = [json.loads(line[len("data: "):]) for line in events.iter_lines() if line.startswith("data: ")]
+            self.assertEqual(snapshots[-1]["status"], "done")
+            self.assertEqual(snapshots[-1]["progress"]["translate"]["total"], 2)
+            
+            # 获取结果页面
+            response = client.get(job["result_url"])
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("result-item", response.text)
+            self.assertIn("This is a test sentence.", response.text)
+            
+            # 不存在的任务
+            self.assertEqual(client.get("/jobs/unknown").status_code, 404)
+
     async def test_generate_empty_text(self):
         """测试生成空文本时的处理"""
         response = self.client.post("/generate", data={
@@ -134,7 +274,7 @@ class TestApp(unittest.IsolatedAsyncioTestCase):
 
     async def test_export_content(self):
         """测试导出功能"""
-        # 先生成一些内容，设置CURRENT_UUID
+        # 先生成一些内容，在当前会话中记录标题
         test_text = "This is a test sentence. This is another test sentence."
         response = self.client.post("/generate", data={
             "text": test_text,
@@ -166,5 +306,84 @@ class TestApp(unittest.IsolatedAsyncioTestCase):
         self.assertTrue((export_path / "img").exists())
         self.assertTrue((export_path / AUDIO_DIR).exists())
 
+    async def test_export_zip(self):
+        """测试以 ZIP 压缩包形式流式下载导出内容，不在服务器上生成副本"""
+        test_text = "This is a test sentence. This is another test sentence."
+        response = self.client.post("/generate", data={
+            "text": test_text,
+            "voice": "en-US-ChristopherNeural",
+            "lang": "en"
+        })
+        self.assertEqual(response.status_code, 200)
+        
+        # 生成时不再渲染导出页面
+        self.assertEqual(list(Path(TEMP_DIR).glob("*.html")), [])
+        
+        exports_before = list(Path(EXPORT_DIR).iterdir())
+        response = self.client.get("/export", params={"mode": "zip"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/zip")
+        self.assertIn("attachment", response.headers["content-disposition"])
+        self.assertEqual(list(Path(EXPORT_DIR).iterdir()), exports_before)
+        
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            names = archive.namelist()
+            root = names[0].split("/")[0]
+            self.assertTrue(root.startswith("TingJu_"))
+            for name in ["index.html", "css/common.css", "js/results.js", "img/favicon.png"]:
+                self.assertIn(f"{root}/{name}", names)
+            title = root.split("_", 3)[3]
+            audio_files = [path for path in Path(AUDIO_DIR, title).rglob("*") if path.is_file()]
+            audio_names = [name for name in names if name.startswith(f"{root}/{AUDIO_DIR}/{title}/")]
+            self.assertEqual(len(audio_names), len(audio_files))
+        
+        # 没有可导出的结果时返回错误
+        with TestClient(self.app) as client:
+            response = client.get("/export", params={"mode": "zip"})
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response.json()["status"], "error")
+
+    async def test_session_isolation(self):
+        """测试不同会话之间的导出互不影响"""
+        test_text = "This is a test sentence. This is another test sentence."
+        with TestClient(self.app) as client_a, TestClient(self.app) as client_b:
+            response = client_a.post("/generate", data={
+                "text": test_text,
+                "voice": "en-US-ChristopherNeural",
+                "lang": "en"
+            })
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("tingju_session", client_a.cookies)
+            
+            # 另一个会话尚未生成内容，不能导出前一个会话的结果
+            client_b.get("/")
+            self.assertNotEqual(client_a.cookies["tingju_session"], client_b.cookies["tingju_session"])
+            self.assertEqual(client_b.get("/export").json()["status"], "error")
+            
+            # 原会话仍可正常导出
+            self.assertEqual(client_a.get("/export").json()["status"], "success")
+
+    async def test_janitor_protects_generating_dirs(self):
+        """测试后台清理跳过正在生成中的音频目录，同步请求和后台任务均受保护"""
+        protected_during = []
+        
+        async def fake_translate_and_synthesize(sentences, voice_name, title, **kwargs):
+            protected_during.append((title, app_module.get_protected_paths()))
+            return {"translations": sentences, "audio_dir": Path(AUDIO_DIR, title),
+                    "filenames": [f"{i}.mp3" for i in range(len(sentences))], "warning": ""}
+        
+        with mock.patch.object(app_module, "translate_and_synthesize", fake_translate_and_synthesize):
+            output = await app_module.run_generate("This is a test sentence.", "", "en", "session")
+            job = app_module.job_manager.create(
+                ["tts"], lambda job: app_module.run_generate("This is a test sentence.", "", "en", "session", job)
+            )
+            await job.task
+        
+        self.assertEqual(len(protected_during), 2)
+        for title, protected in protected_during:
+            self.assertIn(Path(AUDIO_DIR, title), protected)
+        self.assertEqual(protected_during[0][0], output["title"])
+        self.assertEqual(app_module.get_protected_paths(), [])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,7 +1,11 @@
 import unittest
+import asyncio
 import shutil
 from pathlib import Path
-from utils.audio_generator import list_voices, generate_audio, AUDIO_DIR
+from unittest import mock
+from utils import audio_generator
+from utils.audio_generator import list_voices, generate_audio, generate_audio_sync, get_cache_key, AUDIO_DIR
+from tests.helpers import temp_audio_cache
 
 class TestAudioGenerator(unittest.IsolatedAsyncioTestCase):
     async def test_list_voices(self):
@@ -36,5 +40,130 @@ class TestAudioGenerator(unittest.IsolatedAsyncioTestCase):
         if dir.exists():
             shutil.rmtree(dir)
 
+    async def test_generate_audio_from_cache(self):
+        """测试缓存命中时直接复用音频，不再调用 TTS"""
+        text_list = ['It is often said that we are what we repeatedly do.',
+                     'Whether good or bad, habits are powerful forces that quietly direct our future.']
+        voice_name = "en-US-ChristopherNeural"
+        try:
+            with temp_audio_cache() as cache, \
+                 mock.patch("edge_tts.Communicate", side_effect=AssertionError("不应调用 TTS")):
+                for text in text_list:
+                    key = get_cache_key(text, voice_name)
+                    tmp_path = cache.reserve(key)
+                    tmp_path.write_bytes(text.encode('utf-8'))
+                    cache.commit(key, tmp_path)
+                audio_dir, filenames, warning_msg = await generate_audio(text_list, voice_name, "test_cache")
+                hits = cache.stats()["hits"]
+
+            self.assertEqual(warning_msg, "")
+            for text, filename in zip(text_list, filenames):
+                self.assertEqual(audio_dir.joinpath(filename).read_text(encoding='utf-8'), text)
+            self.assertEqual(hits, len(text_list))
+        finally:
+            shutil.rmtree(Path(AUDIO_DIR, "test_cache"), ignore_errors=True)
+
+    async def test_waiter_resynthesizes_when_owner_cancelled(self):
+        """测试合成方被取消时，等待相同内容的任务自行重新合成，而不会一直挂起"""
+        started = asyncio.Event()
+        calls = []
+
+        class BlockingScheduler:
+            async def synthesize(self, text, voice_name, file_path, rate, pitch):
+                calls.append(text)
+                if len(calls) == 1:
+                    # 第一次合成一直阻塞，直到被取消
+                    started.set()
+                    await asyncio.Event().wait()
+                Path(file_path).write_bytes(text.encode('utf-8'))
+
+        text = 'It is often said that we are what we repeatedly do.'
+        voice_name = "en-US-ChristopherNeural"
+        scheduler = BlockingScheduler()
+        try:
+            with temp_audio_cache():
+                owner = asyncio.create_task(generate_audio([text], voice_name, "test_cancel_owner", scheduler=scheduler))
+                await started.wait()
+                waiter = asyncio.create_task(generate_audio([text], voice_name, "test_cancel_waiter", scheduler=scheduler))
+                await asyncio.sleep(0.05)
+                owner.cancel()
+                audio_dir, filenames, warning_msg = await asyncio.wait_for(waiter, timeout=5)
+
+            self.assertEqual(warning_msg, "")
+            self.assertEqual(audio_dir.joinpath(filenames[0]).read_text(encoding='utf-8'), text)
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(audio_generator._inflight, {})
+        finally:
+            shutil.rmtree(Path(AUDIO_DIR, "test_cancel_owner"), ignore_errors=True)
+            shutil.rmtree(Path(AUDIO_DIR, "test_cancel_waiter"), ignore_errors=True)
+
+    async def test_resynthesize_when_evicted(self):
+        """测试缓存命中后、链接之前条目被淘汰时重新合成，而不是报错"""
+        calls = []
+
+        class RecordingScheduler:
+            async def synthesize(self, text, voice_name, file_path, rate, pitch):
+                calls.append(text)
+                Path(file_path).write_bytes(text.encode('utf-8'))
+
+        text = 'It is often said that we are what we repeatedly do.'
+        voice_name = "en-US-ChristopherNeural"
+        try:
+            with temp_audio_cache() as cache:
+                key = get_cache_key(text, voice_name)
+                tmp_path = cache.reserve(key)
+                tmp_path.write_bytes(text.encode('utf-8'))
+                cache.commit(key, tmp_path)
+                link_to = cache.link_to
+
+                def evict_then_link(key, dest):
+                    # 模拟其他线程在查询之后淘汰了该条目
+                    if not calls:
+                        cache._path(key).unlink()
+                    return link_to(key, dest)
+
+                with mock.patch.object(cache, "link_to", side_effect=evict_then_link):
+                    audio_dir, filenames, warning_msg = await generate_audio([text], voice_name, "test_evicted",
+                                                                             scheduler=RecordingScheduler())
+
+            self.assertEqual(warning_msg, "")
+            self.assertEqual(audio_dir.joinpath(filenames[0]).read_text(encoding='utf-8'), text)
+            self.assertEqual(calls, [text])
+        finally:
+            shutil.rmtree(Path(AUDIO_DIR, "test_evicted"), ignore_errors=True)
+
+    async def test_generate_audio_sync(self):
+        """测试同步接口同样经过调度器合成并复用缓存"""
+        calls = []
+
+        class RecordingScheduler:
+            async def synthesize(self, text, voice_name, file_path, rate, pitch):
+                calls.append(text)
+                Path(file_path).write_bytes(text.encode('utf-8'))
+
+        text_list = ['It is often said that we are what we repeatedly do.',
+                     'Whether good or bad, habits are powerful forces that quietly direct our future.']
+        voice_name = "en-US-ChristopherNeural"
+        try:
+            with temp_audio_cache():
+                # 同步接口会新建事件循环，因此在线程中调用
+                audio_dir, filenames = await asyncio.to_thread(generate_audio_sync, text_list, voice_name, "test_sync",
+                                                               scheduler=RecordingScheduler())
+                await asyncio.to_thread(generate_audio_sync, text_list, voice_name, "test_sync",
+                                        scheduler=RecordingScheduler())
+
+            self.assertEqual(calls, text_list)
+            for text, filename in zip(text_list, filenames):
+                self.assertEqual(audio_dir.joinpath(filename).read_text(encoding='utf-8'), text)
+        finally:
+            shutil.rmtree(Path(AUDIO_DIR, "test_sync"), ignore_errors=True)
+
+    def test_cache_key(self):
+        """测试缓存键只与音色、语速音调和规范化文本有关"""
+        voice_name = "en-US-ChristopherNeural"
+        self.assertEqual(get_cache_key(" Hello   world. ", voice_name), get_cache_key("Hello world.", voice_name))
+        self.assertNotEqual(get_cache_key("Hello world.", voice_name), get_cache_key("Hello world.", "en-US-AriaNeural"))
+        self.assertNotEqual(get_cache_key("Hello world.", voice_name), get_cache_key("Hello world.", voice_name, rate="+10%"))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
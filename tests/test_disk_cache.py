@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from utils.disk_cache import DiskCache
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def _put(self, cache: DiskCache, key: str, content: bytes) -> Path:
+        tmp_path = cache.reserve(key)
+        tmp_path.write_bytes(content)
+        return cache.commit(key, tmp_path)
+
+    def test_hit_and_miss(self):
+        """测试缓存命中与未命中计数"""
+        cache = DiskCache(self.cache_dir, max_bytes=1024, suffix=".mp3")
+        self.assertIsNone(cache.get("a"))
+        self._put(cache, "a", b"123")
+        self.assertEqual(cache.get("a").read_bytes(), b"123")
+
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["entries"], 1)
+        self.assertEqual(stats["bytes"], 3)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_lru_eviction(self):
+        """测试超出大小上限时淘汰最久未访问的条目"""
+        cache = DiskCache(self.cache_dir, max_bytes=10, suffix=".mp3")
+        self._put(cache, "a", b"1234")
+        self._put(cache, "b", b"1234")
+        cache.get("a")
+        self._put(cache, "c", b"1234")
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_link_to_and_reload(self):
+        """测试引用到任务目录，以及重启后恢复缓存索引"""
+        cache = DiskCache(self.cache_dir, max_bytes=1024, suffix=".mp3")
+        self._put(cache, "a", b"audio")
+        job_dir = Path(self.cache_dir, "job")
+        job_dir.mkdir()
+        dest = cache.link_to("a", job_dir / "1_a.mp3")
+        self.assertEqual(dest.read_bytes(), b"audio")
+
+        # 淘汰缓存条目不影响已引用到任务目录的文件
+        os.utime(cache.get("a"), (0, 0))
+        reloaded = DiskCache(self.cache_dir, max_bytes=1024, suffix=".mp3")
+        self.assertEqual(reloaded.stats()["entries"], 1)
+        reloaded.max_bytes = 0
+        self._put(reloaded, "b", b"x")
+        self.assertIsNone(reloaded.get("a"))
+        self.assertTrue(dest.exists())
+
+if __name__ == '__main__':
+    unittest.main()
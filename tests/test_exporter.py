@@ -0,0 +1,92 @@
+import unittest
+import io
+import os
+import tempfile
+import shutil
+import zipfile
+from pathlib import Path
+import time
+import jinja2
+from utils.exporter import iter_zip, ExportRenderer, EXPORT_TEMPLATE_DIR, EXPORT_TEMPLATE_NAME
+
+class TestExporter(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_iter_zip(self):
+        """测试流式生成的压缩包内容完整，MP3 直接存储，其余文件压缩"""
+        css = self.temp_dir / "common.css"
+        css.write_text("body { color: red; }\n" * 100, encoding="utf-8")
+        mp3 = self.temp_dir / "0.mp3"
+        mp3.write_bytes(os.urandom(200 * 1024))
+
+        entries = [
+            ("export/index.html", ["<html>", "<body>中文</body>", b"</html>"]),
+            ("export/css/common.css", css),
+            ("export/audios/test/0.mp3", mp3),
+            ("export/data.json", b'{"a": 1}'),
+        ]
+        data = b"".join(iter_zip(entries, chunk_size=4096))
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.namelist(), [name for name, _ in entries])
+            self.assertEqual(archive.read("export/index.html").decode("utf-8"), "<html><body>中文</body></html>")
+            self.assertEqual(archive.read("export/css/common.css"), css.read_bytes())
+            self.assertEqual(archive.read("export/audios/test/0.mp3"), mp3.read_bytes())
+            self.assertEqual(archive.getinfo("export/audios/test/0.mp3").compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(archive.getinfo("export/css/common.css").compress_type, zipfile.ZIP_DEFLATED)
+
+        # 不压缩时所有文件直接存储
+        data = b"".join(iter_zip(entries, compress=False))
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertTrue(all(info.compress_type == zipfile.ZIP_STORED for info in archive.infolist()))
+
+    def test_iter_zip_streaming(self):
+        """测试边读边输出：每个数据块的大小与文件大小无关"""
+        mp3 = self.temp_dir / "large.mp3"
+        mp3.write_bytes(os.urandom(4 * 1024 * 1024))
+        entries = [(f"audios/{i}.mp3", mp3) for i in range(3)]
+
+        total = 0
+        max_chunk = 0
+        for chunk in iter_zip(entries, chunk_size=64 * 1024):
+            total += len(chunk)
+            max_chunk = max(max_chunk, len(chunk))
+        self.assertGreater(total, 3 * 4 * 1024 * 1024)
+        self.assertLess(max_chunk, 128 * 1024)
+
+    def test_export_renderer(self):
+        """测试导出页面渲染：结果与直接编译模板一致，流式输出的内容相同，模板只编译一次"""
+        results = [
+            {"sentence": f"Sentence {i}.", "translation": f"句子 {i}。", "audio_path": f"audios/test/{i}.mp3"}
+            for i in range(2000)
+        ]
+        renderer = ExportRenderer()
+        template_content = Path(EXPORT_TEMPLATE_DIR, EXPORT_TEMPLATE_NAME).read_text(encoding="utf-8")
+        expected = jinja2.Template(template_content).render(results=results)
+
+        self.assertEqual(renderer.render(results=results), expected)
+        chunks = list(renderer.stream(results=results))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), expected)
+        self.assertIs(renderer.env.get_template(EXPORT_TEMPLATE_NAME), renderer.env.get_template(EXPORT_TEMPLATE_NAME))
+
+    def test_export_renderer_auto_reload(self):
+        """测试模板文件修改后自动重新编译"""
+        template = self.temp_dir / "page.html"
+        template.write_text("v1 {{ title }}", encoding="utf-8")
+        renderer = ExportRenderer(str(self.temp_dir), "page.html")
+        self.assertEqual(renderer.render(title="a"), "v1 a")
+
+        template.write_text("v2 {{ title }}", encoding="utf-8")
+        # 修改时间需要变化才会触发重新编译
+        mtime = time.time() + 10
+        os.utime(template, (mtime, mtime))
+        self.assertEqual(renderer.render(title="a"), "v2 a")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,31 @@
 import unittest
+import asyncio
+import hashlib
+import io
+import shutil
 import tempfile
 import os
-from utils.file_processor import extract_text_from_file
+from pathlib import Path
+from unittest import mock
+import pymupdf
+from utils import file_processor
+from utils.file_processor import (
+    extract_text_from_file, save_upload, UploadTooLargeError, iter_pages, iter_sentences_from_file,
+    get_cached_extraction, cache_extraction
+)
+from tests.helpers import temp_text_cache
+
+class FakeUpload:
+    """模拟上传文件，记录每次读取的大小"""
+
+    def __init__(self, filename: str, content: bytes):
+        self.filename = filename
+        self.reads = []
+        self._buffer = io.BytesIO(content)
+
+    async def read(self, size: int = -1) -> bytes:
+        self.reads.append(size)
+        return self._buffer.read(size)
 
 class TestFileProcessor(unittest.TestCase):
     def test_extract_from_unsupported_file(self):
@@ -37,5 +61,98 @@ class TestFileProcessor(unittest.TestCase):
             # 确保文件被删除
             os.unlink(temp_filename)
 
+    def test_parallel_extract(self):
+        """测试按页并行提取的结果与逐页提取一致，且保持页序"""
+        test_dir = tempfile.mkdtemp()
+        try:
+            pdf_path = str(Path(test_dir) / "pages.pdf")
+            with pymupdf.open() as doc:
+                for i in range(20):
+                    page = doc.new_page()
+                    page.insert_text((72, 72), f"This is page {i}.\nIt has two lines.")
+                doc.save(pdf_path)
+            
+            serial_text = extract_text_from_file(pdf_path, parallel=False)
+            parallel_text = extract_text_from_file(pdf_path, parallel=True, max_workers=3)
+            self.assertEqual(parallel_text, serial_text)
+            self.assertTrue(parallel_text.startswith("This is page 0. It has two lines. This is page 1."))
+            self.assertTrue(parallel_text.endswith("This is page 19. It has two lines."))
+        finally:
+            shutil.rmtree(test_dir, ignore_errors=True)
+    
+    def test_iter_pages(self):
+        """测试逐页读取文件，跨页的句子在流式分句时被正确拼接"""
+        test_dir = tempfile.mkdtemp()
+        try:
+            pdf_path = str(Path(test_dir) / "pages.pdf")
+            with pymupdf.open() as doc:
+                doc.new_page().insert_text((72, 72), "The first page ends in the middle of a")
+                doc.new_page().insert_text((72, 72), "sentence. The second page is complete.")
+                doc.save(pdf_path)
+            
+            pages = list(iter_pages(pdf_path))
+            self.assertEqual(len(pages), 2)
+            self.assertEqual(" ".join(" ".join(pages).split()), extract_text_from_file(pdf_path))
+            self.assertEqual(list(iter_sentences_from_file(pdf_path)), [
+                "The first page ends in the middle of a sentence.",
+                "The second page is complete.",
+            ])
+            self.assertEqual(list(iter_pages("not_exists.pdf")), [])
+        finally:
+            shutil.rmtree(test_dir, ignore_errors=True)
+    
+    def test_save_upload(self):
+        """测试分块保存上传文件，并对同一所有者的相同内容去重"""
+        test_dir = tempfile.mkdtemp()
+        try:
+            content = b"This is a test sentence. " * 1000
+            upload = FakeUpload("book.txt", content)
+            path, content_hash = asyncio.run(save_upload(upload, test_dir, chunk_size=1024))
+            
+            self.assertEqual(content_hash, hashlib.sha256(content).hexdigest())
+            self.assertEqual(path, Path(test_dir) / f"{content_hash}.txt")
+            self.assertEqual(path.read_bytes(), content)
+            self.assertTrue(all(size == 1024 for size in upload.reads))
+            
+            # 再次上传相同内容，复用同一个文件
+            path_again, _ = asyncio.run(save_upload(FakeUpload("copy.txt", content), test_dir))
+            self.assertEqual(path_again, path)
+            self.assertEqual(len(os.listdir(test_dir)), 1)
+            
+            # 不同所有者上传相同内容时各自保存，文件名不包含所有者的原始值
+            path_a, _ = asyncio.run(save_upload(FakeUpload("book.txt", content), test_dir, owner="../session-a"))
+            path_b, _ = asyncio.run(save_upload(FakeUpload("book.txt", content), test_dir, owner="session-b"))
+            self.assertNotEqual(path_a, path_b)
+            self.assertEqual(path_a.parent, Path(test_dir))
+            self.assertNotIn("session", path_a.name)
+            self.assertEqual(asyncio.run(save_upload(FakeUpload("copy.txt", content), test_dir, owner="session-b"))[0], path_b)
+            self.assertEqual(len(os.listdir(test_dir)), 3)
+        finally:
+            shutil.rmtree(test_dir, ignore_errors=True)
+    
+    def test_save_upload_too_large(self):
+        """测试上传文件超出大小上限时停止读取并删除临时文件"""
+        test_dir = tempfile.mkdtemp()
+        try:
+            upload = FakeUpload("book.txt", b"x" * 10000)
+            with self.assertRaises(UploadTooLargeError):
+                asyncio.run(save_upload(upload, test_dir, max_size=4096, chunk_size=1024))
+            self.assertEqual(len(upload.reads), 5)
+            self.assertEqual(os.listdir(test_dir), [])
+        finally:
+            shutil.rmtree(test_dir, ignore_errors=True)
+
+    def test_extraction_cache(self):
+        """测试提取结果缓存按内容哈希、文件类型和提取逻辑版本命中"""
+        with temp_text_cache():
+            language = {"error": None, "code": "en", "name": "english", "locale": "en-US"}
+            self.assertIsNone(get_cached_extraction("abc", ".pdf"))
+            cache_extraction("abc", ".pdf", "This is a test sentence.", language)
+            self.assertEqual(get_cached_extraction("abc", ".pdf"), {"text": "This is a test sentence.", "language": language})
+            self.assertIsNone(get_cached_extraction("abc", ".epub"))
+            
+            with mock.patch.object(file_processor, "EXTRACTOR_VERSION", file_processor.EXTRACTOR_VERSION + 1):
+                self.assertIsNone(get_cached_extraction("abc", ".pdf"))
+
 if __name__ == '__main__':
     unittest.main()
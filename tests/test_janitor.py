@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import asyncio
+from pathlib import Path
+from utils.janitor import Janitor, RetentionRule
+
+class TestJanitor(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.now = time.time()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def make_entry(self, directory: str, name: str, size: int, age: float, is_dir: bool = True) -> Path:
+        """创建指定大小的条目，并将最后访问时间设为 age 秒之前"""
+        path = self.root / directory / name
+        if is_dir:
+            path.mkdir(parents=True)
+            Path(path, "0.mp3").write_bytes(b"0" * size)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"0" * size)
+        mtime = self.now - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_max_age(self):
+        """测试删除超过保留时长的条目，保留未过期的条目"""
+        old = self.make_entry("audios", "old", 100, 7200)
+        new = self.make_entry("audios", "new", 100, 600)
+        old_file = self.make_entry("temp", "upload.pdf", 50, 7200, is_dir=False)
+        janitor = Janitor([RetentionRule(str(self.root / "audios"), max_age=3600),
+                           RetentionRule(str(self.root / "temp"), max_age=3600)])
+
+        result = janitor.collect(now=self.now)
+        self.assertEqual(result, {"removed": 2, "reclaimed_bytes": 150})
+        self.assertFalse(old.exists())
+        self.assertFalse(old_file.exists())
+        self.assertTrue(new.exists())
+
+    def test_max_bytes_lru(self):
+        """测试目录总大小超过上限时，从最久未访问的条目开始删除"""
+        entries = [self.make_entry("exports", f"export_{i}", 100, 1000 * (i + 1)) for i in range(5)]
+        janitor = Janitor([RetentionRule(str(self.root / "exports"), max_bytes=250)])
+
+        # 访问过的条目延后删除
+        janitor.touch(entries[4])
+        result = janitor.collect()
+        self.assertEqual(result["removed"], 3)
+        self.assertEqual([path.exists() for path in entries], [True, False, False, False, True])
+
+    def test_protected_and_grace(self):
+        """测试正在进行的任务使用的条目和刚写入的条目不会被删除，但仍计入目录大小"""
+        active = self.make_entry("audios", "active", 100, 7200)
+        recent = self.make_entry("audios", "recent", 100, 10)
+        idle = self.make_entry("audios", "idle", 100, 600)
+        janitor = Janitor([RetentionRule(str(self.root / "audios"), max_age=3600, max_bytes=150)],
+                          grace=300, protected=lambda: [active])
+
+        janitor.collect(now=self.now)
+        self.assertTrue(active.exists())
+        self.assertTrue(recent.exists())
+        self.assertFalse(idle.exists())
+
+    def test_hard_links_not_counted(self):
+        """测试与缓存共享的硬链接文件不计入目录大小，也不计入回收的字节数"""
+        cache_file = self.root / "cache" / "audio.mp3"
+        cache_file.parent.mkdir()
+        cache_file.write_bytes(b"0" * 1000)
+        linked = self.make_entry("audios", "linked", 0, 7200)
+        os.link(cache_file, linked / "1.mp3")
+        os.utime(linked, (self.now - 7200, self.now - 7200))
+        owned = self.make_entry("audios", "owned", 100, 600)
+        janitor = Janitor([RetentionRule(str(self.root / "audios"), max_age=3600, max_bytes=500)])
+
+        # 硬链接不计入大小，目录总大小未超过上限，未过期的条目不会被删除
+        result = janitor.collect(now=self.now)
+        self.assertEqual(result, {"removed": 1, "reclaimed_bytes": 0})
+        self.assertFalse(linked.exists())
+        self.assertTrue(owned.exists())
+        self.assertTrue(cache_file.exists())
+
+    def test_stats(self):
+        """测试累计的清理次数、删除条目数和回收字节数"""
+        janitor = Janitor([RetentionRule(str(self.root / "audios"), max_age=3600),
+                           RetentionRule(str(self.root / "missing"), max_age=3600)])
+        self.make_entry("audios", "a", 100, 7200)
+        janitor.collect(now=self.now)
+        self.make_entry("audios", "b", 200, 7200)
+        janitor.collect(now=self.now)
+
+        stats = janitor.stats()
+        self.assertEqual(stats["runs"], 2)
+        self.assertEqual(stats["removed_entries"], 2)
+        self.assertEqual(stats["reclaimed_bytes"], 300)
+        self.assertEqual(stats["errors"], 0)
+        self.assertEqual(stats["last_run_at"], self.now)
+
+    async def test_background_run(self):
+        """测试启动后台清理时立即清理一次，停止后不再执行"""
+        old = self.make_entry("audios", "old", 100, 7200)
+        janitor = Janitor([RetentionRule(str(self.root / "audios"), max_age=3600)], interval=0.05)
+        janitor.start()
+        for _ in range(100):
+            if janitor.runs >= 2:
+                break
+            await asyncio.sleep(0.01)
+        await janitor.close()
+
+        self.assertFalse(old.exists())
+        self.assertGreaterEqual(janitor.runs, 2)
+        runs = janitor.runs
+        await asyncio.sleep(0.1)
+        self.assertEqual(janitor.runs, runs)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import unittest
+from utils.job_manager import JobManager, JOB_DONE, JOB_FAILED, JOB_CANCELLED
+
+class TestJobManager(unittest.IsolatedAsyncioTestCase):
+    async def test_job_progress_events(self):
+        """测试任务进度推送，包括从其他线程上报的进度"""
+        manager = JobManager()
+
+        async def runner(job):
+            job.set_stage("split")
+            job.set_stage("translate", 3)
+
+            def translate():
+                for i in range(3):
+                    job.set_progress("translate", i + 1, 3)
+
+            await asyncio.to_thread(translate)
+            return "ok"
+
+        job = manager.create(["split", "translate"], runner)
+        events = [snapshot async for snapshot in job.events()]
+
+        self.assertEqual(events[-1]["status"], JOB_DONE)
+        self.assertEqual(events[-1]["progress"]["translate"], {"done": 3, "total": 3})
+        self.assertEqual(job.result, "ok")
+        self.assertIs(manager.get(job.id), job)
+        self.assertEqual(manager.active_jobs(), [])
+
+    async def test_job_failed(self):
+        """测试任务失败时记录错误信息"""
+        manager = JobManager()
+
+        async def runner(job):
+            raise ValueError("出错了")
+
+        job = manager.create(["split"], runner)
+        await job.task
+        self.assertEqual(job.status, JOB_FAILED)
+        self.assertEqual(job.error, "出错了")
+        self.assertIsInstance(job.exception, ValueError)
+
+    async def test_job_cancel(self):
+        """测试取消未结束的任务"""
+        manager = JobManager()
+        job = manager.create(["split"], lambda job: asyncio.sleep(10))
+        await asyncio.sleep(0)
+        self.assertTrue(manager.cancel(job.id))
+        await job.task
+        self.assertEqual(job.status, JOB_CANCELLED)
+
+    async def test_prune_finished_jobs(self):
+        """测试已结束任务数量超过上限时清理最早的任务"""
+        manager = JobManager(max_finished=2)
+        jobs = []
+        for _ in range(4):
+            job = manager.create(["split"], lambda job: asyncio.sleep(0))
+            await job.task
+            jobs.append(job)
+        self.assertIsNone(manager.get(jobs[0].id))
+        self.assertIsNone(manager.get(jobs[1].id))
+        self.assertIs(manager.get(jobs[3].id), jobs[3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
 import unittest
-from utils.language_detector import detect_language, LANGUAGE_CODES, TTS_LOCALES
+from unittest import mock
+from utils import language_detector
+from utils.language_detector import detect_language, detect_languages, LANGUAGE_CODES, TTS_LOCALES
 
 class TestLanguageDetector(unittest.TestCase):
     def test_detect_supported_language(self):
@@ -31,4 +33,42 @@ class TestLanguageDetector(unittest.TestCase):
         self.assertIsNone(result['code'])
         self.assertIsNone(result['name'])
         self.assertIsNone(result['locale'])
-        
\ No newline at end of file
+        
+
+    def test_detect_language_sampled(self):
+        """测试长文本抽样检测：只检测固定数量和长度的样本，结果可复现"""
+        english = "It is often said that we are what we repeatedly do. This simple statement highlights the influence of our daily habits. "
+        french = "Il est souvent dit que nous sommes ce que nous faisons de manière répétée. "
+        text = english * 2000 + french * 200 + english * 2000
+
+        with mock.patch.object(language_detector, "_detect_langs", wraps=language_detector._detect_langs) as detect_langs:
+            result = detect_language(text, sample_chars=1000, sample_count=4)
+        self.assertEqual(result['code'], 'en')
+        self.assertEqual(detect_langs.call_count, 4)
+        self.assertTrue(all(len(call.args[0]) <= 1000 for call in detect_langs.call_args_list))
+        self.assertEqual([detect_language(text)['code'] for _ in range(3)], ['en'] * 3)
+
+        samples = language_detector._sample_text(text, 1000, 4)
+        self.assertTrue(text.startswith(samples[0]))
+        self.assertIn(samples[-1].strip(), text[-1100:])
+
+    def test_detect_language_no_features(self):
+        """测试样本中没有可识别的文字时返回错误信息"""
+        result = detect_language("12345 67890 " * 2000)
+        self.assertIsNotNone(result['error'])
+        self.assertIsNone(result['code'])
+
+    def test_detect_languages(self):
+        """测试批量检测：结果与逐条检测一致，重复文本只检测一次，并行检测结果相同"""
+        texts = ['Hello, how are you today?', 'Ciao, come stai oggi?', 'مرحبًا، كيف حالك اليوم؟', ''] * 3
+        expected = [detect_language(text) for text in texts]
+
+        with mock.patch.object(language_detector, "_detect_langs", wraps=language_detector._detect_langs) as detect_langs:
+            results = detect_languages(texts, parallel=False)
+        self.assertEqual(results, expected)
+        self.assertEqual(detect_langs.call_count, 4)
+
+        results[0]['code'] = None
+        self.assertEqual(results[4]['code'], 'en')
+
+        self.assertEqual(detect_languages(texts, parallel=True, max_workers=2), expected)
@@ -0,0 +1,133 @@
+import json
+import logging
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+from utils.logger import setup_logger, shutdown_logger, RateLimitFilter
+
+class TestLogger(unittest.TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.name = f"TingJuTest{id(self)}"
+
+    def tearDown(self):
+        shutdown_logger(self.name)
+        shutil.rmtree(self.log_dir, ignore_errors=True)
+
+    def read_log(self) -> str:
+        return Path(self.log_dir, f"{self.name}.log").read_text(encoding="utf-8")
+
+    def test_queue_logging(self):
+        """测试队列模式：日志由后台线程写入文件，停止后队列中的日志全部写完"""
+        logger = setup_logger(self.name, log_dir=self.log_dir)
+        self.assertEqual(len(logger.handlers), 1)
+        self.assertIsInstance(logger.handlers[0], logging.handlers.QueueHandler)
+        # 重复设置不会添加新的处理器
+        setup_logger(self.name, log_dir=self.log_dir)
+        self.assertEqual(len(logger.handlers), 1)
+
+        for i in range(5):
+            logger.info(f"第 {i} 条日志")
+        logger.debug("不输出的调试日志")
+        shutdown_logger(self.name)
+
+        content = self.read_log()
+        self.assertEqual(content.count("INFO"), 5)
+        self.assertIn("第 4 条日志", content)
+        self.assertNotIn("调试日志", content)
+
+    def test_rotation(self):
+        """测试日志文件超过大小上限后轮转"""
+        logger = setup_logger(self.name, log_dir=self.log_dir, max_bytes=1024, backup_count=2, console=False,
+                              rate_limit=RateLimitFilter(burst=1000))
+        for i in range(200):
+            logger.info(f"轮转测试日志 {i}")
+        shutdown_logger(self.name)
+
+        files = sorted(path.name for path in Path(self.log_dir).iterdir())
+        self.assertEqual(files, [f"{self.name}.log", f"{self.name}.log.1", f"{self.name}.log.2"])
+        self.assertTrue(all(path.stat().st_size <= 1024 for path in Path(self.log_dir).iterdir()))
+        self.assertIn("轮转测试日志 199", self.read_log())
+
+    def test_rate_limit(self):
+        """测试同一模板的日志被限流，下一个窗口输出被忽略的条数；模板不同的日志和错误日志不受影响"""
+        rate_limit = RateLimitFilter(interval=0.2, burst=3)
+        logger = setup_logger(self.name, log_dir=self.log_dir, use_queue=False, rate_limit=rate_limit)
+
+        def log(level, message):
+            logger.log(level, message)
+
+        for _ in range(100):
+            log(logging.WARNING, "翻译器暂时不可用")
+        for i in range(20):
+            log(logging.INFO, f"第 {i} 个文件上传完成")
+        for _ in range(20):
+            log(logging.ERROR, "翻译失败")
+        # 模板相同、参数不同的日志计入同一窗口，同一模板的不同级别分别计数
+        for i in range(10):
+            logger.warning("翻译 %s 时失败", f"第 {i} 句")
+        logger.info("翻译 %s 时失败", "第 10 句")
+        logger.warning("其他模板的日志")
+        self.assertEqual(rate_limit.suppressed, 104)
+
+        time.sleep(0.25)
+        logger.warning("窗口结束后的日志")
+        for _ in range(10):
+            log(logging.WARNING, "翻译器暂时不可用")
+        shutdown_logger(self.name)
+
+        content = self.read_log()
+        self.assertEqual(content.count("翻译器暂时不可用"), 6)
+        self.assertIn("翻译器暂时不可用（此前 0.2 秒内忽略了 97 条同类日志）", content)
+        self.assertEqual(content.count("个文件上传完成"), 20)
+        self.assertEqual(content.count("翻译失败"), 20)
+        self.assertIn("翻译 第 2 句 时失败", content)
+        self.assertNotIn("翻译 第 3 句 时失败", content)
+        self.assertIn("翻译 第 10 句 时失败", content)
+        self.assertIn("其他模板的日志", content)
+        self.assertIn("窗口结束后的日志", content)
+
+    def test_rate_limit_max_keys(self):
+        """测试内容各不相同的日志不会使限流窗口无限增长，超过上限时丢弃最早开始的窗口"""
+        rate_limit = RateLimitFilter(interval=60, burst=1)
+        logger = setup_logger(self.name, log_dir=self.log_dir, use_queue=False, console=False, rate_limit=rate_limit)
+
+        def log(i):
+            logger.info(f"第 {i} 句翻译完成")
+
+        with mock.patch("utils.logger.LOG_RATE_LIMIT_MAX_KEYS", 100):
+            for i in range(1000):
+                log(i)
+            log(999)
+            log(0)
+        messages = [message for _, _, message in rate_limit._windows]
+        self.assertEqual(len(messages), 100)
+        # 仍保留的窗口继续限流，已丢弃的窗口重新开始计数
+        self.assertEqual(rate_limit.suppressed, 1)
+        self.assertEqual(messages[-1], "第 0 句翻译完成")
+        self.assertNotIn("第 900 句翻译完成", messages)
+
+    def test_json_format(self):
+        """测试结构化 JSON 日志格式"""
+        logger = setup_logger(self.name, log_dir=self.log_dir, json_format=True)
+        logger.info("结构化日志 %s", "参数")
+        try:
+            raise ValueError("测试异常")
+        except ValueError:
+            logger.exception("出现异常")
+        shutdown_logger(self.name)
+
+        records = [json.loads(line) for line in self.read_log().splitlines()]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]["level"], "INFO")
+        self.assertEqual(records[0]["message"], "结构化日志 参数")
+        self.assertEqual(records[0]["file"], "test_logger.py")
+        self.assertEqual(records[1]["level"], "ERROR")
+        self.assertEqual(records[1]["message"], "出现异常")
+        self.assertIn("ValueError: 测试异常", records[1]["exception"])
+
+if __name__ == '__main__':
+    unittest.main()
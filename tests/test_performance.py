@@ -1,12 +1,25 @@
 import unittest
+import asyncio
+import os
 import time
+import shutil
 import tempfile
 from pathlib import Path
-from utils.text_processor import get_sentences, init_nltk
+from unittest import mock
+import pymupdf
+from utils import text_processor
+from utils.text_processor import get_sentences, init_nltk, normalize_text
 from utils.file_processor import extract_text_from_file
-from utils.text_translator import get_text_translated
-from utils.audio_generator import generate_audio
-from utils.language_detector import detect_language
+from utils.text_translator import get_text_translated, translate_sentences
+from utils.audio_generator import generate_audio, AUDIO_DIR
+from utils.tts_scheduler import TTSScheduler, FakeTTSBackend, TokenBucket
+from utils.language_detector import detect_language, detect_languages
+from utils.pipeline import translate_and_synthesize
+from utils.logger import setup_logger, shutdown_logger, RateLimitFilter
+from tests.helpers import temp_audio_cache, temp_translator_health
+
+# 设置环境变量 TINGJU_LARGE_TESTS=1 时才运行大数据量（10MB 文本、400 页 PDF）的性能测试
+LARGE_TESTS = os.environ.get("TINGJU_LARGE_TESTS") == "1"
 
 # 测试句子集合
 SENTENCES = [
@@ -51,6 +64,63 @@ class TestPerformance(unittest.TestCase):
         
         print(f"对 {len(sentences)} 个句子进行分句的耗时为 {execution_time:.4f} 秒")
     
+    def test_single_worker_splitting_performance(self):
+        """测试只有一个进程可用时长文本的分句性能：改用快速分句，耗时与改为并行分句之前相当（约 4 秒）"""
+        text = ' '.join([f"This is a test sentence {i}." for i in range(100000)])
+        
+        with mock.patch.object(text_processor, "SPLIT_MAX_WORKERS", 1), \
+             mock.patch.object(text_processor, "SENTENCE_CACHE", text_processor.SentenceCache()):
+            start_time = time.time()
+            sentences = get_sentences(text)
+            execution_time = time.time() - start_time
+        
+        # 检查结果
+        self.assertEqual(len(sentences), 100000)
+        
+        # 检查性能：逐块使用 PySBD 分句约需 30 秒
+        self.assertLess(execution_time, 8.0)
+        
+        print(f"单进程对 {len(sentences)} 个句子进行分句的耗时为 {execution_time:.4f} 秒")
+    
+    def test_normalize_text_performance(self):
+        """测试不同大小文本的预处理性能"""
+        base_text = " ".join(SENTENCES) + " Hello，world。 “Fine”（really）！ "
+        cases = [(10 * 1024, 0.5), (1024 * 1024, 5.0)]
+        if LARGE_TESTS:
+            cases.append((10 * 1024 * 1024, 30.0))
+        for size, limit in cases:
+            text = (base_text * (size // len(base_text) + 1))[:size]
+            
+            start_time = time.time()
+            normalized_text = normalize_text(text)
+            execution_time = time.time() - start_time
+            
+            # 检查结果
+            self.assertIn('Hello, world."Fine"(really)!', normalized_text)
+            
+            # 检查性能
+            self.assertLess(execution_time, limit)
+            
+            print(f"对 {size // 1024} KB 文本进行预处理的耗时为 {execution_time:.4f} 秒")
+    
+    def test_protected_tokens_performance(self):
+        """测试包含大量 URL、邮箱和版本号的文本的分句性能"""
+        text = "See https://example.com/docs/v2 and mail support@example.com about version 3.2.1 of the U.S.A. build. " * 5000
+        
+        start_time = time.time()
+        sentences = get_sentences(text)
+        end_time = time.time()
+        
+        # 检查结果：被保护的片段应完整还原
+        self.assertEqual(len(sentences), 5000)
+        self.assertEqual(sentences[0], "See https://example.com/docs/v2 and mail support@example.com about version 3.2.1 of the U.S.A. build.")
+        
+        # 检查性能：保护片段的数量不应使耗时成倍增长
+        execution_time = end_time - start_time
+        self.assertLess(execution_time, 5.0)
+        
+        print(f"对包含 {len(sentences) * 4} 个保护片段的文本进行分句的耗时为 {execution_time:.4f} 秒")
+    
     def test_file_processing_performance(self):
         """测试文件处理性能"""
         # 创建一个大文本文件
@@ -80,11 +150,45 @@ class TestPerformance(unittest.TestCase):
         
         print(f"大文件处理的耗时为 {execution_time:.4f} 秒")
     
+    @unittest.skipUnless(LARGE_TESTS, "设置 TINGJU_LARGE_TESTS=1 时运行")
+    def test_parallel_pdf_extraction_performance(self):
+        """测试多页 PDF 逐页提取与按页并行提取的性能"""
+        test_dir = tempfile.mkdtemp()
+        pdf_path = str(Path(test_dir) / "large.pdf")
+        
+        # 生成一个 400 页的 PDF，每页写满多行文字
+        with pymupdf.open() as doc:
+            for i in range(400):
+                page = doc.new_page()
+                page.insert_textbox(page.rect + (36, 36, -36, -36), " ".join(SENTENCES * 3) + f" Page {i}.", fontsize=9)
+            doc.save(pdf_path)
+        
+        try:
+            start_time = time.time()
+            serial_text = extract_text_from_file(pdf_path, parallel=False)
+            serial_time = time.time() - start_time
+            
+            start_time = time.time()
+            parallel_text = extract_text_from_file(pdf_path, parallel=True, max_workers=4)
+            parallel_time = time.time() - start_time
+            
+            # 检查结果：并行提取结果与逐页提取一致
+            self.assertEqual(parallel_text, serial_text)
+            self.assertIn("Page 399.", parallel_text)
+            
+            # 检查性能
+            self.assertLess(parallel_time, 10.0)
+            
+            print(f"400 页 PDF 逐页提取的耗时为 {serial_time:.4f} 秒，并行提取的耗时为 {parallel_time:.4f} 秒")
+        finally:
+            shutil.rmtree(test_dir, ignore_errors=True)
+    
     def test_translation_performance(self):
         """测试翻译性能"""
-        start_time = time.time()
-        translations = get_text_translated(SENTENCES)
-        end_time = time.time()
+        with temp_translator_health():
+            start_time = time.time()
+            translations = get_text_translated(SENTENCES)
+            end_time = time.time()
         
         # 检查结果
         self.assertEqual(len(translations), len(SENTENCES))
@@ -119,6 +223,85 @@ class TestPerformance(unittest.TestCase):
         except Exception as e:
             print(f"清理音频文件时出错: {e}")
             
+    def test_audio_scheduler_performance(self):
+        """测试 TTS 调度器在模拟后端上的吞吐量和失败恢复"""
+        text_list = [f"{sentence} ({i})" for i, sentence in enumerate(SENTENCES * 50)]  # 550个句子
+        backend = FakeTTSBackend(latency=0.02, failure_rate=0.2, seed=42)
+        scheduler = TTSScheduler(backend, max_concurrency=32, max_retries=5, base_delay=0.01, max_delay=0.1,
+                                 rate_limiter=TokenBucket(rate=2000, capacity=100))
+        
+        try:
+            with temp_audio_cache(1024 * 1024 * 1024):
+                start_time = time.time()
+                _, audio_filenames, warning_msg = asyncio.run(
+                    generate_audio(text_list, "en-US-ChristopherNeural", "scheduler_test", scheduler=scheduler)
+                )
+                end_time = time.time()
+            
+            # 检查结果：注入的失败都应通过重试恢复，且并发不超过上限
+            self.assertEqual(len(audio_filenames), len(text_list))
+            self.assertEqual(warning_msg, "")
+            self.assertGreater(scheduler.retries, 0)
+            self.assertLessEqual(backend.max_active, 32)
+            
+            # 检查性能
+            execution_time = end_time - start_time
+            self.assertLess(execution_time, 10.0)
+            
+            print(f"模拟后端生成 {len(text_list)} 条音频的耗时为 {execution_time:.4f} 秒，重试 {scheduler.retries} 次")
+        finally:
+            shutil.rmtree(Path(AUDIO_DIR, "scheduler_test"), ignore_errors=True)
+    
+    def test_pipeline_overlap_performance(self):
+        """测试翻译与音频生成同时进行相比先后进行的加速效果"""
+        text_list = [f"{sentence} ({i})" for i, sentence in enumerate(SENTENCES * 10)]  # 110个句子
+        
+        def fake_translate(text, from_lang, to_lang, translator):
+            time.sleep(0.02)
+            return f"[{to_lang}] {text}"
+        
+        def make_scheduler():
+            return TTSScheduler(FakeTTSBackend(latency=0.05), max_concurrency=8,
+                                rate_limiter=TokenBucket(rate=2000, capacity=100))
+        
+        async def run_sequential():
+            results = await asyncio.to_thread(translate_sentences, text_list, translate_func=fake_translate)
+            await generate_audio(text_list, "en-US-ChristopherNeural", "pipeline_sequential", scheduler=make_scheduler())
+            return results
+        
+        async def run_overlapped():
+            return await translate_and_synthesize(
+                text_list, "en-US-ChristopherNeural", "pipeline_overlapped", batch_chars=0, hedge_percentile=None,
+                translate_func=fake_translate, memory=None, health=None, scheduler=make_scheduler()
+            )
+        
+        try:
+            with temp_audio_cache(1024 * 1024 * 1024):
+                start_time = time.time()
+                asyncio.run(run_sequential())
+                sequential_time = time.time() - start_time
+            
+            # 使用新的缓存目录，避免命中上一轮合成的音频
+            with temp_audio_cache(1024 * 1024 * 1024):
+                start_time = time.time()
+                output = asyncio.run(run_overlapped())
+                overlapped_time = time.time() - start_time
+            
+            # 检查结果
+            self.assertEqual(len(output["translations"]), len(text_list))
+            self.assertEqual(output["translations"][0], f"[zh] {text_list[0]}")
+            self.assertEqual(len(output["filenames"]), len(text_list))
+            self.assertEqual(output["warning"], "")
+            
+            # 检查性能：同时进行的耗时应明显少于先后进行
+            self.assertLess(overlapped_time, sequential_time * 0.8)
+            
+            print(f"{len(text_list)} 个句子先翻译后生成音频的耗时为 {sequential_time:.4f} 秒，"
+                  f"同时进行的耗时为 {overlapped_time:.4f} 秒")
+        finally:
+            shutil.rmtree(Path(AUDIO_DIR, "pipeline_sequential"), ignore_errors=True)
+            shutil.rmtree(Path(AUDIO_DIR, "pipeline_overlapped"), ignore_errors=True)
+    
     def test_detect_language_performance(self):
         """测试语言检测性能"""
         text_list = [
@@ -148,7 +331,89 @@ class TestPerformance(unittest.TestCase):
         self.assertLess(execution_time, 10.0)  # 应该在10秒内完成
         
         print(f"对 {len(text_list)} 条文本进行语言检测的耗时为 {execution_time:.4f} 秒")
+    
+    def test_detect_languages_batch_performance(self):
+        """测试批量语言检测性能"""
+        text_list = [f"{sentence} ({i})" for i, sentence in enumerate(SENTENCES * 20)]
+        
+        start_time = time.time()
+        sequential_results = [detect_language(text) for text in text_list]
+        sequential_time = time.time() - start_time
+        
+        start_time = time.time()
+        batch_results = detect_languages(text_list + text_list)
+        batch_time = time.time() - start_time
         
+        # 检查结果：与逐条检测一致
+        self.assertEqual(batch_results, sequential_results + sequential_results)
+        
+        # 检查性能：重复的文本只检测一次，两倍数量的批量检测不应慢于逐条检测
+        self.assertLess(batch_time, sequential_time * 1.5)
+        
+        print(f"逐条检测 {len(text_list)} 条文本的耗时为 {sequential_time:.4f} 秒，"
+              f"批量检测 {len(text_list) * 2} 条文本的耗时为 {batch_time:.4f} 秒")
+    
+    def test_detect_large_text_performance(self):
+        """测试长文本语言检测性能：抽样检测的耗时不随文本长度增长"""
+        sizes = [1024 * 1024, 10 * 1024 * 1024] if LARGE_TESTS else [1024 * 1024]
+        for size in sizes:
+            text = (" ".join(SENTENCES) + " ") * (size // 1000)
+            
+            start_time = time.time()
+            result = detect_language(text)
+            end_time = time.time()
+            
+            # 检查结果
+            self.assertEqual(result['code'], 'en')
+            
+            # 检查性能
+            execution_time = end_time - start_time
+            self.assertLess(execution_time, 1.0)
+            
+            print(f"对 {len(text) // 1024} KB 文本进行语言检测的耗时为 {execution_time:.4f} 秒")
+    
+    def test_logging_performance(self):
+        """测试队列模式下日志调用的耗时：写文件在后台线程进行，调用方只需放入队列"""
+        log_dir = tempfile.mkdtemp()
+        name = "TingJuPerformance"
+        try:
+            # 关闭控制台输出，只测量放入队列的耗时
+            logger = setup_logger(name, log_dir=log_dir, rate_limit=RateLimitFilter(burst=100000), console=False)
+            logger.propagate = False
+            count = 10000
+            
+            start_time = time.perf_counter()
+            for i in range(count):
+                logger.warning(f"翻译器 test 翻译第 {i} 句失败: timeout")
+            end_time = time.perf_counter()
+            
+            # 限流后的相同日志直接丢弃
+            limited = setup_logger(f"{name}Limited", log_dir=log_dir, console=False)
+            limited.propagate = False
+            limited_start = time.perf_counter()
+            for i in range(count):
+                limited.warning("翻译器 test 暂时不可用: timeout")
+            limited_time = time.perf_counter() - limited_start
+            
+            shutdown_logger(name)
+            shutdown_logger(f"{name}Limited")
+            
+            # 检查结果
+            self.assertEqual(Path(log_dir, f"{name}.log").read_text(encoding="utf-8").count("WARNING"), count)
+            
+            # 检查性能
+            per_call = (end_time - start_time) / count
+            self.assertLess(per_call, 0.0001)
+            self.assertLess(limited_time, end_time - start_time)
+            
+            print(f"队列模式下每次日志调用的耗时为 {per_call * 1e6:.2f} 微秒，"
+                  f"限流时 {count} 次调用的总耗时为 {limited_time:.4f} 秒")
+        finally:
+            shutdown_logger(name)
+            shutdown_logger(f"{name}Limited")
+            shutil.rmtree(log_dir, ignore_errors=True)
+        
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,72 @@
+import unittest
+import asyncio
+import shutil
+import time
+from pathlib import Path
+from unittest import mock
+from utils.audio_generator import AUDIO_DIR
+from utils.pipeline import translate_and_synthesize
+from utils.tts_scheduler import TTSScheduler, FakeTTSBackend
+from tests.helpers import temp_audio_cache
+
+TEXT_LIST = [f"Sentence number {i}." for i in range(20)]
+
+class TestPipeline(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        cache_context = temp_audio_cache()
+        cache_context.__enter__()
+        self.addCleanup(cache_context.__exit__, None, None, None)
+    
+    def tearDown(self):
+        shutil.rmtree(Path(AUDIO_DIR, "pipeline_test"), ignore_errors=True)
+    
+    async def test_combined_result(self):
+        """测试翻译与音频生成同时进行，结果按句子顺序合并"""
+        def fake_translate(text, from_lang, to_lang, translator):
+            if text == TEXT_LIST[3]:
+                raise ConnectionError("模拟翻译失败")
+            return f"[{to_lang}] {text}"
+        
+        translate_progress, tts_progress = [], []
+        output = await translate_and_synthesize(
+            TEXT_LIST, "en-US-ChristopherNeural", "pipeline_test", batch_chars=0, hedge_percentile=None,
+            translate_func=fake_translate, memory=None, health=None,
+            scheduler=TTSScheduler(FakeTTSBackend(latency=0.001)),
+            translate_progress=lambda done, total: translate_progress.append(done),
+            tts_progress=lambda done, total: tts_progress.append(done)
+        )
+        
+        self.assertEqual(output["translations"][0], f"[zh] {TEXT_LIST[0]}")
+        self.assertEqual(output["translations"][3], f"{TEXT_LIST[3]} 翻译失败")
+        self.assertEqual(len(output["filenames"]), len(TEXT_LIST))
+        self.assertTrue(all(Path(output["audio_dir"], filename).exists() for filename in output["filenames"]))
+        self.assertEqual(output["warning"], "")
+        self.assertEqual(max(translate_progress), len(TEXT_LIST))
+        self.assertEqual(max(tts_progress), len(TEXT_LIST))
+    
+    async def test_error_cancels_translation(self):
+        """测试音频生成出错时通过取消信号停止翻译"""
+        calls = []
+        
+        def slow_translate(text, from_lang, to_lang, translator):
+            calls.append(text)
+            time.sleep(0.05)
+            return text
+        
+        async def failing_generate_audio(*args, **kwargs):
+            await asyncio.sleep(0.1)
+            raise RuntimeError("模拟音频生成故障")
+        
+        with mock.patch("utils.pipeline.generate_audio", failing_generate_audio):
+            with self.assertRaises(RuntimeError):
+                await translate_and_synthesize(
+                    TEXT_LIST * 10, "en-US-ChristopherNeural", "pipeline_test", batch_chars=0,
+                    hedge_percentile=None, translate_func=slow_translate, memory=None, health=None
+                )
+        
+        # 已开始的句子会完成，但不会再开始新的句子
+        await asyncio.sleep(1.0)
+        self.assertLess(len(calls), 50)
+
+if __name__ == '__main__':
+    unittest.main()
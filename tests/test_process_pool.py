@@ -0,0 +1,55 @@
+import logging
+import unittest
+from utils import process_pool
+from utils.logger import logger
+from utils.process_pool import get_process_pool, run_in_processes, shutdown_process_pool
+
+def log_in_worker(message: str) -> str:
+    """在子进程中写一条日志"""
+    logger.info(message)
+    return message
+
+class ListHandler(logging.Handler):
+    """收集日志记录的处理器"""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+class TestProcessPool(unittest.TestCase):
+    def tearDown(self):
+        shutdown_process_pool()
+
+    def test_shared_pool(self):
+        """测试多次调用共用同一个进程池，关闭后再次使用时重新创建"""
+        pool = get_process_pool()
+        self.assertIs(get_process_pool(), pool)
+        self.assertEqual(run_in_processes(abs, [-1, -2, 3], chunksize=2), [1, 2, 3])
+        self.assertEqual(run_in_processes(pow, [2, 3], [3, 2]), [8, 9])
+
+        shutdown_process_pool()
+        self.assertIsNone(process_pool._pool)
+        self.assertIsNot(get_process_pool(), pool)
+
+    def test_spawn_context(self):
+        """测试子进程使用 spawn 方式启动，不复制服务进程中其他线程持有的锁"""
+        self.assertEqual(get_process_pool()._mp_context.get_start_method(), "spawn")
+
+    def test_worker_logs_forwarded(self):
+        """测试子进程的日志发回主进程，由主进程的记录器输出"""
+        handler = ListHandler()
+        logger.addHandler(handler)
+        try:
+            messages = [f"子进程日志 {i}" for i in range(3)]
+            self.assertEqual(run_in_processes(log_in_worker, messages), messages)
+            # 停止日志线程前会处理完队列中剩余的日志
+            shutdown_process_pool()
+        finally:
+            logger.removeHandler(handler)
+        self.assertEqual(sorted(message for message in handler.messages if message.startswith("子进程日志")), messages)
+
+if __name__ == '__main__':
+    unittest.main()
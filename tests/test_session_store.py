@@ -0,0 +1,56 @@
+import unittest
+import tempfile
+import shutil
+import time
+from pathlib import Path
+from utils.session_store import SessionStore
+
+class TestSessionStore(unittest.TestCase):
+    def test_sessions_isolated(self):
+        """测试不同会话的状态互不影响"""
+        store = SessionStore()
+        store.update("a", title="title-a")
+        store.update("b", title="title-b", temp_file="temp/b.txt")
+        store.update("a", temp_file="temp/a.txt")
+        self.assertEqual(store.get("a"), {"title": "title-a", "temp_file": "temp/a.txt"})
+        self.assertEqual(store.get("b")["title"], "title-b")
+        
+        store.reset("a")
+        self.assertEqual(store.get("a"), {})
+        self.assertEqual(store.get("b")["title"], "title-b")
+        self.assertEqual(store.get("unknown"), {})
+    
+    def test_ttl_and_max_entries(self):
+        """测试过期会话和超出数量上限的会话被清理"""
+        store = SessionStore(ttl=0.05, max_entries=2)
+        store.update("a", title="a")
+        time.sleep(0.1)
+        self.assertEqual(store.get("a"), {})
+        
+        store = SessionStore(max_entries=2)
+        store.update("a", title="a")
+        store.update("b", title="b")
+        store.get("a")  # a 变为最近访问
+        store.update("c", title="c")
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.get("b"), {})
+        self.assertEqual(store.get("a")["title"], "a")
+    
+    def test_sqlite_shared(self):
+        """测试使用 SQLite 时多个实例共享会话状态"""
+        test_dir = tempfile.mkdtemp()
+        try:
+            db_path = str(Path(test_dir) / "sessions.db")
+            store_a = SessionStore(db_path=db_path)
+            store_b = SessionStore(db_path=db_path)
+            store_a.update("a", title="title-a")
+            self.assertEqual(store_b.get("a"), {"title": "title-a"})
+            store_b.reset("a")
+            self.assertEqual(store_a.get("a"), {})
+            store_a.close()
+            store_b.close()
+        finally:
+            shutil.rmtree(test_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
 import unittest
-from utils.text_processor import init_nltk, get_sentences, normalize_text
+from unittest import mock
+from utils import text_processor
+from utils.text_processor import init_nltk, get_sentences, normalize_text, iter_sentences, canonicalize_text
 
 class TestTextProcessor(unittest.TestCase):
     
@@ -20,6 +22,11 @@ class TestTextProcessor(unittest.TestCase):
         self.assertEqual(normalized_text, '今日はいい天気だ…でも『急に雨が降り出した！』と彼は叫んだ。明日の予定は？（キャンプを中止する）みんなで『楽しみにしていた』イベントだったのに…本当に残念ですね。')
 
 
+    def test_canonicalize_text(self):
+        """测试生成缓存键前的规范化：统一 Unicode 形式并合并空白"""
+        self.assertEqual(canonicalize_text(" Hello \n\t  world. "), "Hello world.")
+        self.assertEqual(canonicalize_text("Cafe\u0301"), canonicalize_text("Caf\u00e9"))
+
     def test_get_sentences(self):
         """测试句子分割"""
         init_nltk()
@@ -36,7 +43,77 @@ class TestTextProcessor(unittest.TestCase):
         text = ' '.join([f"This is a test sentence {i}." for i in range(100000)])
         sentences = get_sentences(text)
         self.assertEqual(len(sentences), 100000)
+
+    def test_split_sentences_parallel(self):
+        """测试长文本只在安全边界处切块，并行分句的结果与整体分句一致"""
+        text = ' '.join(["The famous inventor, Mr. Johnson, lives in the U.S.A. with his family.",
+                         "He said, \"Version 2.1 is ready!\" Then he left."] * 100)
+        chunks = text_processor._split_text_chunks(text, 500)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(''.join(chunks), text)
+        for chunk in chunks[:-1]:
+            self.assertTrue(chunk.endswith(("family. ", "left. ", "ready!\" ")), chunk[-20:])
+
+        # 没有句末标点的长文本退而在空格处切分，避免单块过大
+        chunks = text_processor._split_text_chunks("word " * 20000, 500)
+        self.assertLess(max(len(chunk) for chunk in chunks[:-1]), 510)
+        self.assertLessEqual(len(chunks[-1]), 500 + text_processor.SPLIT_BOUNDARY_WINDOW)
+
+        expected = text_processor._segment_text(text, 'english')
+        with mock.patch.object(text_processor, "SPLIT_CHUNK_CHARS", 500):
+            self.assertEqual(text_processor._split_sentences_parallel(text, 'english', max_workers=1), expected)
+            self.assertEqual(text_processor._split_sentences_parallel(text, 'english', max_workers=2), expected)
+
+    def test_get_sentences_cached(self):
+        """测试相同原文和语言的重复分句直接命中缓存"""
+        text = 'It is often said that we are what we repeatedly do. This simple statement highlights the incredible influence of our daily habits.'
+        with mock.patch.object(text_processor, "SENTENCE_CACHE", text_processor.SentenceCache()) as cache, \
+                mock.patch.object(text_processor, "_split_paragraph", wraps=text_processor._split_paragraph) as split:
+            first = get_sentences(text)
+            first.append("modified by caller")
+            second = get_sentences(text)
+            self.assertEqual(split.call_count, 1)
+            self.assertEqual(len(second), 2)
+
+            get_sentences(text, 'french')
+            self.assertEqual(split.call_count, 2)
+            stats = cache.stats()
+            self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 2, 2))
+
+    def test_sentence_cache_eviction(self):
+        """测试分句缓存按总字符数淘汰最久未访问的条目"""
+        cache = text_processor.SentenceCache(max_chars=25)
+        cache.put("a", ["0123456789"])
+        cache.put("b", ["0123456789"])
+        self.assertIsNotNone(cache.get("a"))
+        cache.put("c", ["0123456789"])
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), ["0123456789"])
+        cache.put("d", ["x" * 26])
+        self.assertIsNone(cache.get("d"))
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["chars"], stats["evictions"]), (2, 20, 1))
+
+    def test_iter_sentences(self):
+        """测试流式分句：句子跨块时正确拼接，结果与整段分句一致"""
+        text = 'It is often said that we are what we repeatedly do. This simple statement highlights the incredible influence of our daily habits. Mr. Smith visited www.example.com on v1.2.3 today! Habits shape our thoughts, guide our actions, and ultimately determine the kind of life we live.'
+        chunks = [text[i:i + 37] for i in range(0, len(text), 37)]
+        self.assertEqual(list(iter_sentences(chunks)), get_sentences(text))
+    
+    def test_iter_sentences_lazy(self):
+        """测试流式分句在读完所有文本块之前就能输出前面的句子"""
+        consumed = []
+        
+        def pages():
+            for i in range(1000):
+                consumed.append(i)
+                yield f"This is sentence {i} on its page. It continues on the next "
         
+        sentences = iter_sentences(pages())
+        self.assertEqual(next(sentences), "This is sentence 0 on its page.")
+        self.assertEqual(next(sentences), "It continues on the next This is sentence 1 on its page.")
+        self.assertLess(len(consumed), 5)
+    
     def test_get_sentences_lang(self):
         """测试不同语言的分句"""
         init_nltk()
@@ -82,6 +159,28 @@ class TestTextProcessor(unittest.TestCase):
         self.assertIn("12:30", normalized)
         self.assertIn("This is common! Contact", normalized)
 
+    def test_protected_placeholder_collision(self):
+        """回归测试：原文中出现与占位符相同的字符或旧式占位符文本时应原样保留"""
+        text = "See \ue0000\ue001 and __PROTECTED_TOKEN_0__ at https://example.com/docs, version 1.2.3."
+        normalized = normalize_text(text)
+        self.assertIn("\ue0000\ue001", normalized)
+        self.assertIn("__PROTECTED_TOKEN_0__", normalized)
+        self.assertIn("https://example.com/docs", normalized)
+        self.assertIn("1.2.3", normalized)
+
+    def test_protected_adjacent_tokens(self):
+        """回归测试：紧挨在一起的邮箱与 URL、缩写链与版本号都应完整保留"""
+        # 邮箱的域名不应吞掉紧随其后的 URL 开头
+        self.assertEqual(normalize_text("Mail a@b.comhttp://x.org/a,b now."), "Mail a@b.comhttp://x.org/a,b now.")
+        self.assertEqual(normalize_text("Contact me@mail.comwww.site.org,thanks."), "Contact me@mail.comwww.site.org,thanks.")
+        self.assertEqual(normalize_text("Write to a@b.com,http://x.org/a,b today."), "Write to a@b.com, http://x.org/a,b today.")
+        # 邮箱的本地部分不应从 www. 主机名之前开始，URL 仍然优先
+        self.assertEqual(normalize_text("Mail xwww.a.ba@b.com,ok."), "Mail xwww.a.ba@b.com,ok.")
+        self.assertEqual(normalize_text("See a.www.b.c@d.com,ok."), "See a.www.b.c@d.com,ok.")
+        # 缩写链之后紧跟的版本号不应被拆开
+        self.assertEqual(normalize_text("Use U.S.A.2.0,then go."), "Use U.S.A.2.0, then go.")
+        self.assertEqual(normalize_text("The U.S.A.v1.2 build,e.g.3.2.1 works."), "The U.S.A.v1.2 build, e.g.3.2.1 works.")
+
     def test_get_sentences_with_acronym_and_url(self):
         """回归测试：缩写链与URL不应导致误拆分"""
         init_nltk()
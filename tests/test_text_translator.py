@@ -1,6 +1,62 @@
 import unittest
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
 import translators as ts
-from utils.text_translator import get_text_translated, TRANSLATORS
+from utils import text_translator
+from utils.translation_memory import TranslationMemory
+from utils.translator_health import TranslatorHealth, CIRCUIT_FAILURE_THRESHOLD
+from utils.text_translator import get_text_translated, translate_sentences, split_batch_translation, TRANSLATORS, STATUS_SUCCESS, STATUS_FAILED, STATUS_CANCELLED
+from tests.helpers import temp_translator_health
+
+class StubTranslator:
+    """本地模拟的翻译器，可为指定翻译器注入失败和延迟"""
+
+    def __init__(self, failing=(), delay=0.0, delays=None):
+        self.failing = set(failing)
+        self.delay = delay
+        self.delays = delays or {}
+        self.calls = []
+        self.active = {}
+        self.max_active = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, text, from_lang, to_lang, translator):
+        with self._lock:
+            self.calls.append((text, translator))
+            self.active[translator] = self.active.get(translator, 0) + 1
+            self.max_active[translator] = max(self.max_active.get(translator, 0), self.active[translator])
+        try:
+            time.sleep(self.delays.get(translator, self.delay))
+            if translator in self.failing:
+                raise ConnectionError(f"{translator} 不可用")
+            return f"[{to_lang}]{text}"
+        finally:
+            with self._lock:
+                self.active[translator] -= 1
+
+class HoldingExecutor:
+    """模拟繁忙的对冲线程池：只执行第一个提交的请求，之后提交的请求一直等待，直到被取消"""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.started = False
+        self.held = []
+
+    def submit(self, fn, *args):
+        if self.started:
+            future = Future()
+            self.held.append(future)
+            return future
+        self.started = True
+        return self.executor.submit(fn, *args)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
 
 class TestTextTranslator(unittest.TestCase):
     
@@ -10,7 +66,15 @@ class TestTextTranslator(unittest.TestCase):
                     'This simple statement highlights the incredible influence of our daily habits.',
                     'Habits shape our thoughts, guide our actions, and ultimately determine the kind of life we live.',
                     'Whether good or bad, habits are powerful forces that quietly direct our future.']
-        translated_text = get_text_translated(text_list)
+        # 使用临时的翻译记忆库和健康状态，不读写工作目录中的缓存
+        temp_dir = tempfile.mkdtemp()
+        memory = TranslationMemory(str(Path(temp_dir, "translation_memory.db")))
+        try:
+            with mock.patch.object(text_translator, "TRANSLATION_MEMORY", memory), temp_translator_health():
+                translated_text = get_text_translated(text_list)
+        finally:
+            memory.close()
+            shutil.rmtree(temp_dir, ignore_errors=True)
         self.assertEqual(len(translated_text), len(text_list))
         for i, translated in enumerate(translated_text):
             self.assertNotIn(text_list[i], translated)
@@ -40,6 +104,226 @@ class TestTextTranslator(unittest.TestCase):
         
         for translated in translated_text:
             self.assertNotIn(text, translated)
-            
+
+    def test_translate_sentences_order_and_status(self):
+        """测试并发翻译按输入顺序返回，并报告每句状态"""
+        text_list = [f"Sentence {i}." for i in range(50)]
+        stub = StubTranslator(failing=[TRANSLATORS[0]], delay=0.001)
+        results = translate_sentences(text_list, translate_func=stub)
+
+        self.assertEqual([result["text"] for result in results], text_list)
+        for text, result in zip(text_list, results):
+            self.assertEqual(result["status"], STATUS_SUCCESS)
+            self.assertEqual(result["translation"], f"[zh]{text}")
+            self.assertEqual(result["translator"], TRANSLATORS[1])
+
+    def test_translate_sentences_failed(self):
+        """测试所有翻译器失败时的状态与兼容输出"""
+        stub = StubTranslator(failing=TRANSLATORS)
+        results = translate_sentences(["Hello."], translate_func=stub)
+        self.assertEqual(results[0]["status"], STATUS_FAILED)
+        self.assertIsNone(results[0]["translation"])
+        self.assertEqual(len(stub.calls), len(TRANSLATORS))
+
+    def test_provider_concurrency_limit(self):
+        """测试单个翻译器的并发数不超过上限"""
+        stub = StubTranslator(delay=0.01)
+        translate_sentences([f"Sentence {i}." for i in range(40)], translate_func=stub, max_workers=16)
+        self.assertLessEqual(stub.max_active[TRANSLATORS[0]], text_translator.PROVIDER_MAX_CONCURRENCY)
+
+    def test_translate_sentences_cancelled(self):
+        """测试取消信号置位后不再发起翻译"""
+        cancel_event = threading.Event()
+        cancel_event.set()
+        stub = StubTranslator()
+        results = translate_sentences(["Hello.", "World."], translate_func=stub, cancel_event=cancel_event)
+        self.assertTrue(all(result["status"] == STATUS_CANCELLED for result in results))
+        self.assertEqual(stub.calls, [])
+
+    def test_batch_translation(self):
+        """测试批量翻译减少请求次数并按标记拆回单句"""
+        text_list = [f"This is sentence number {i}." for i in range(100)]
+        calls = []
+        echo_stub = lambda text, *args: calls.append(text) or text
+        results = translate_sentences(text_list, translate_func=echo_stub, batch_chars=500)
+
+        self.assertLessEqual(len(calls), 10)
+        for text, result in zip(text_list, results):
+            self.assertEqual(result["status"], STATUS_SUCCESS)
+            self.assertEqual(result["translation"], text)
+
+    def test_batch_translation_not_timed_or_hedged(self):
+        """测试批量请求的成败和耗时都不计入健康状态，也不发出对冲请求"""
+        text_list = [f"This is sentence number {i}." for i in range(20)]
+        health = TranslatorHealth(file_path=None)
+        echo_stub = lambda text, *args: text
+        stats_before = text_translator.HEDGE_STATS.snapshot()
+        results = translate_sentences(text_list, translate_func=echo_stub, batch_chars=500, health=health,
+                                      hedge_percentile=95)
+        stats_after = text_translator.HEDGE_STATS.snapshot()
+
+        self.assertTrue(all(result["status"] == STATUS_SUCCESS for result in results))
+        self.assertIsNone(health.percentile(TRANSLATORS[0], 95))
+        self.assertTrue(all(stats["samples"] == 0 for stats in health.snapshot().values()))
+        self.assertEqual(stats_after["requests"], stats_before["requests"])
+
+    def test_rejected_batches_keep_provider_healthy(self):
+        """测试只拒绝合并文本的翻译器不会因批量请求失败而熔断，逐句回退时仍优先使用它"""
+        health = TranslatorHealth(file_path=None)
+        stub = StubTranslator()
+
+        def reject_batches(text, from_lang, to_lang, translator):
+            if "\n" in text:
+                raise ValueError("文本过长")
+            return stub(text, from_lang, to_lang, translator)
+
+        text_list = [f"This is sentence number {i}." for i in range(40)]
+        results = translate_sentences(text_list, translate_func=reject_batches, batch_chars=100, max_workers=1,
+                                      health=health)
+
+        self.assertTrue(all(result["status"] == STATUS_SUCCESS for result in results))
+        self.assertTrue(all(result["translator"] == TRANSLATORS[0] for result in results))
+        self.assertEqual(health.snapshot()[TRANSLATORS[0]]["state"], "closed")
+        self.assertEqual(health.snapshot()[TRANSLATORS[0]]["error_rate"], 0.0)
+
+    def test_batch_translation_fallback(self):
+        """测试标记无法对齐时退化为逐句翻译"""
+        text_list = ["First sentence.", "Second sentence.", "Third sentence."]
+        stub = StubTranslator()
+        batch_stub = lambda text, *args: text.replace("[2] ", "") if "\n" in text else stub(text, *args)
+        results = translate_sentences(text_list, translate_func=batch_stub, batch_chars=500)
+
+        self.assertEqual([result["translation"] for result in results], [f"[zh]{text}" for text in text_list])
+        self.assertEqual(len(stub.calls), len(text_list))
+
+    def test_split_batch_translation(self):
+        """测试批量译文的拆分，兼容全角括号并拒绝乱序标记"""
+        self.assertEqual(split_batch_translation("［1］ 你好。\n【2】世界。", 2), ["你好。", "世界。"])
+        self.assertIsNone(split_batch_translation("[2] 世界。\n[1] 你好。", 2))
+        self.assertIsNone(split_batch_translation("[1] 你好。", 2))
+        self.assertIsNone(split_batch_translation("[1]\n[2] 世界。", 2))
+
+    def test_translation_memory(self):
+        """测试命中翻译记忆库的句子不再请求翻译器"""
+        memory = TranslationMemory(":memory:")
+        text_list = ["First sentence.", "Second sentence."]
+        stub = StubTranslator()
+        translate_sentences(text_list[:1], translate_func=stub, memory=memory)
+        results = translate_sentences(text_list, translate_func=stub, memory=memory)
+
+        self.assertEqual(len(stub.calls), 2)
+        self.assertTrue(results[0]["cached"])
+        self.assertFalse(results[1]["cached"])
+        self.assertEqual(results[0]["translator"], TRANSLATORS[0])
+        self.assertEqual(memory.stats()["entries"], 2)
+        memory.close()
+
+    def test_health_skips_broken_provider(self):
+        """测试熔断后不再尝试持续失败的翻译器，并优先使用更快的翻译器"""
+        health = TranslatorHealth(file_path=None)
+        stub = StubTranslator(failing=[TRANSLATORS[0]])
+        results = translate_sentences([f"Sentence {i}." for i in range(20)], translate_func=stub, max_workers=1, health=health)
+
+        failed_calls = [call for call in stub.calls if call[1] == TRANSLATORS[0]]
+        self.assertLessEqual(len(failed_calls), CIRCUIT_FAILURE_THRESHOLD)
+        self.assertTrue(all(result["translator"] == TRANSLATORS[1] for result in results))
+        self.assertEqual(health.order(TRANSLATORS)[0], TRANSLATORS[1])
+
+    def test_init_translators(self):
+        """测试探测结果写入健康状态"""
+        health = TranslatorHealth(file_path=None)
+        text_translator.init_translators(health=health, translate_func=StubTranslator(failing=[TRANSLATORS[0]]))
+        snapshot = health.snapshot()
+        self.assertEqual(len(snapshot), len(TRANSLATORS))
+        self.assertEqual(snapshot[TRANSLATORS[0]]["error_rate"], 1.0)
+        self.assertNotEqual(health.order(TRANSLATORS)[0], TRANSLATORS[0])
+
+    def test_hedged_request(self):
+        """测试主翻译器迟迟不返回时发出对冲请求，先返回的结果胜出"""
+        health = TranslatorHealth(file_path=None)
+        for _ in range(10):
+            health.record_success(TRANSLATORS[0], 0.02)
+            health.record_success(TRANSLATORS[1], 0.05)
+        stats_before = text_translator.HEDGE_STATS.snapshot()
+        stub = StubTranslator(delays={TRANSLATORS[0]: 0.5, TRANSLATORS[1]: 0.01})
+
+        start_time = time.monotonic()
+        results = translate_sentences(["Hello."], translate_func=stub, health=health, hedge_percentile=95)
+        elapsed = time.monotonic() - start_time
+
+        stats_after = text_translator.HEDGE_STATS.snapshot()
+        self.assertEqual(results[0]["translator"], TRANSLATORS[1])
+        self.assertLess(elapsed, 0.3)
+        self.assertEqual(stats_after["fired"] - stats_before["fired"], 1)
+        self.assertEqual(stats_after["won"] - stats_before["won"], 1)
+
+    def test_hedge_not_fired_when_fast(self):
+        """测试主翻译器按时返回时不发出对冲请求"""
+        health = TranslatorHealth(file_path=None)
+        for _ in range(10):
+            health.record_success(TRANSLATORS[0], 0.2)
+        stats_before = text_translator.HEDGE_STATS.snapshot()
+        stub = StubTranslator(delays={TRANSLATORS[0]: 0.01})
+        results = translate_sentences(["Hello.", "World."], translate_func=stub, health=health, hedge_percentile=95)
+
+        stats_after = text_translator.HEDGE_STATS.snapshot()
+        self.assertTrue(all(result["translator"] == TRANSLATORS[0] for result in results))
+        self.assertEqual(stats_after["fired"], stats_before["fired"])
+        self.assertEqual(stats_after["requests"] - stats_before["requests"], 2)
+        self.assertEqual(len(stub.calls), 2)
+
+    def test_cancelled_hedge_releases_probe(self):
+        """测试发往半开翻译器的对冲请求在开始前被取消时，归还探测名额"""
+        primary, probed = TRANSLATORS[0], TRANSLATORS[1]
+        health = TranslatorHealth(file_path=None, cooldown=0)
+        health.record_success(primary, 0.05)
+        for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+            health.record_failure(probed)
+        stub = StubTranslator(delays={primary: 0.3})
+        executor = HoldingExecutor()
+        try:
+            with mock.patch.object(text_translator, "_hedge_executor", executor):
+                results = translate_sentences(["Hello."], translate_func=stub, health=health, hedge_percentile=95)
+        finally:
+            executor.shutdown()
+
+        self.assertEqual(results[0]["translator"], primary)
+        self.assertEqual(len(executor.held), 1)
+        self.assertTrue(executor.held[0].cancelled())
+        self.assertEqual([translator for _, translator in stub.calls], [primary])
+        self.assertTrue(health.is_available(probed))
+
+    def test_hedge_rate_with_steady_latency(self):
+        """测试耗时稳定的翻译器在并发排队时，对冲比例约为 (100 - 分位数)%，排队时间不计入对冲等待"""
+        # 主翻译器的耗时在 60~105 毫秒之间循环，其余翻译器很慢，不会胜出
+        latencies = [0.06 + 0.005 * i for i in range(10)]
+        health = TranslatorHealth(file_path=None)
+        for latency in latencies * 5:
+            health.record_success(TRANSLATORS[0], latency)
+        counter = iter(range(1000000))
+        lock = threading.Lock()
+
+        def translate(text, from_lang, to_lang, translator):
+            if translator != TRANSLATORS[0]:
+                time.sleep(0.5)
+            else:
+                with lock:
+                    index = next(counter)
+                time.sleep(latencies[index % len(latencies)])
+            return f"[{to_lang}]{text}"
+
+        stats_before = text_translator.HEDGE_STATS.snapshot()
+        # 并发线程数多于单个翻译器的并发上限，请求需要排队等待
+        results = translate_sentences([f"Sentence {i}." for i in range(80)], translate_func=translate,
+                                      max_workers=text_translator.PROVIDER_MAX_CONCURRENCY * 2,
+                                      health=health, hedge_percentile=80)
+        stats_after = text_translator.HEDGE_STATS.snapshot()
+        # 等待被丢弃的对冲请求结束，释放翻译器的并发名额
+        time.sleep(0.6)
+
+        self.assertTrue(all(result["status"] == STATUS_SUCCESS for result in results))
+        fired = stats_after["fired"] - stats_before["fired"]
+        self.assertLess(fired / len(results), 0.4)
+
 if __name__ == '__main__':
     unittest.main()
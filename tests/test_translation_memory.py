@@ -0,0 +1,49 @@
+import time
+import unittest
+from unittest import mock
+from utils.translation_memory import TranslationMemory
+
+class TestTranslationMemory(unittest.TestCase):
+    def setUp(self):
+        self.memory = TranslationMemory(":memory:")
+
+    def tearDown(self):
+        self.memory.close()
+
+    def test_bulk_lookup(self):
+        """测试批量写入与查询，原文空白差异不影响命中"""
+        self.memory.put_many([("Hello.", "你好。", "bing"), ("World.", "世界。", "youdao")], "en", "zh")
+        found = self.memory.get_many(["  Hello. ", "Unknown.", "World.", "Hello."], "en", "zh")
+
+        self.assertEqual(found, {0: ("你好。", "bing"), 2: ("世界。", "youdao"), 3: ("你好。", "bing")})
+        self.assertEqual(self.memory.get_many(["Hello."], "en", "ja"), {})
+
+        stats = self.memory.stats()
+        self.assertEqual(stats["hits"], 3)
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["entries"], 2)
+        self.assertEqual(stats["bytes"], len("你好。世界。".encode('utf-8')))
+
+    def test_ttl_expiry(self):
+        """测试过期条目不再命中"""
+        memory = TranslationMemory(":memory:", ttl=60)
+        memory.put_many([("Hello.", "你好。", "bing")], "en", "zh")
+        with mock.patch("utils.translation_memory.time.time", return_value=time.time() + 120):
+            self.assertEqual(memory.get_many(["Hello."], "en", "zh"), {})
+        memory.close()
+
+    def test_size_eviction(self):
+        """测试超出大小上限时淘汰最久未访问的条目"""
+        memory = TranslationMemory(":memory:", max_bytes=20)
+        memory.put_many([("A.", "1234567890", "bing")], "en", "zh")
+        memory.put_many([("B.", "1234567890", "bing")], "en", "zh")
+        memory.get_many(["A."], "en", "zh")
+        memory.put_many([("C.", "1234567890", "bing")], "en", "zh")
+
+        found = memory.get_many(["A.", "B.", "C."], "en", "zh")
+        self.assertEqual(sorted(found), [0, 2])
+        self.assertLessEqual(memory.stats()["bytes"], 20)
+        memory.close()
+
+if __name__ == '__main__':
+    unittest.main()
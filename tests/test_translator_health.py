@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from utils.translator_health import TranslatorHealth, CIRCUIT_OPEN, CIRCUIT_CLOSED, CIRCUIT_FAILURE_THRESHOLD
+
+class TestTranslatorHealth(unittest.TestCase):
+    def test_order_by_latency(self):
+        """测试按平均耗时排序，无数据的保持原顺序排在后面"""
+        health = TranslatorHealth(file_path=None)
+        health.record_success("sogou", 0.2)
+        health.record_success("youdao", 0.1)
+        self.assertEqual(health.order(["bing", "sogou", "youdao", "caiyun"]), ["youdao", "sogou", "bing", "caiyun"])
+
+    def test_circuit_breaker(self):
+        """测试连续失败后熔断，冷却后放行一个探测请求，成功后恢复"""
+        health = TranslatorHealth(file_path=None, cooldown=60)
+        for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+            health.record_failure("bing")
+        self.assertEqual(health.snapshot()["bing"]["state"], CIRCUIT_OPEN)
+        self.assertFalse(health.is_available("bing"))
+        self.assertEqual(health.order(["bing", "sogou"]), ["sogou", "bing"])
+
+        with mock.patch("utils.translator_health.time.time", return_value=health._providers["bing"].opened_at + 61):
+            self.assertTrue(health.is_available("bing"))
+            self.assertFalse(health.is_available("bing"))
+        health.record_success("bing", 0.3)
+        self.assertEqual(health.snapshot()["bing"]["state"], CIRCUIT_CLOSED)
+        self.assertTrue(health.is_available("bing"))
+
+    def test_release_probe(self):
+        """测试放弃未发出的探测请求后，半开状态的翻译器可以再次被探测"""
+        health = TranslatorHealth(file_path=None, cooldown=0)
+        for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+            health.record_failure("bing")
+        self.assertTrue(health.is_available("bing"))
+        self.assertFalse(health.is_available("bing"))
+        health.release_probe("bing")
+        self.assertTrue(health.is_available("bing"))
+
+    def test_persistence(self):
+        """测试健康状态在重启后恢复"""
+        fd, file_path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            health = TranslatorHealth(file_path=file_path)
+            health.record_success("youdao", 0.1)
+            for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+                health.record_failure("bing")
+            health.save()
+
+            restored = TranslatorHealth(file_path=file_path)
+            self.assertEqual(restored.order(["bing", "sogou", "youdao"]), ["youdao", "sogou", "bing"])
+            self.assertAlmostEqual(restored.percentile("youdao", 50), 0.1)
+        finally:
+            os.unlink(file_path)
+
+if __name__ == '__main__':
+    unittest.main()
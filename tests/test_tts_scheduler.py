@@ -0,0 +1,59 @@
+import time
+import tempfile
+import shutil
+import unittest
+from pathlib import Path
+from utils.tts_scheduler import TokenBucket, TTSScheduler, FakeTTSBackend
+
+class TestTTSScheduler(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.output_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    async def _run(self, scheduler: TTSScheduler, count: int):
+        import asyncio
+        tasks = [
+            scheduler.synthesize(f"Sentence {i}.", "en-US-ChristopherNeural", self.output_dir / f"{i}.mp3", "+0%", "+0Hz")
+            for i in range(count)
+        ]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def test_concurrency_limit(self):
+        """测试同时合成的数量不超过上限"""
+        backend = FakeTTSBackend(latency=0.01)
+        scheduler = TTSScheduler(backend, max_concurrency=4)
+        results = await self._run(scheduler, 40)
+        self.assertTrue(all(result is None for result in results))
+        self.assertLessEqual(backend.max_active, 4)
+        self.assertEqual(len(list(self.output_dir.iterdir())), 40)
+
+    async def test_retry_recovers_failures(self):
+        """测试失败后重试能够恢复"""
+        backend = FakeTTSBackend(latency=0, fail_times=2)
+        scheduler = TTSScheduler(backend, max_retries=3, base_delay=0.001, max_delay=0.01)
+        results = await self._run(scheduler, 10)
+        self.assertTrue(all(result is None for result in results))
+        self.assertEqual(backend.failures, 20)
+        self.assertEqual(scheduler.retries, 20)
+
+    async def test_retry_exhausted(self):
+        """测试重试耗尽后抛出异常"""
+        backend = FakeTTSBackend(latency=0, fail_times=5)
+        scheduler = TTSScheduler(backend, max_retries=1, base_delay=0.001, max_delay=0.01)
+        results = await self._run(scheduler, 3)
+        self.assertTrue(all(isinstance(result, ConnectionError) for result in results))
+        self.assertEqual(backend.calls, 6)
+
+    async def test_token_bucket(self):
+        """测试令牌桶限制请求速率"""
+        bucket = TokenBucket(rate=100, capacity=5)
+        start_time = time.monotonic()
+        for _ in range(15):
+            await bucket.acquire()
+        # 突发 5 个之后，剩余 10 个按每秒 100 个补充，至少需要约 0.1 秒
+        self.assertGreaterEqual(time.monotonic() - start_time, 0.08)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import asyncio
+import json
+import tempfile
+import shutil
+import time
+from pathlib import Path
+from utils.voice_catalog import VoiceCatalog
+
+VOICES = [
+    {"ShortName": "en-US-AriaNeural", "Gender": "Female", "Locale": "en-US",
+     "VoiceTag": {"ContentCategories": ["News"], "VoicePersonalities": ["Friendly"]}},
+    {"ShortName": "en-US-GuyNeural", "Gender": "Male", "Locale": "en-US",
+     "VoiceTag": {"ContentCategories": ["News"], "VoicePersonalities": ["Passion"]}},
+    {"ShortName": "fr-FR-DeniseNeural", "Gender": "Female", "Locale": "fr-FR",
+     "VoiceTag": {"ContentCategories": ["General"], "VoicePersonalities": ["Friendly"]}},
+]
+
+class FakeFetcher:
+    """本地模拟的音色获取函数，记录调用次数，可模拟网络失败"""
+
+    def __init__(self, voices=None, fail=False, delay=0.0):
+        self.voices = voices if voices is not None else VOICES
+        self.fail = fail
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("模拟网络不可用")
+        return self.voices
+
+class TestVoiceCatalog(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.snapshot_path = str(Path(self.temp_dir, "voices.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def write_snapshot(self, voices, fetched_at):
+        Path(self.snapshot_path).write_text(json.dumps({"fetched_at": fetched_at, "voices": voices}), encoding="utf-8")
+
+    async def test_load_from_snapshot_offline(self):
+        """测试有快照时离线加载，按地区代码查询音色"""
+        self.write_snapshot(VOICES, time.time())
+        fetcher = FakeFetcher(fail=True)
+        catalog = VoiceCatalog(self.snapshot_path, fetcher=fetcher)
+
+        voices = await catalog.get("en-US")
+        self.assertEqual([voice["name"] for voice in voices], ["en-US-AriaNeural", "en-US-GuyNeural"])
+        self.assertEqual(voices[0], {"name": "en-US-AriaNeural", "gender": "Female", "style": ["News", "Friendly"]})
+        self.assertEqual(await catalog.get("de-DE"), [])
+        self.assertEqual(fetcher.calls, 0)
+
+        # 修改返回结果不影响目录中的数据
+        voices[0]["name"] = "modified"
+        self.assertEqual((await catalog.get("en-US"))[0]["name"], "en-US-AriaNeural")
+
+    async def test_fetch_and_save_snapshot(self):
+        """测试没有快照时联网获取，并发请求只获取一次，结果写入快照"""
+        fetcher = FakeFetcher(delay=0.05)
+        catalog = VoiceCatalog(self.snapshot_path, fetcher=fetcher)
+
+        results = await asyncio.gather(*(catalog.get("fr-FR") for _ in range(5)))
+        self.assertTrue(all(len(voices) == 1 for voices in results))
+        self.assertEqual(fetcher.calls, 1)
+
+        # 新实例直接从快照加载
+        offline = VoiceCatalog(self.snapshot_path, fetcher=FakeFetcher(fail=True))
+        self.assertEqual(len(await offline.get("en-US")), 2)
+
+    async def test_fetch_failure_without_snapshot(self):
+        """测试没有快照且联网失败时抛出异常"""
+        catalog = VoiceCatalog(self.snapshot_path, fetcher=FakeFetcher(fail=True))
+        with self.assertRaises(RuntimeError):
+            await catalog.get("en-US")
+
+    async def test_stale_while_revalidate(self):
+        """测试数据过期后先返回旧数据，同时在后台刷新"""
+        self.write_snapshot(VOICES[:1], time.time() - 100)
+        fetcher = FakeFetcher(delay=0.05)
+        catalog = VoiceCatalog(self.snapshot_path, ttl=10, fetcher=fetcher)
+
+        self.assertEqual(len(await catalog.get("en-US")), 1)
+        self.assertEqual(len(await catalog.get("en-US")), 1)
+        await catalog._refresh_task
+        self.assertEqual(fetcher.calls, 1)
+        self.assertEqual(len(await catalog.get("en-US")), 2)
+        self.assertFalse(catalog.stale)
+        self.assertEqual(json.loads(Path(self.snapshot_path).read_text(encoding="utf-8"))["voices"], VOICES)
+
+    async def test_refresh_failure_keeps_stale_data(self):
+        """测试后台刷新失败时继续使用旧数据，且不会每次查询都重试"""
+        self.write_snapshot(VOICES, time.time() - 100)
+        fetcher = FakeFetcher(fail=True)
+        catalog = VoiceCatalog(self.snapshot_path, ttl=10, fetcher=fetcher)
+
+        self.assertEqual(len(await catalog.get("en-US")), 2)
+        await catalog._refresh_task
+        for _ in range(3):
+            self.assertEqual(len(await catalog.get("en-US")), 2)
+        self.assertEqual(fetcher.calls, 1)
+
+    async def test_lookup_performance(self):
+        """测试加载后按地区查询的耗时在毫秒以内"""
+        voices = [
+            {"ShortName": f"xx-{i % 100:02d}-Voice{i}Neural", "Gender": "Male", "Locale": f"xx-{i % 100:02d}"}
+            for i in range(500)
+        ]
+        self.write_snapshot(voices, time.time())
+        catalog = VoiceCatalog(self.snapshot_path, fetcher=FakeFetcher(fail=True))
+        await catalog.load()
+
+        start_time = time.perf_counter()
+        for _ in range(1000):
+            await catalog.get("xx-42")
+        execution_time = (time.perf_counter() - start_time) / 1000
+        self.assertLess(execution_time, 0.001)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,17 +1,32 @@
 import asyncio
 import hashlib
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
-import edge_tts
-from edge_tts import VoicesManager
+from utils.disk_cache import DiskCache
 from utils.logger import logger
+from utils.text_processor import canonicalize_text
+from utils.tts_scheduler import TTSScheduler, TTS_SCHEDULER
+from utils.voice_catalog import VOICE_CATALOG
 
 AUDIO_DIR = "audios"
 
+# 跨任务共享的音频缓存目录及大小上限
+AUDIO_CACHE_DIR = "cache/audios"
+AUDIO_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# 默认语速和音调
+DEFAULT_RATE = "+0%"
+DEFAULT_PITCH = "+0Hz"
+
+AUDIO_CACHE = DiskCache(AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_BYTES, suffix=".mp3")
+
+# 正在合成中的缓存键，相同内容的并发请求只合成一次
+_inflight: Dict[str, asyncio.Future] = {}
+
 async def list_voices(locale: str = 'en-US') -> list:
     """
-    列出指定语言的可用音色
+    列出指定语言的可用音色，从常驻内存的音色目录中查询
     
     Args:
         locale (str, optional): 语言代码，如 en-US。默认为 'en-US'
@@ -19,33 +34,31 @@ async def list_voices(locale: str = 'en-US') -> list:
     Returns:
         list: 音色列表
     """
-    logger.info(f"正在获取 {locale} 语言的音色列表...")
-    voices_list = []
-    voices = await VoicesManager.create()
-    _voices_list = voices.find(Locale=locale)
-    for voice in _voices_list:
-        voices_list.append({
-            "name": voice["ShortName"],
-            "gender": voice["Gender"],
-            # VoiceTag': {'ContentCategories': ['Conversation', 'Copilot'], 'VoicePersonalities': ['Expressive', 'Caring', 'Pleasant', 'Friendly']}
-            "style": voice["VoiceTag"]["ContentCategories"] + voice["VoiceTag"]["VoicePersonalities"],
-        })
+    voices_list = await VOICE_CATALOG.get(locale)
     logger.info(f"共找到 {locale} 语言的 {len(voices_list)} 个可用音色")
     return voices_list
 
-async def generate_audio(text_list: List[str], voice_name: str, title: str) -> Tuple[Path, List[str], str]:
+async def generate_audio(text_list: List[str], voice_name: str, title: str,
+                         rate: str = DEFAULT_RATE, pitch: str = DEFAULT_PITCH,
+                         scheduler: Optional[TTSScheduler] = None,
+                         progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[Path, List[str], str]:
     """
-    生成音频(异步)
+    生成音频(异步)，优先复用缓存中已合成的音频，未命中的由调度器限流合成
     
     Args:
         text_list (List[str]): 文本列表
         voice_name (str): 音色名称
         title (str): 标题，用于生成音频目录名称
+        rate (str, optional): 语速，如 +10%。默认为 '+0%'
+        pitch (str, optional): 音调，如 -5Hz。默认为 '+0Hz'
+        scheduler (Optional[TTSScheduler], optional): TTS 调度器。默认为全局共享的 TTS_SCHEDULER
+        progress_callback (Optional[Callable[[int, int], None]], optional): 进度回调，参数为已完成数和总数
         
     Returns:
         Tuple[Path, List[str], str]: 返回音频目录路径、生成的文件名列表和警告信息
     """
     logger.info(f"正在生成音频文件，音色为 {voice_name} ...")
+    scheduler = scheduler or TTS_SCHEDULER
     audio_dir = _check_audio_dir(title)
     filenames = []
     tasks = []
@@ -53,9 +66,18 @@ async def generate_audio(text_list: List[str], voice_name: str, title: str) -> T
         filename = _get_filename(text)
         filenames.append(f"{i+1}_{filename}")
         file_path = Path(audio_dir, filenames[-1])
-        communicate = edge_tts.Communicate(text, voice_name)
-        task = asyncio.create_task(communicate.save(str(file_path)))
+        task = asyncio.create_task(_save_audio(text, voice_name, file_path, rate, pitch, scheduler))
         tasks.append(task)
+    if progress_callback is not None:
+        done_count = 0
+
+        def on_done(_):
+            nonlocal done_count
+            done_count += 1
+            progress_callback(done_count, len(tasks))
+
+        for task in tasks:
+            task.add_done_callback(on_done)
     results = await asyncio.gather(*tasks, return_exceptions=True)
     
     warning_msg = ""
@@ -63,48 +85,123 @@ async def generate_audio(text_list: List[str], voice_name: str, title: str) -> T
     
     # 检查执行结果，记录任何可能的异常
     success_count = 0
+    cache_hits = 0
     for i, result in enumerate(results):
         if isinstance(result, Exception):
             warning_num.append(i+1)
             logger.error(f"生成第 {i+1} 个音频时出错: {result}")
         else:
             success_count += 1
+            cache_hits += int(result)
     
     if warning_num:
         warning_msg = f"第 {','.join(map(str, warning_num))} 个音频生成失败，请检查日志信息，尝试换个音色重新生成"
     
-    logger.info(f"共 {success_count}/{len(text_list)} 条音频生成完成，保存在 {audio_dir}")
+    logger.info(f"共 {success_count}/{len(text_list)} 条音频生成完成（缓存命中 {cache_hits} 条），保存在 {audio_dir}")
     return audio_dir, filenames, warning_msg
     
-def generate_audio_sync(text_list: List[str], voice_name: str, title: str) -> Tuple[Path, List[str]]:
+def generate_audio_sync(text_list: List[str], voice_name: str, title: str,
+                        rate: str = DEFAULT_RATE, pitch: str = DEFAULT_PITCH,
+                        scheduler: Optional[TTSScheduler] = None) -> Tuple[Path, List[str]]:
     """
-    生成音频(同步)
+    生成音频(同步)，在新的事件循环中调用 generate_audio，与异步接口共用缓存、限流和重试策略
+    
+    不能在正在运行的事件循环中调用，异步代码中请直接使用 generate_audio。
     
     Args:
         text_list (List[str]): 文本列表
         voice_name (str): 音色名称
         title (str): 标题，用于生成音频目录名称
+        rate (str, optional): 语速，如 +10%。默认为 '+0%'
+        pitch (str, optional): 音调，如 -5Hz。默认为 '+0Hz'
+        scheduler (Optional[TTSScheduler], optional): TTS 调度器。默认为全局共享的 TTS_SCHEDULER
         
     Returns:
         Tuple[Path, List[str]]: 音频目录路径和生成的文件名列表
     """
-    logger.info(f"正在生成音频文件，音色为 {voice_name} ...")
-    audio_dir = _check_audio_dir(title)
-    filenames = []
-    success_count = 0
-    for i, text in enumerate(text_list):
-        try:
-            filename = _get_filename(text)
-            filenames.append(f"{i+1}_{filename}")
-            communicate = edge_tts.Communicate(text, voice_name)
-            file_path = Path(audio_dir, filenames[-1])
-            communicate.save_sync(str(file_path))
-            success_count += 1
-        except Exception as e:
-            logger.error(f"生成第 {i+1} 个音频时出错: {e}")
-    logger.info(f"共 {success_count}/{len(text_list)} 条音频生成完成，保存在 {audio_dir}")
+    audio_dir, filenames, _ = asyncio.run(generate_audio(text_list, voice_name, title, rate, pitch, scheduler))
     return audio_dir, filenames
 
+def get_cache_key(text: str, voice_name: str, rate: str = DEFAULT_RATE, pitch: str = DEFAULT_PITCH) -> str:
+    """
+    根据音色、语速、音调和规范化后的文本生成缓存键
+    
+    Args:
+        text (str): 文本
+        voice_name (str): 音色名称
+        rate (str, optional): 语速。默认为 '+0%'
+        pitch (str, optional): 音调。默认为 '+0Hz'
+        
+    Returns:
+        str: 缓存键
+    """
+    # 统一 Unicode 形式并合并空白，确保仅排版不同的文本命中同一条缓存
+    raw_key = f"{voice_name}|{rate}|{pitch}|{canonicalize_text(text)}"
+    return hashlib.md5(raw_key.encode('utf-8')).hexdigest()
+
+async def _save_audio(text: str, voice_name: str, file_path: Path, rate: str, pitch: str, scheduler: TTSScheduler) -> bool:
+    """
+    将单条音频写入任务目录，缓存未命中时才调用 TTS 合成
+    
+    Returns:
+        bool: 是否命中缓存
+    """
+    key = get_cache_key(text, voice_name, rate, pitch)
+    hit = AUDIO_CACHE.get(key) is not None
+    if not hit:
+        await _ensure_cached(key, text, voice_name, rate, pitch, scheduler)
+    try:
+        AUDIO_CACHE.link_to(key, file_path)
+    except FileNotFoundError:
+        if AUDIO_CACHE.get(key) is not None:
+            raise
+        # 查询之后、链接之前条目被其他线程淘汰，重新合成一次
+        logger.info(f"缓存的音频 {key} 已被淘汰，重新合成")
+        await _ensure_cached(key, text, voice_name, rate, pitch, scheduler)
+        AUDIO_CACHE.link_to(key, file_path)
+        hit = False
+    return hit
+
+async def _ensure_cached(key: str, text: str, voice_name: str, rate: str, pitch: str, scheduler: TTSScheduler):
+    """确保缓存中存在该条音频，相同内容正在被其他任务合成时等待其结束，而不重复合成"""
+    while True:
+        inflight = _inflight.get(key)
+        if inflight is None:
+            break
+        # asyncio.wait 不会把当前任务的取消传递给共享的 future，也不会抛出对方的异常
+        await asyncio.wait({inflight})
+        if inflight.cancelled():
+            # 合成方被取消，由当前任务重新合成
+            continue
+        inflight.result()
+        if AUDIO_CACHE.get(key) is not None:
+            return
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        await _synthesize_to_cache(key, text, voice_name, rate, pitch, scheduler)
+        future.set_result(None)
+    except Exception as e:
+        future.set_exception(e)
+        # 避免 "Future exception was never retrieved" 警告
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(key, None)
+        if not future.done():
+            # 当前任务被取消，通知等待者自行重新合成
+            future.cancel()
+
+async def _synthesize_to_cache(key: str, text: str, voice_name: str, rate: str, pitch: str, scheduler: TTSScheduler):
+    """通过调度器合成音频并写入缓存"""
+    tmp_path = AUDIO_CACHE.reserve(key)
+    try:
+        await scheduler.synthesize(text, voice_name, tmp_path, rate, pitch)
+        AUDIO_CACHE.commit(key, tmp_path)
+    finally:
+        AUDIO_CACHE.discard(tmp_path)
+
 def _get_filename(text: str) -> str:
     """根据文本内容生成文件名"""
     # 去除文本前后的空白字符，确保相同的实际内容生成相同的文件名
@@ -0,0 +1,192 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from utils.logger import logger
+
+# 超过该时长仍未提交的临时文件视为遗留文件
+STALE_TMP_SECONDS = 3600
+
+class DiskCache:
+    """
+    基于文件的 LRU 磁盘缓存
+
+    每个条目对应缓存目录下的一个文件，文件名即缓存键。
+    访问顺序通过文件的修改时间持久化，重启后按修改时间恢复 LRU 顺序；
+    总大小超过上限时，从最久未访问的条目开始淘汰。
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, suffix: str = ""):
+        """
+        Args:
+            cache_dir (str): 缓存目录
+            max_bytes (int): 缓存总大小上限（字节）
+            suffix (str, optional): 缓存文件后缀，如 .mp3。默认为空
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._loaded = False
+
+    def get(self, key: str) -> Optional[Path]:
+        """
+        查询缓存，命中时刷新访问时间
+
+        Args:
+            key (str): 缓存键
+
+        Returns:
+            Optional[Path]: 命中时返回缓存文件路径，否则返回 None
+        """
+        with self._lock:
+            self._load()
+            path = self._path(key)
+            if key not in self._entries or not path.exists():
+                self._forget(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def reserve(self, key: str) -> Path:
+        """
+        返回一个用于写入新条目的临时文件路径，写完后调用 commit 提交
+
+        Args:
+            key (str): 缓存键
+
+        Returns:
+            Path: 临时文件路径
+        """
+        with self._lock:
+            self._load()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        return self.cache_dir / f"{key}.{uuid.uuid4().hex[:8]}.tmp"
+
+    def commit(self, key: str, tmp_path: Path) -> Path:
+        """
+        将写好的临时文件原子地提交为缓存条目，并按需淘汰旧条目
+
+        Args:
+            key (str): 缓存键
+            tmp_path (Path): reserve 返回的临时文件路径
+
+        Returns:
+            Path: 缓存文件路径
+        """
+        path = self._path(key)
+        size = Path(tmp_path).stat().st_size
+        with self._lock:
+            self._load()
+            os.replace(tmp_path, path)
+            self._forget(key)
+            self._entries[key] = size
+            self._total_bytes += size
+            self._evict()
+        return path
+
+    def discard(self, tmp_path: Path):
+        """删除未提交的临时文件"""
+        try:
+            Path(tmp_path).unlink()
+        except OSError:
+            pass
+
+    def link_to(self, key: str, dest: Path) -> Path:
+        """
+        将缓存条目引用到目标路径，优先使用硬链接，不支持时退化为复制
+
+        Args:
+            key (str): 缓存键
+            dest (Path): 目标文件路径
+
+        Returns:
+            Path: 目标文件路径
+        """
+        src = self._path(key)
+        dest = Path(dest)
+        if dest.exists():
+            dest.unlink()
+        try:
+            os.link(src, dest)
+        except OSError:
+            shutil.copy2(src, dest)
+        return dest
+
+    def stats(self) -> dict:
+        """
+        获取缓存统计信息
+
+        Returns:
+            dict: hits命中数 misses未命中数 hit_rate命中率 entries条目数 bytes占用字节数 evictions淘汰数
+        """
+        with self._lock:
+            self._load()
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "evictions": self.evictions,
+            }
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.suffix}"
+
+    def _forget(self, key: str):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _load(self):
+        """首次使用时扫描缓存目录，按修改时间恢复 LRU 顺序"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.cache_dir.exists():
+            return
+        files = []
+        for path in self.cache_dir.iterdir():
+            if path.suffix == ".tmp":
+                # 上次异常退出遗留的临时文件，较新的可能正被其他进程写入
+                if time.time() - path.stat().st_mtime > STALE_TMP_SECONDS:
+                    self.discard(path)
+                continue
+            if not path.is_file() or (self.suffix and not path.name.endswith(self.suffix)):
+                continue
+            stat = path.stat()
+            key = path.name[:len(path.name) - len(self.suffix)] if self.suffix else path.name
+            files.append((stat.st_mtime, key, stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _evict(self):
+        """淘汰最久未访问的条目直到总大小不超过上限"""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                self._path(key).unlink()
+            except OSError as e:
+                logger.warning(f"删除缓存文件 {key} 失败: {e}")
@@ -0,0 +1,141 @@
+import io
+import time
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator, Tuple, Union
+
+import jinja2
+
+# 生成压缩包时每次读取文件的块大小（字节）
+ZIP_CHUNK_SIZE = 64 * 1024
+# 本身已经压缩过的文件类型，再次压缩几乎不能减小体积，直接存储
+STORED_SUFFIXES = {'.mp3', '.png', '.jpg', '.jpeg', '.gif', '.webp', '.zip'}
+
+# 导出页面的模板目录和模板文件名
+EXPORT_TEMPLATE_DIR = "templates"
+EXPORT_TEMPLATE_NAME = "export_template.html"
+# 流式渲染时每次输出的模板片段数量
+EXPORT_RENDER_BUFFER = 64
+
+# 压缩包条目的内容：磁盘上的文件路径、完整的字节串，或按顺序产出的文本/字节块
+ZipSource = Union[Path, bytes, Iterable[Union[str, bytes]]]
+
+class _ChunkWriter(io.RawIOBase):
+    """
+    只能追加写入的缓冲区，供 zipfile 写入，写入的数据随即被取走输出
+
+    不支持 seek，zipfile 会改用数据描述符记录每个条目的大小和校验值，
+    因此无需预先知道条目大小，也无需回写已输出的数据。
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        """取走目前为止写入的全部数据"""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+class ExportRenderer:
+    """
+    导出页面渲染器
+
+    持有预编译模板的 jinja2 Environment，模板只在首次使用或文件修改后重新编译；
+    页面只在实际导出时渲染，并可按块流式输出，避免一次生成包含上千个句子的完整字符串。
+    """
+
+    def __init__(self, template_dir: str = EXPORT_TEMPLATE_DIR, template_name: str = EXPORT_TEMPLATE_NAME,
+                 auto_reload: bool = True):
+        """
+        Args:
+            template_dir (str, optional): 模板目录。默认为 EXPORT_TEMPLATE_DIR
+            template_name (str, optional): 模板文件名。默认为 EXPORT_TEMPLATE_NAME
+            auto_reload (bool, optional): 模板文件修改后是否自动重新编译。默认为 True
+        """
+        self.template_name = template_name
+        self.env = jinja2.Environment(loader=jinja2.FileSystemLoader(template_dir), auto_reload=auto_reload)
+
+    def render(self, **context) -> str:
+        """渲染完整页面"""
+        return self.env.get_template(self.template_name).render(**context)
+
+    def stream(self, buffer_size: int = EXPORT_RENDER_BUFFER, **context) -> Iterator[str]:
+        """
+        流式渲染页面
+
+        Args:
+            buffer_size (int, optional): 每次输出的模板片段数量。默认为 EXPORT_RENDER_BUFFER
+            **context: 模板变量
+
+        Yields:
+            str: 页面内容块
+        """
+        stream = self.env.get_template(self.template_name).stream(**context)
+        stream.enable_buffering(buffer_size)
+        yield from stream
+
+# 全局共享的导出页面渲染器
+EXPORT_RENDERER = ExportRenderer()
+
+def iter_zip(entries: Iterable[Tuple[str, ZipSource]], compress: bool = True,
+             chunk_size: int = ZIP_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    边读取文件边生成 ZIP 压缩包，不在磁盘上生成中间文件
+
+    每次只读取一块文件内容，压缩后立即产出，内存占用与文件数量和大小无关。
+    STORED_SUFFIXES 中的文件（如 MP3）直接存储，其余文件按 compress 决定是否压缩。
+
+    Args:
+        entries (Iterable[Tuple[str, ZipSource]]): (压缩包内路径, 内容) 列表，内容为文件路径、字节串或文本块迭代器
+        compress (bool, optional): 是否压缩未压缩过的文件。默认为 True
+        chunk_size (int, optional): 每次读取文件的块大小（字节）。默认为 ZIP_CHUNK_SIZE
+
+    Yields:
+        bytes: 压缩包数据块
+    """
+    writer = _ChunkWriter()
+    with zipfile.ZipFile(writer, mode="w") as archive:
+        for arcname, source in entries:
+            if isinstance(source, Path):
+                info = zipfile.ZipInfo.from_file(source, arcname)
+                suffix = source.suffix.lower()
+            else:
+                info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+                suffix = Path(arcname).suffix.lower()
+            stored = not compress or suffix in STORED_SUFFIXES
+            info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+
+            with archive.open(info, mode="w") as dest:
+                for chunk in _iter_source(source, chunk_size):
+                    dest.write(chunk)
+                    data = writer.drain()
+                    if data:
+                        yield data
+            data = writer.drain()
+            if data:
+                yield data
+    # 关闭压缩包时写入中央目录
+    data = writer.drain()
+    if data:
+        yield data
+
+def _iter_source(source: ZipSource, chunk_size: int) -> Iterator[bytes]:
+    """按块读取条目内容"""
+    if isinstance(source, Path):
+        with open(source, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+    elif isinstance(source, (bytes, bytearray)):
+        for start in range(0, len(source), chunk_size):
+            yield bytes(source[start:start + chunk_size])
+    else:
+        for chunk in source:
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
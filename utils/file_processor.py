@@ -1,18 +1,148 @@
+import os
 import re
+import json
+import uuid
+import hashlib
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
 
 import pymupdf
+from utils.disk_cache import DiskCache
 from utils.logger import logger
-from utils.text_processor import normalize_text
+from utils.process_pool import run_in_processes, PROCESS_POOL_MAX_WORKERS
+from utils.text_processor import normalize_text, iter_sentences
 
 FILE_TYPES = ['.pdf', '.txt', '.docx', '.xlsx', '.pptx', '.svg', '.epub', '.mobi', '.xps', '.fb2', '.cbz']
 
-def extract_text_from_file(file_path: str) -> str:
+# 页数达到该值时默认按页分段并行提取
+PARALLEL_MIN_PAGES = 64
+# 并行提取时的分段数上限，各段由共享进程池执行
+EXTRACT_MAX_WORKERS = PROCESS_POOL_MAX_WORKERS
+
+# 提取逻辑的版本号，提取结果发生变化时递增，使旧的缓存失效
+EXTRACTOR_VERSION = 1
+# 提取结果缓存的目录及大小上限
+TEXT_CACHE_DIR = "cache/texts"
+TEXT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+TEXT_CACHE = DiskCache(TEXT_CACHE_DIR, TEXT_CACHE_MAX_BYTES, suffix=".json")
+
+# 上传文件的大小上限（字节）
+MAX_UPLOAD_SIZE = 200 * 1024 * 1024
+# 保存上传文件时每次读取的块大小（字节）
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+class UploadTooLargeError(ValueError):
+    """上传文件超出大小上限"""
+
+async def save_upload(upload, dest_dir: str, max_size: int = MAX_UPLOAD_SIZE, chunk_size: int = UPLOAD_CHUNK_SIZE,
+                      owner: str = "") -> Tuple[Path, str]:
+    """
+    分块将上传文件写入磁盘，同时计算内容哈希并检查大小上限
+    
+    文件以内容哈希和所有者命名，同一所有者重复上传相同的文件时复用已保存的文件；
+    不同所有者（如不同会话）上传相同内容时各自保存一份，一方删除文件不影响另一方。
+
+    Args:
+        upload: 上传文件对象，需提供 filename 属性和 async read(size) 方法
+        dest_dir (str): 保存目录
+        max_size (int, optional): 大小上限（字节）。默认为 MAX_UPLOAD_SIZE
+        chunk_size (int, optional): 每次读取的块大小（字节）。默认为 UPLOAD_CHUNK_SIZE
+        owner (str, optional): 文件所有者，如会话 ID。默认为空，不区分所有者
+
+    Returns:
+        Tuple[Path, str]: 保存后的文件路径和内容的 SHA-256 哈希
+        
+    Raises:
+        UploadTooLargeError: 文件超出大小上限
+    """
+    dest = Path(dest_dir)
+    dest.mkdir(parents=True, exist_ok=True)
+    suffix = Path(upload.filename or "unknown").suffix
+    tmp_path = dest / f"{uuid.uuid4().hex}.part"
+    
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(f"文件大小超过上限 {max_size // (1024 * 1024)} MB")
+                hasher.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    
+    content_hash = hasher.hexdigest()
+    # 所有者可能来自客户端的 Cookie，只使用其哈希作为文件名的一部分
+    owner_tag = f"_{hashlib.sha256(owner.encode('utf-8')).hexdigest()[:16]}" if owner else ""
+    file_path = dest / f"{content_hash}{owner_tag}{suffix}"
+    if file_path.exists():
+        tmp_path.unlink()
+        logger.info(f"{upload.filename} 与已上传的文件相同，复用已保存的文件")
+    else:
+        os.replace(tmp_path, file_path)
+    logger.info(f"{upload.filename} 上传完成，大小 {size} 字节")
+    return file_path, content_hash
+
+def get_cached_extraction(content_hash: str, file_type: str) -> Optional[dict]:
+    """
+    根据文件内容哈希查询缓存的提取结果，无需打开文件
+
+    Args:
+        content_hash (str): 文件内容的 SHA-256 哈希
+        file_type (str): 文件后缀，如 .pdf
+
+    Returns:
+        Optional[dict]: 命中时返回 text提取的文字 language语言检测结果，否则返回 None
+    """
+    path = TEXT_CACHE.get(_extraction_cache_key(content_hash, file_type))
+    if path is None:
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取提取结果缓存失败: {e}")
+        return None
+
+def cache_extraction(content_hash: str, file_type: str, text: str, language: dict):
+    """
+    缓存文件的提取结果及语言检测结果
+
+    Args:
+        content_hash (str): 文件内容的 SHA-256 哈希
+        file_type (str): 文件后缀，如 .pdf
+        text (str): 提取的文字
+        language (dict): 语言检测结果
+    """
+    key = _extraction_cache_key(content_hash, file_type)
+    tmp_path = TEXT_CACHE.reserve(key)
+    try:
+        tmp_path.write_text(json.dumps({"text": text, "language": language}, ensure_ascii=False), encoding="utf-8")
+        TEXT_CACHE.commit(key, tmp_path)
+    except OSError as e:
+        logger.warning(f"写入提取结果缓存失败: {e}")
+    finally:
+        TEXT_CACHE.discard(tmp_path)
+
+def _extraction_cache_key(content_hash: str, file_type: str) -> str:
+    """缓存键包含文件类型和提取逻辑版本，相同内容按不同类型解析或提取逻辑变化时不会误命中"""
+    return f"{content_hash}_{file_type.lstrip('.').lower()}_v{EXTRACTOR_VERSION}"
+
+def extract_text_from_file(file_path: str, parallel: Optional[bool] = None, max_workers: int = EXTRACT_MAX_WORKERS) -> str:
     """
     提取文件中的文字
 
     Args:
         file_path (str): 需要提取的文件路径
+        parallel (Optional[bool], optional): 是否按页分段并行提取，为 None 时页数不少于 PARALLEL_MIN_PAGES 才并行。默认为 None
+        max_workers (int, optional): 并行提取时的进程数上限。默认为 EXTRACT_MAX_WORKERS
 
     Returns:
         str: 提取到的文字信息
@@ -29,19 +159,21 @@ def extract_text_from_file(file_path: str) -> str:
     # 打开文件并确保正确关闭
     try:
         doc = pymupdf.open(file_path)
-        logger.info(f"{file.name} 打开成功，共 {len(doc)} 页")
+        page_count = len(doc)
+        logger.info(f"{file.name} 打开成功，共 {page_count} 页")
         
-        # 遍历所有页
-        text = ""
-        for page in doc.pages():
-            page_str = page.get_text()
-            # 去除 \n 合并成一整段
-            page_str = page_str.replace("\n", " ")
-            text += page_str
-            logger.debug(f"{file.name} 页 {page.number} 提取文字成功")
+        if parallel is None:
+            parallel = page_count >= PARALLEL_MIN_PAGES
+        workers = max(1, min(max_workers, page_count))
+        if parallel and workers > 1:
+            # 各进程自行打开文件，这里的文档不再需要
+            doc.close()
+            page_texts = _extract_pages_parallel(file_path, page_count, workers)
+        else:
+            page_texts = [_get_page_text(page) for page in doc.pages()]
         
-        # 处理多余的空格（包括添加空格后产生的多个连续空格）
-        text = re.sub(r'\s+', ' ', text)
+        # 按页序合并，并处理多余的空格（包括去除换行后产生的多个连续空格）
+        text = re.sub(r'\s+', ' ', "".join(page_texts))
         
         # 去除前后空白符
         text = text.strip()
@@ -55,4 +187,75 @@ def extract_text_from_file(file_path: str) -> str:
         try:
             doc.close()
         except:
-            pass
\ No newline at end of file
+            pass
+
+def iter_pages(file_path: str) -> Iterator[str]:
+    """
+    逐页读取文件中的文字，每次只保留一页内容
+    
+    文件类型不支持、文件不存在或读取出错时记录日志并结束迭代。
+
+    Args:
+        file_path (str): 需要读取的文件路径
+
+    Yields:
+        str: 单页文字，换行已替换为空格
+    """
+    file = Path(file_path)
+    if file.suffix not in FILE_TYPES:
+        logger.error(f"文件类型不支持: {file_path}")
+        return
+    if not file.exists():
+        logger.error(f"文件不存在: {file_path}")
+        return
+    
+    try:
+        with pymupdf.open(file_path) as doc:
+            logger.info(f"{file.name} 打开成功，共 {len(doc)} 页")
+            for page in doc.pages():
+                yield _get_page_text(page)
+    except Exception as e:
+        logger.error(f"{file_path} 逐页读取文字出错: {str(e)}")
+
+def iter_sentences_from_file(file_path: str, lang: str = "english") -> Iterator[str]:
+    """
+    逐页读取文件并流式分句，跨页的句子会被正确拼接
+
+    Args:
+        file_path (str): 需要读取的文件路径
+        lang (str, optional): 语言。默认为 'english'
+
+    Yields:
+        str: 分割后的句子
+    """
+    return iter_sentences(iter_pages(file_path), lang=lang)
+
+def _get_page_text(page) -> str:
+    """提取单页文字，去除换行"""
+    return page.get_text().replace("\n", " ")
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """
+    在子进程中打开文件并提取 [start, stop) 范围内各页的文字
+    
+    pymupdf 的文档对象不能跨进程共享，因此每个进程单独打开文件
+    """
+    with pymupdf.open(file_path) as doc:
+        return [_get_page_text(doc[number]) for number in range(start, stop)]
+
+def _extract_pages_parallel(file_path: str, page_count: int, workers: int) -> List[str]:
+    """
+    将页码范围均分给共享进程池中的多个进程并行提取，按页序返回各页文字
+    
+    进程池不可用时退化为在当前进程中逐页提取
+    """
+    step = -(-page_count // workers)
+    ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    logger.info(f"{Path(file_path).name} 使用 {len(ranges)} 个进程并行提取文字")
+    try:
+        starts, stops = zip(*ranges)
+        results = run_in_processes(_extract_page_range, [file_path] * len(ranges), starts, stops)
+        return [text for texts in results for text in texts]
+    except (OSError, BrokenProcessPool) as e:
+        logger.warning(f"并行提取失败，改为逐页提取: {e}")
+        return _extract_page_range(file_path, 0, page_count)
@@ -0,0 +1,221 @@
+import asyncio
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from utils.logger import logger
+
+# 后台清理的执行间隔（秒）
+JANITOR_INTERVAL_SECONDS = 600
+# 最近该时长（秒）内修改或访问过的条目不会被清理，避免删除正在写入的文件
+JANITOR_GRACE_SECONDS = 300
+
+class RetentionRule:
+    """
+    单个目录的保留策略
+
+    目录下的每个直接子项（文件或文件夹）视为一个条目，条目的最后访问时间取其修改时间，
+    可通过 Janitor.touch 刷新。超过保留时长的条目被删除；目录总大小超过上限时，
+    从最久未访问的条目开始删除。
+    """
+
+    def __init__(self, directory: str, max_age: Optional[float] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            directory (str): 目录路径
+            max_age (Optional[float], optional): 条目的保留时长（秒），为 None 时不限。默认为 None
+            max_bytes (Optional[int], optional): 目录总大小上限（字节），为 None 时不限。默认为 None
+        """
+        self.directory = Path(directory)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+
+class Janitor:
+    """
+    后台清理服务
+
+    定期按保留策略清理生成的音频、上传的临时文件和导出文件，
+    正在进行的任务所使用的条目受保护，不会被删除。
+    """
+
+    def __init__(self, rules: List[RetentionRule], interval: float = JANITOR_INTERVAL_SECONDS,
+                 grace: float = JANITOR_GRACE_SECONDS, protected: Optional[Callable[[], Iterable[Path]]] = None):
+        """
+        Args:
+            rules (List[RetentionRule]): 各目录的保留策略
+            interval (float, optional): 清理间隔（秒）。默认为 JANITOR_INTERVAL_SECONDS
+            grace (float, optional): 最近访问过的条目的保护时长（秒）。默认为 JANITOR_GRACE_SECONDS
+            protected (Optional[Callable[[], Iterable[Path]]], optional): 返回受保护条目路径的函数，
+                每次清理时调用。默认为不保护任何条目
+        """
+        self.rules = rules
+        self.interval = interval
+        self.grace = grace
+        self.protected = protected
+        self.runs = 0
+        self.removed_entries = 0
+        self.reclaimed_bytes = 0
+        self.errors = 0
+        self.last_run_at = 0.0
+        self._lock = threading.Lock()
+        # 每个事件循环中运行的后台清理任务
+        self._tasks: Dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+
+    def touch(self, path: Path):
+        """
+        刷新条目的最后访问时间，推迟其被清理
+
+        Args:
+            path (Path): 条目路径，即保留策略目录下的直接子项
+        """
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def collect(self, now: Optional[float] = None, protected: Optional[Iterable[Path]] = None) -> Dict[str, int]:
+        """
+        按保留策略清理一次
+
+        Args:
+            now (Optional[float], optional): 当前时间戳。默认为 time.time()
+            protected (Optional[Iterable[Path]], optional): 受保护的条目路径。默认为调用 self.protected 获取
+
+        Returns:
+            Dict[str, int]: removed本次删除的条目数 reclaimed_bytes本次回收的字节数
+        """
+        now = time.time() if now is None else now
+        protected = self._protected_paths() if protected is None else {Path(path).resolve() for path in protected}
+        with self._lock:
+            removed, reclaimed = 0, 0
+            for rule in self.rules:
+                rule_removed, rule_reclaimed = self._collect_rule(rule, now, protected)
+                removed += rule_removed
+                reclaimed += rule_reclaimed
+
+            self.runs += 1
+            self.removed_entries += removed
+            self.reclaimed_bytes += reclaimed
+            self.last_run_at = now
+        if removed:
+            logger.info(f"后台清理删除了 {removed} 个条目，回收 {reclaimed / (1024 * 1024):.2f} MB")
+        return {"removed": removed, "reclaimed_bytes": reclaimed}
+
+    def stats(self) -> dict:
+        """
+        获取清理统计
+
+        Returns:
+            dict: runs清理次数 removed_entries删除的条目数 reclaimed_bytes回收的字节数 errors删除失败次数 last_run_at最近一次清理时间
+        """
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "removed_entries": self.removed_entries,
+                "reclaimed_bytes": self.reclaimed_bytes,
+                "errors": self.errors,
+                "last_run_at": self.last_run_at,
+            }
+
+    def start(self):
+        """在当前事件循环中启动后台清理，启动时立即清理一次"""
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get(loop)
+        if task is None or task.done():
+            self._tasks[loop] = asyncio.create_task(self._run())
+
+    async def close(self):
+        """停止当前事件循环中的后台清理"""
+        task = self._tasks.pop(asyncio.get_running_loop(), None)
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            try:
+                # 受保护的条目在事件循环中获取，避免在其他线程中读取任务列表
+                protected = self._protected_paths()
+                await asyncio.to_thread(self.collect, protected=protected)
+            except Exception as e:
+                logger.error(f"后台清理出错: {e}")
+            await asyncio.sleep(self.interval)
+
+    def _protected_paths(self) -> set:
+        """获取受保护的条目路径"""
+        if self.protected is None:
+            return set()
+        return {Path(path).resolve() for path in self.protected()}
+
+    def _collect_rule(self, rule: RetentionRule, now: float, protected: set) -> tuple:
+        """按单个保留策略清理目录，返回 (删除的条目数, 回收的字节数)"""
+        if not rule.directory.is_dir():
+            return 0, 0
+
+        entries = []
+        total_bytes = 0
+        for path in rule.directory.iterdir():
+            try:
+                last_access = path.lstat().st_mtime
+                size = _entry_size(path)
+            except OSError:
+                continue
+            total_bytes += size
+            if now - last_access < self.grace or path.resolve() in protected:
+                continue
+            entries.append((last_access, size, path))
+
+        # 从最久未访问的条目开始，先删除过期条目，再删除超出大小上限的部分
+        entries.sort(key=lambda entry: entry[0])
+        removed, reclaimed = 0, 0
+        for last_access, size, path in entries:
+            expired = rule.max_age is not None and now - last_access > rule.max_age
+            oversized = rule.max_bytes is not None and total_bytes > rule.max_bytes
+            if not expired and not oversized:
+                break
+            if not self._remove(path):
+                continue
+            total_bytes -= size
+            removed += 1
+            reclaimed += size
+        return removed, reclaimed
+
+    def _remove(self, path: Path) -> bool:
+        """删除条目，失败时记录日志"""
+        try:
+            if path.is_dir() and not path.is_symlink():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+            return True
+        except OSError as e:
+            self.errors += 1
+            logger.warning(f"清理 {path} 失败: {e}")
+            return False
+
+def _entry_size(path: Path) -> int:
+    """
+    计算删除条目后实际能释放的字节数，文件夹为其中所有文件之和
+
+    音频目录中的文件多为缓存文件的硬链接，还有其他链接时删除并不释放空间，不计入大小
+    """
+    if not path.is_dir() or path.is_symlink():
+        return _file_size(path.lstat())
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += _file_size(os.lstat(os.path.join(root, name)))
+            except OSError:
+                pass
+    return total
+
+def _file_size(stat: os.stat_result) -> int:
+    """文件没有其他硬链接时返回其大小，否则返回 0"""
+    return stat.st_size if stat.st_nlink <= 1 else 0
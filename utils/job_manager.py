@@ -0,0 +1,208 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from utils.logger import logger
+
+# 保留的已结束任务数量上限及保留时长（秒）
+JOB_MAX_FINISHED = 100
+JOB_TTL_SECONDS = 3600
+
+# 任务状态
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+class Job:
+    """
+    后台任务
+
+    记录任务状态、各阶段进度和最终结果，状态变化时通知所有订阅者。
+    进度可以从其他线程更新，更新会被转交给任务所在的事件循环执行。
+    """
+
+    def __init__(self, stages: List[str], context: Optional[dict] = None):
+        """
+        Args:
+            stages (List[str]): 任务包含的阶段名称，按执行顺序排列
+            context (Optional[dict], optional): 与任务关联的附加信息，如原始输入。默认为空
+        """
+        self.id = uuid.uuid4().hex
+        self.context = context or {}
+        self.status = JOB_PENDING
+        self.stage: Optional[str] = None
+        self.progress: Dict[str, Dict[str, int]] = {stage: {"done": 0, "total": 0} for stage in stages}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.exception: Optional[BaseException] = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.task: Optional[asyncio.Task] = None
+        self._version = 0
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+
+    def set_stage(self, stage: str, total: int = 0):
+        """进入新阶段"""
+        self._update(self._apply_stage, stage, total)
+
+    def set_progress(self, stage: str, done: int, total: int):
+        """更新阶段进度，可在任意线程调用"""
+        self._update(self._apply_progress, stage, done, total)
+
+    def progress_callback(self, stage: str) -> Callable[[int, int], None]:
+        """返回用于指定阶段的进度回调函数"""
+        return lambda done, total: self.set_progress(stage, done, total)
+
+    def snapshot(self) -> dict:
+        """
+        获取任务当前状态
+
+        Returns:
+            dict: id任务ID status状态 stage当前阶段 progress各阶段进度 error错误信息
+        """
+        return {
+            "id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": {stage: dict(item) for stage, item in self.progress.items()},
+            "error": self.error,
+        }
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    async def events(self) -> AsyncIterator[dict]:
+        """
+        订阅任务状态，每次变化时产出最新状态，任务结束后停止
+
+        Yields:
+            dict: 任务状态，格式同 snapshot
+        """
+        version = -1
+        while True:
+            changed = self._changed
+            if self._version == version:
+                await changed.wait()
+                continue
+            version = self._version
+            snapshot = self.snapshot()
+            yield snapshot
+            if snapshot["status"] in FINISHED_STATES:
+                return
+
+    def _update(self, func: Callable, *args):
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            func(*args)
+            self._notify()
+        else:
+            self._loop.call_soon_threadsafe(lambda: (func(*args), self._notify()))
+
+    def _apply_stage(self, stage: str, total: int):
+        self.stage = stage
+        self.progress[stage] = {"done": 0, "total": total}
+
+    def _apply_progress(self, stage: str, done: int, total: int):
+        self.progress[stage] = {"done": done, "total": total}
+
+    def _finish(self, status: str, result: Any = None, error: Optional[str] = None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self._notify()
+
+    def _notify(self):
+        """唤醒所有订阅者，并换上新的事件供下一次变化使用"""
+        self._version += 1
+        self.updated_at = time.time()
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+class JobManager:
+    """
+    后台任务管理器
+
+    创建任务后立即返回任务 ID，任务在事件循环中后台执行；
+    已结束的任务保留一段时间供查询结果，超出数量上限或保留时长后清理。
+    任务只保存在创建它的进程的内存中，后台任务模式仅支持单个工作进程部署：
+    多个工作进程时，查询任务的请求可能落到其他进程而找不到任务。
+    """
+
+    def __init__(self, max_finished: int = JOB_MAX_FINISHED, ttl: float = JOB_TTL_SECONDS):
+        """
+        Args:
+            max_finished (int, optional): 保留的已结束任务数量上限。默认为 JOB_MAX_FINISHED
+            ttl (float, optional): 已结束任务的保留时长（秒）。默认为 JOB_TTL_SECONDS
+        """
+        self.max_finished = max_finished
+        self.ttl = ttl
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def create(self, stages: List[str], runner: Callable[[Job], Awaitable[Any]], context: Optional[dict] = None) -> Job:
+        """
+        创建并启动后台任务
+
+        Args:
+            stages (List[str]): 任务包含的阶段名称
+            runner (Callable[[Job], Awaitable[Any]]): 执行任务的协程函数，接收任务对象，返回值作为任务结果
+            context (Optional[dict], optional): 与任务关联的附加信息。默认为空
+
+        Returns:
+            Job: 任务对象
+        """
+        self._prune()
+        job = Job(stages, context)
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job, runner))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """根据任务 ID 获取任务，不存在时返回 None"""
+        return self._jobs.get(job_id)
+
+    def active_jobs(self) -> List[Job]:
+        """获取所有未结束的任务"""
+        return [job for job in self._jobs.values() if not job.finished]
+
+    def cancel(self, job_id: str) -> bool:
+        """取消未结束的任务"""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished or job.task is None:
+            return False
+        job.task.cancel()
+        return True
+
+    async def _run(self, job: Job, runner: Callable[[Job], Awaitable[Any]]):
+        job.status = JOB_RUNNING
+        job._notify()
+        try:
+            result = await runner(job)
+            job._finish(JOB_DONE, result=result)
+        except asyncio.CancelledError:
+            job._finish(JOB_CANCELLED, error="任务已取消")
+        except Exception as e:
+            logger.error(f"任务 {job.id} 执行失败: {e}")
+            job.exception = e
+            job._finish(JOB_FAILED, error=str(e))
+
+    def _prune(self):
+        """清理过期的已结束任务，并控制已结束任务的数量"""
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in finished:
+            if now - job.updated_at > self.ttl:
+                del self._jobs[job.id]
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in finished[:max(0, len(finished) - self.max_finished + 1)]:
+            del self._jobs[job.id]
@@ -1,6 +1,26 @@
-from langdetect import detect, detect_langs
-from langdetect.lang_detect_exception import LangDetectException
+from collections import defaultdict
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from itertools import repeat
+from typing import Iterable, List, Optional
+
+from langdetect import DetectorFactory
+from langdetect.detector_factory import PROFILES_DIRECTORY
+from langdetect.lang_detect_exception import ErrorCode, LangDetectException
 from utils.logger import logger
+from utils.process_pool import run_in_processes, PROCESS_POOL_MAX_WORKERS
+
+# langdetect 的检测结果带有随机性，固定随机种子使同一文本的检测结果可复现
+DETECT_SEED = 42
+
+# 长文本只检测均匀分布在全文中的若干个样本，检测耗时与文本长度无关
+DETECT_SAMPLE_CHARS = 2000
+DETECT_SAMPLE_COUNT = 5
+
+# 批量检测时，不同文本的数量达到该值时默认使用多个进程并行检测
+DETECT_PARALLEL_MIN_TEXTS = 200
+# 并行检测时的进程数上限，各进程来自共享进程池
+DETECT_MAX_WORKERS = PROCESS_POOL_MAX_WORKERS
 
 # 语言代码映射表
 LANGUAGE_CODES = {
@@ -40,22 +60,24 @@ TTS_LOCALES = {
     'it': 'it-IT',     # 意大利语(意大利)
 }
 
-def detect_language(text: str) -> dict:
+def detect_language(text: str, sample_chars: int = DETECT_SAMPLE_CHARS, sample_count: int = DETECT_SAMPLE_COUNT) -> dict:
     """
     检测文本语言
     
+    文本长度超过 sample_chars * sample_count 时，从全文均匀抽取 sample_count 个长度为 sample_chars 的样本分别检测，
+    按样本长度加权合并各语言的概率，取概率最高的语言
+    
     Args:
         text (str): 待检测的文本
+        sample_chars (int, optional): 每个样本的字符数。默认为 DETECT_SAMPLE_CHARS
+        sample_count (int, optional): 样本数量。默认为 DETECT_SAMPLE_COUNT
         
     Returns:
         dict: error错误信息 code语言代码 name语言名称 locale地区代码
     """
     try:
         # 检测最可能的语言
-        detected_lang = detect(text)
-        
-        # 获取所有可能的语言及其概率
-        # lang_probs = detect_langs(text)
+        detected_lang = _detect_lang_code(text, sample_chars, sample_count)
         
         # 判断语言是否为中文
         if detected_lang == 'zh-cn':
@@ -106,4 +128,89 @@ def detect_language(text: str) -> dict:
             'code': None,
             'name': None,
             'locale': None
-        }
\ No newline at end of file
+        }
+
+def detect_languages(texts: Iterable[str], parallel: Optional[bool] = None, max_workers: int = DETECT_MAX_WORKERS,
+                     sample_chars: int = DETECT_SAMPLE_CHARS, sample_count: int = DETECT_SAMPLE_COUNT) -> List[dict]:
+    """
+    批量检测文本语言
+    
+    所有文本共用同一个已加载语言模型的检测器工厂；检测结果是确定的，重复的文本只检测一次。
+    
+    Args:
+        texts (Iterable[str]): 待检测的文本
+        parallel (Optional[bool], optional): 是否使用多个进程并行检测，为 None 时不同文本的数量不少于 DETECT_PARALLEL_MIN_TEXTS 才并行。默认为 None
+        max_workers (int, optional): 并行检测时的进程数上限。默认为 DETECT_MAX_WORKERS
+        sample_chars (int, optional): 每个样本的字符数。默认为 DETECT_SAMPLE_CHARS
+        sample_count (int, optional): 样本数量。默认为 DETECT_SAMPLE_COUNT
+        
+    Returns:
+        List[dict]: 与 texts 一一对应的检测结果，格式同 detect_language
+    """
+    texts = list(texts)
+    unique_texts = list(dict.fromkeys(texts))
+    if parallel is None:
+        parallel = len(unique_texts) >= DETECT_PARALLEL_MIN_TEXTS
+    workers = max(1, min(max_workers, len(unique_texts)))
+
+    results = None
+    if parallel and workers > 1:
+        logger.info(f"使用 {workers} 个进程并行检测 {len(unique_texts)} 条文本的语言类型")
+        try:
+            # 语言模型在每个子进程首次检测时加载，之后的批次直接复用
+            results = run_in_processes(detect_language, unique_texts, repeat(sample_chars), repeat(sample_count),
+                                       chunksize=-(-len(unique_texts) // (workers * 4)))
+        except (OSError, BrokenProcessPool) as e:
+            logger.warning(f"并行检测失败，改为逐条检测: {e}")
+    if results is None:
+        results = [detect_language(text, sample_chars, sample_count) for text in unique_texts]
+
+    result_by_text = dict(zip(unique_texts, results))
+    return [dict(result_by_text[text]) for text in texts]
+
+@lru_cache(maxsize=None)
+def _get_factory() -> DetectorFactory:
+    """加载语言模型并创建检测器工厂，每个进程只加载一次"""
+    factory = DetectorFactory()
+    factory.load_profile(PROFILES_DIRECTORY)
+    factory.set_seed(DETECT_SEED)
+    return factory
+
+def _detect_langs(text: str) -> list:
+    """使用共享的检测器工厂检测文本中各语言的概率"""
+    detector = _get_factory().create()
+    detector.append(text)
+    return detector.get_probabilities()
+
+def _detect_lang_code(text: str, sample_chars: int, sample_count: int) -> str:
+    """检测各个样本中各语言的概率，按样本长度加权合并后返回概率最高的语言代码"""
+    scores = defaultdict(float)
+    for sample in _sample_text(text, sample_chars, sample_count):
+        try:
+            languages = _detect_langs(sample)
+        except LangDetectException:
+            # 个别样本可能只有数字或符号，跳过即可
+            continue
+        for language in languages:
+            scores[language.lang] += language.prob * len(sample)
+    if not scores:
+        raise LangDetectException(ErrorCode.CantDetectError, '所有样本都无法检测出语言类型')
+    return max(scores, key=scores.get)
+
+def _sample_text(text: str, sample_chars: int, sample_count: int) -> list[str]:
+    """
+    从文本中均匀抽取样本，文本不长时直接返回整个文本
+    
+    样本起点移到下一个空白之后，避免从单词中间截断
+    """
+    if sample_count <= 1 or len(text) <= sample_chars * sample_count:
+        return [text]
+    step = (len(text) - sample_chars) / (sample_count - 1)
+    samples = []
+    for i in range(sample_count):
+        start = int(i * step)
+        if start:
+            space = text.find(' ', start, start + sample_chars // 10)
+            start = space + 1 if space != -1 else start
+        samples.append(text[start:start + sample_chars])
+    return samples
@@ -1,54 +1,278 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
+import threading
+from datetime import datetime
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 # 日志目录
 LOG_DIR = "logs"
+# 单个日志文件的大小上限（字节），超过后轮转
+LOG_MAX_BYTES = 10 * 1024 * 1024
+# 保留的历史日志文件数量
+LOG_BACKUP_COUNT = 5
+# 是否通过队列由后台线程写日志，调用方只需把日志记录放入队列
+LOG_USE_QUEUE = True
+# 日志文件是否使用 JSON 格式（每行一条记录）
+LOG_JSON_FORMAT = False
+# 同一记录器、同一级别、同一消息模板的日志在该时间窗口（秒）内最多输出 LOG_RATE_LIMIT_BURST 条，其余的只计数
+LOG_RATE_LIMIT_INTERVAL = 10.0
+LOG_RATE_LIMIT_BURST = 10
+# 限流记录的窗口数上限，超过时清理已过期的窗口，仍超过时丢弃最早开始的窗口
+LOG_RATE_LIMIT_MAX_KEYS = 4096
 
-def setup_logger(name: str = "TingJu", log_level: int = logging.INFO) -> logging.Logger:
+# 各日志记录器对应的后台写日志线程
+_LISTENERS: Dict[str, logging.handlers.QueueListener] = {}
+# 放入队列前格式化异常堆栈使用的格式器
+_TRACEBACK_FORMATTER = logging.Formatter()
+
+class RateLimitFilter(logging.Filter):
+    """
+    日志限流过滤器
+
+    按记录器名称、日志级别和未格式化的消息模板计数，每个时间窗口内同一模板的日志最多放行 burst 条，
+    其余的直接丢弃。模板相同、参数不同的日志（如带有句子内容的 "翻译 %s 时失败"）计入同一窗口。下一个窗口放行的第一条日志会附带上一窗口被忽略的条数。
+    ERROR 及以上级别的日志不限流。
+    """
+
+    def __init__(self, interval: float = LOG_RATE_LIMIT_INTERVAL, burst: int = LOG_RATE_LIMIT_BURST):
+        """
+        Args:
+            interval (float, optional): 时间窗口（秒）。默认为 LOG_RATE_LIMIT_INTERVAL
+            burst (int, optional): 每个窗口内同一模板的日志最多输出的条数。默认为 LOG_RATE_LIMIT_BURST
+        """
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.suppressed = 0
+        # (记录器名称, 日志级别, 消息模板) -> [窗口开始时间, 窗口内的条数, 窗口内被忽略的条数]，按窗口开始时间排列
+        self._windows: Dict[Tuple[str, int, str], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = record.created
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                dropped = window[2] if window is not None else 0
+                # 重新插入到末尾，保持窗口按开始时间排列
+                self._windows.pop(key, None)
+                if len(self._windows) >= LOG_RATE_LIMIT_MAX_KEYS:
+                    self._prune(now)
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < self.burst:
+                window[1] += 1
+                return True
+            else:
+                window[2] += 1
+                self.suppressed += 1
+                return False
+
+        if dropped:
+            record.msg = f"{record.getMessage()}（此前 {self.interval:g} 秒内忽略了 {dropped} 条同类日志）"
+            record.args = None
+        return True
+
+    def _prune(self, now: float):
+        """
+        从最早开始的窗口起清理，避免内容各不相同的日志使窗口数无限增长
+
+        已过期的窗口全部删除；仍超过上限时丢弃最早开始的窗口，只从头部删除，不必遍历所有窗口。
+        """
+        while self._windows:
+            key, window = next(iter(self._windows.items()))
+            if now - window[0] < self.interval and len(self._windows) < LOG_RATE_LIMIT_MAX_KEYS:
+                break
+            del self._windows[key]
+
+class TracebackQueueHandler(logging.handlers.QueueHandler):
+    """
+    放入队列前把异常堆栈格式化为文本的 QueueHandler
+
+    默认的 QueueHandler 会把异常堆栈拼进消息并清空 exc_info 和 exc_text，
+    后台线程中的 JsonFormatter 就无法输出单独的异常字段。
+    这里只合并消息参数，异常堆栈保存在 exc_text 中，由后台线程的格式器输出。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+        # 复制记录，避免影响同一记录器上的其他处理器
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+class _DispatchHandler(logging.Handler):
+    """把子进程发来的日志记录交给主进程中同名的记录器处理"""
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        logging.getLogger(record.name).handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        pass
+
+class JsonFormatter(logging.Formatter):
+    """结构化日志格式器，每条记录输出为一行 JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "file": record.filename,
+            "line": record.lineno,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+def setup_logger(name: str = "TingJu", log_level: int = logging.INFO, log_dir: str = LOG_DIR,
+                 use_queue: bool = LOG_USE_QUEUE, json_format: bool = LOG_JSON_FORMAT,
+                 max_bytes: int = LOG_MAX_BYTES, backup_count: int = LOG_BACKUP_COUNT,
+                 rate_limit: Optional[RateLimitFilter] = None, console: bool = True) -> logging.Logger:
     """
     设置并返回一个日志记录器
-    
+
+    使用队列模式时，记录器上只挂一个 QueueHandler，写文件和控制台由后台线程完成，
+    事件循环线程上的日志调用只需把记录放入队列。
+
     Args:
         name (str, optional): 日志记录器的名称. Defaults to "TingJu".
         log_level (int, optional): 日志记录器的级别. Defaults to logging.INFO.
-    
+        log_dir (str, optional): 日志目录. Defaults to LOG_DIR.
+        use_queue (bool, optional): 是否由后台线程写日志. Defaults to LOG_USE_QUEUE.
+        json_format (bool, optional): 日志文件是否使用 JSON 格式. Defaults to LOG_JSON_FORMAT.
+        max_bytes (int, optional): 单个日志文件的大小上限，为 0 时不轮转. Defaults to LOG_MAX_BYTES.
+        backup_count (int, optional): 保留的历史日志文件数量. Defaults to LOG_BACKUP_COUNT.
+        rate_limit (Optional[RateLimitFilter], optional): 日志限流过滤器. Defaults to 默认参数的 RateLimitFilter.
+        console (bool, optional): 是否同时输出到控制台. Defaults to True.
+
     Returns:
         logging.Logger: 日志记录器实例
     """
     # 创建日志目录
-    log_dir = Path(LOG_DIR)
+    log_dir = Path(log_dir)
     log_dir.mkdir(exist_ok=True)
-    
+
     # 创建日志记录器
     logger = logging.getLogger(name)
     logger.setLevel(log_level)
-    
+
     # 避免重复添加处理器
     if not logger.handlers:
-        # 创建文件处理器
+        # 创建文件处理器，超过大小上限后轮转
         log_file = log_dir / f"{name}.log"
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        )
         file_handler.setLevel(log_level)
-        
+
         # 创建控制台处理器
         console_handler = logging.StreamHandler()
         console_handler.setLevel(log_level)
-        
+
         # 创建格式器并添加到处理器
-        file_formatter = logging.Formatter(
-            '%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s'
-        )
+        if json_format:
+            file_formatter = JsonFormatter()
+        else:
+            file_formatter = logging.Formatter(
+                '%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s'
+            )
         console_formatter = logging.Formatter(
             '%(levelname)s:     %(message)s'
         )
         file_handler.setFormatter(file_formatter)
         console_handler.setFormatter(console_formatter)
-        
-        # 添加处理器到日志记录器
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
-    
+        handlers = [file_handler, console_handler] if console else [file_handler]
+
+        # 限流在放入队列之前进行，被忽略的日志不再格式化和写入
+        logger.addFilter(rate_limit or RateLimitFilter())
+
+        if use_queue:
+            # 记录器只负责把日志放入队列，由后台线程写入文件和控制台
+            log_queue = queue.SimpleQueue()
+            listener = logging.handlers.QueueListener(
+                log_queue, *handlers, respect_handler_level=True
+            )
+            listener.start()
+            _LISTENERS[name] = listener
+            logger.addHandler(TracebackQueueHandler(log_queue))
+        else:
+            # 添加处理器到日志记录器
+            for handler in handlers:
+                logger.addHandler(handler)
+
     return logger
 
+def shutdown_logger(name: str = "TingJu"):
+    """
+    停止后台写日志线程，写完队列中剩余的日志并关闭日志文件
+
+    Args:
+        name (str, optional): 日志记录器的名称. Defaults to "TingJu".
+    """
+    listener = _LISTENERS.pop(name, None)
+    logger = logging.getLogger(name)
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+    for handler in list(logger.handlers):
+        handler.close()
+        logger.removeHandler(handler)
+    for log_filter in list(logger.filters):
+        logger.removeFilter(log_filter)
+
+def start_worker_log_listener(log_queue) -> logging.handlers.QueueListener:
+    """
+    在主进程中启动后台线程，接收子进程通过 log_queue 发来的日志，交给同名的记录器输出
+
+    子进程的日志与主进程共用同一组限流、文件和控制台处理器，多个进程不会同时写同一个日志文件。
+
+    Args:
+        log_queue: 进程间共享的队列，如 multiprocessing 上下文创建的 Queue
+
+    Returns:
+        logging.handlers.QueueListener: 后台线程，不再需要时调用 stop 停止
+    """
+    listener = logging.handlers.QueueListener(log_queue, _DispatchHandler())
+    listener.start()
+    return listener
+
+def setup_worker_logger(log_queue, name: str = "TingJu"):
+    """
+    在子进程中把日志记录器的输出改为发送到主进程，作为进程池的初始化函数使用
+
+    子进程导入本模块时会创建自己的文件处理器和后台线程，这里先将其关闭。
+
+    Args:
+        log_queue: 进程间共享的队列，由主进程的 start_worker_log_listener 接收
+        name (str, optional): 日志记录器的名称. Defaults to "TingJu".
+    """
+    shutdown_logger(name)
+    logging.getLogger(name).addHandler(TracebackQueueHandler(log_queue))
+
+def _shutdown_all():
+    """退出时写完所有队列中剩余的日志"""
+    for name in list(_LISTENERS):
+        shutdown_logger(name)
+
+atexit.register(_shutdown_all)
+
 # 创建全局日志记录器实例
-logger = setup_logger()
\ No newline at end of file
+logger = setup_logger()
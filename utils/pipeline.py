@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+from utils.audio_generator import generate_audio
+from utils.logger import logger
+from utils.text_translator import translate_sentences, format_translations, TranslateFunc, BATCH_MAX_CHARS
+from utils.translation_memory import TranslationMemory, TRANSLATION_MEMORY
+from utils.translator_health import TranslatorHealth, TRANSLATOR_HEALTH
+from utils.tts_scheduler import TTSScheduler
+
+async def translate_and_synthesize(sentences: list, voice_name: str, title: str,
+                                   from_lang: str = 'en', to_lang: str = 'zh',
+                                   batch_chars: int = BATCH_MAX_CHARS,
+                                   hedge_percentile: Optional[float] = None,
+                                   translate_func: Optional[TranslateFunc] = None,
+                                   memory: Optional[TranslationMemory] = TRANSLATION_MEMORY,
+                                   health: Optional[TranslatorHealth] = TRANSLATOR_HEALTH,
+                                   scheduler: Optional[TTSScheduler] = None,
+                                   translate_progress: Optional[Callable[[int, int], None]] = None,
+                                   tts_progress: Optional[Callable[[int, int], None]] = None) -> dict:
+    """
+    同时进行翻译和音频生成
+    
+    两个阶段对每个句子互不依赖：翻译在线程池中执行，音频生成在事件循环中执行，
+    总耗时接近两者中较慢的一个，而不是两者之和。
+    任一阶段出错或整体被取消时，通过共享的取消信号停止另一阶段，不再发起新的请求。
+    
+    Args:
+        sentences (list): 句子列表
+        voice_name (str): 音色名称
+        title (str): 标题，用于生成音频目录名称
+        from_lang (str, optional): 源语言。默认为 'en'
+        to_lang (str, optional): 目标语言。默认为 'zh'
+        batch_chars (int, optional): 批量翻译时每次请求的最大字符数。默认为 BATCH_MAX_CHARS
+        hedge_percentile (Optional[float], optional): 对冲请求的耗时分位数，为 None 时不对冲，启用时可取 HEDGE_PERCENTILE。默认为 None
+        translate_func (Optional[TranslateFunc], optional): 翻译函数，用于替换在线翻译器。默认调用 translators 库
+        memory (Optional[TranslationMemory], optional): 翻译记忆库。默认为全局共享的记忆库
+        health (Optional[TranslatorHealth], optional): 翻译器健康状态。默认为全局共享的健康状态
+        scheduler (Optional[TTSScheduler], optional): TTS 调度器。默认为全局共享的调度器
+        translate_progress (Optional[Callable[[int, int], None]], optional): 翻译进度回调
+        tts_progress (Optional[Callable[[int, int], None]], optional): 音频生成进度回调
+        
+    Returns:
+        dict: translations译文列表 audio_dir音频目录 filenames音频文件名列表 warning警告信息
+    """
+    cancel_event = threading.Event()
+    translate_task = asyncio.ensure_future(asyncio.to_thread(
+        translate_sentences, sentences, from_lang=from_lang, to_lang=to_lang,
+        translate_func=translate_func, batch_chars=batch_chars, memory=memory, health=health,
+        hedge_percentile=hedge_percentile, cancel_event=cancel_event, progress_callback=translate_progress
+    ))
+    tts_task = asyncio.ensure_future(generate_audio(
+        sentences, voice_name, title, scheduler=scheduler, progress_callback=tts_progress
+    ))
+    
+    try:
+        results, (audio_dir, filenames, warning_msg) = await asyncio.gather(translate_task, tts_task)
+    except BaseException as e:
+        # 通知翻译线程不再开始新的句子，并取消尚未完成的音频生成
+        if not isinstance(e, asyncio.CancelledError):
+            logger.error(f"翻译与音频生成过程中出错，停止其余任务: {e}")
+        cancel_event.set()
+        for task in (translate_task, tts_task):
+            task.cancel()
+        await asyncio.gather(translate_task, tts_task, return_exceptions=True)
+        raise
+    
+    return {
+        "translations": format_translations(results),
+        "audio_dir": Path(audio_dir),
+        "filenames": filenames,
+        "warning": warning_msg,
+    }
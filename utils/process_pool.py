@@ -0,0 +1,96 @@
+import logging.handlers
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, List, Optional
+
+from utils.logger import logger, setup_worker_logger, start_worker_log_listener
+
+# 共享进程池的进程数上限
+PROCESS_POOL_MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+# 多线程的服务进程中 fork 会把其他线程持有的锁一并复制到子进程，可能导致子进程死锁，
+# 因此固定使用 spawn 方式启动子进程
+PROCESS_START_METHOD = "spawn"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+# 接收子进程日志的后台线程，与进程池一同创建
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    获取共享的进程池，首次使用时创建
+
+    文件提取、分句和语言检测等 CPU 密集的任务共用同一个进程池，
+    子进程只在首次使用时启动一次，之后的请求不再承担启动开销。
+    子进程的日志通过队列发回主进程，由主进程的日志处理器统一输出。
+
+    Returns:
+        ProcessPoolExecutor: 共享的进程池
+    """
+    global _pool, _log_listener
+    with _pool_lock:
+        if _pool is None:
+            context = multiprocessing.get_context(PROCESS_START_METHOD)
+            log_queue = context.Queue()
+            _log_listener = start_worker_log_listener(log_queue)
+            _pool = ProcessPoolExecutor(max_workers=PROCESS_POOL_MAX_WORKERS, mp_context=context,
+                                        initializer=setup_worker_logger, initargs=(log_queue,))
+            logger.info(f"已创建共享进程池，进程数上限 {PROCESS_POOL_MAX_WORKERS}")
+        return _pool
+
+def run_in_processes(func: Callable, *iterables: Iterable, chunksize: int = 1) -> List:
+    """
+    在共享进程池中对各组参数执行 func，按参数顺序返回结果
+
+    进程池损坏时将其丢弃，下次使用时重新创建
+
+    Args:
+        func (Callable): 可在子进程中导入的模块级函数
+        *iterables (Iterable): 参数序列，同 map
+        chunksize (int, optional): 每次发送给子进程的参数组数。默认为 1
+
+    Returns:
+        List: 各组参数的执行结果
+
+    Raises:
+        OSError: 无法启动子进程
+        BrokenProcessPool: 子进程异常退出
+    """
+    pool = get_process_pool()
+    try:
+        return list(pool.map(func, *iterables, chunksize=chunksize))
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+
+def shutdown_process_pool(wait: bool = True):
+    """
+    关闭共享进程池，服务退出时调用
+
+    Args:
+        wait (bool, optional): 是否等待子进程中的任务完成。默认为 True
+    """
+    global _pool, _log_listener
+    with _pool_lock:
+        pool, _pool = _pool, None
+        listener, _log_listener = _log_listener, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+    if listener is not None:
+        listener.stop()
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """丢弃已损坏的进程池及其日志线程"""
+    global _pool, _log_listener
+    listener = None
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+            listener, _log_listener = _log_listener, None
+    pool.shutdown(wait=False, cancel_futures=True)
+    if listener is not None:
+        listener.stop()
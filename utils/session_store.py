@@ -0,0 +1,152 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from utils.logger import logger
+
+# 保存会话 ID 的 Cookie 名称
+SESSION_COOKIE_NAME = "tingju_session"
+# 会话有效期（秒），超过该时长未更新的会话被清理
+SESSION_TTL_SECONDS = 6 * 3600
+# 内存中保存的会话数量上限
+SESSION_MAX_ENTRIES = 1000
+# 会话数据库路径，为 None 时只保存在内存中；设置后多个工作进程可共享会话状态，
+# 但后台任务（/jobs/*）仍只保存在创建它的进程中，使用后台任务模式时只能部署单个工作进程
+SESSION_DB_PATH: Optional[str] = None
+
+class SessionStore:
+    """
+    会话状态存储
+
+    以会话 ID 为键保存每个用户的状态（如上传的临时文件、最近一次生成的标题），
+    避免多个用户共用全局变量互相覆盖。默认保存在有数量上限和有效期的内存字典中，
+    指定数据库路径时改为保存在 SQLite 中，供多个工作进程共享。
+    共享的只有会话状态，后台任务仍由各进程的 JobManager 分别管理。
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL_SECONDS, max_entries: int = SESSION_MAX_ENTRIES,
+                 db_path: Optional[str] = SESSION_DB_PATH):
+        """
+        Args:
+            ttl (float, optional): 会话有效期（秒）。默认为 SESSION_TTL_SECONDS
+            max_entries (int, optional): 内存中保存的会话数量上限。默认为 SESSION_MAX_ENTRIES
+            db_path (Optional[str], optional): SQLite 数据库路径，为 None 时只保存在内存中。默认为 SESSION_DB_PATH
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def new_id() -> str:
+        """生成新的会话 ID"""
+        return uuid.uuid4().hex
+
+    def get(self, session_id: str) -> dict:
+        """
+        获取会话状态，会话不存在或已过期时返回空字典
+
+        Args:
+            session_id (str): 会话 ID
+
+        Returns:
+            dict: 会话状态的副本
+        """
+        with self._lock:
+            return self._load(session_id, time.time())
+
+    def update(self, session_id: str, **fields):
+        """
+        更新会话状态中的字段
+
+        Args:
+            session_id (str): 会话 ID
+            **fields: 需要更新的字段
+        """
+        now = time.time()
+        with self._lock:
+            data = self._load(session_id, now)
+            data.update(fields)
+            self._store(session_id, data, now)
+
+    def reset(self, session_id: str):
+        """清空会话状态"""
+        with self._lock:
+            self._store(session_id, {}, time.time())
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self.db_path is not None:
+                return self._connect().execute(
+                    "SELECT COUNT(*) FROM sessions WHERE updated_at >= ?", (time.time() - self.ttl,)
+                ).fetchone()[0]
+            return len(self._sessions)
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _load(self, session_id: str, now: float) -> dict:
+        if self.db_path is not None:
+            row = self._connect().execute(
+                "SELECT data FROM sessions WHERE id = ? AND updated_at >= ?", (session_id, now - self.ttl)
+            ).fetchone()
+            return json.loads(row[0]) if row else {}
+
+        item = self._sessions.get(session_id)
+        if item is None or now - item[1] > self.ttl:
+            self._sessions.pop(session_id, None)
+            return {}
+        self._sessions.move_to_end(session_id)
+        return dict(item[0])
+
+    def _store(self, session_id: str, data: dict, now: float):
+        if self.db_path is not None:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, updated_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(data, ensure_ascii=False), now),
+            )
+            conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl,))
+            conn.commit()
+            return
+
+        self._sessions[session_id] = (data, now)
+        self._sessions.move_to_end(session_id)
+        self._evict(now)
+
+    def _evict(self, now: float):
+        """删除过期会话，数量超限时从最久未访问的会话开始删除"""
+        expired = [session_id for session_id, (_, updated_at) in self._sessions.items() if now - updated_at > self.ttl]
+        for session_id in expired:
+            del self._sessions[session_id]
+        evicted = 0
+        while len(self._sessions) > self.max_entries:
+            self._sessions.popitem(last=False)
+            evicted += 1
+        if evicted:
+            logger.info(f"会话数量超出上限，清理 {evicted} 个最久未访问的会话")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+# 全局共享的会话存储
+SESSION_STORE = SessionStore()
@@ -1,10 +1,18 @@
+import hashlib
 import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
 from functools import lru_cache
+from itertools import repeat
 from pathlib import Path
+from typing import Iterable, Iterator, Optional
 
 import nltk
 
 from utils.logger import logger
+from utils.process_pool import run_in_processes, PROCESS_POOL_MAX_WORKERS
 
 try:
     import pysbd
@@ -29,7 +37,57 @@ PROTECTED_PATTERNS = (
     r'\b[A-Za-z]*\d+(?:\.\d+){1,}\b',
 )
 
+# 被保护片段的占位符，使用私有区字符作为边界，不会与普通文本混淆
+PLACEHOLDER_START = '\ue000'
+PLACEHOLDER_END = '\ue001'
+PLACEHOLDER_PATTERN = re.compile(f'{PLACEHOLDER_START}(\\d+){PLACEHOLDER_END}')
+# 一次扫描匹配所有需要保护的片段，与 PROTECTED_PATTERNS 依次对应：
+# 邮箱只从本地部分的开头尝试匹配，缩写和版本号共用同一个单词边界，减少逐字符的无效尝试；
+# 邮箱的本地部分不包含 www. 主机名（如 xwww.a@b.com），域名不延伸到紧接着的 URL 开头（如 a@b.comhttp://x），保持 URL 优先于其他片段；
+# 原文中本就存在的占位符边界字符也作为片段保护起来，还原时原样恢复
+PROTECTED_PATTERN = re.compile(
+    r'https?://[^\s<>"\']+|www\.[^\s<>"\']+'
+    r'|(?<![A-Za-z0-9._%+-])(?:(?!www\.)[A-Za-z0-9._%+-])+@(?:(?!https?://|www\.)[A-Za-z0-9.-])+\.(?:(?!https?://|www\.)[A-Za-z]){2,}'
+    r'|\b(?:(?:[A-Za-z]\.){2,}|[A-Za-z]*\d+(?:\.\d+){1,}\b)'
+    f'|[{PLACEHOLDER_START}{PLACEHOLDER_END}]'
+)
+
+# 快速分句使用的正则：到句末标点（及其后的右引号、右括号）且后接空白或文本结尾为止
+FAST_SPLIT_PATTERN = re.compile(r'.+?(?:[.!?]["”’）\]\}]*)(?=\s+|$)|.+$')
+# 文本长度达到该值时切分为多块，由多个进程并行分句；只有一个进程可用时改用基于正则的快速分句
 FAST_SPLIT_TEXT_THRESHOLD = 50000
+# 并行分句时每块文本的目标长度；PySBD 的耗时随文本长度超线性增长，块太大反而更慢
+SPLIT_CHUNK_CHARS = 2000
+# 并行分句时同时处理的块数上限，各块由共享进程池执行
+SPLIT_MAX_WORKERS = PROCESS_POOL_MAX_WORKERS
+# 可以安全切分的句子边界：至少三个小写字母或数字组成的单词后接句末标点，下一句以大写字母开头，
+# 排除 Mr.、U.S.A.、e.g. 等缩写，确保分句器在此处也一定会断句
+SAFE_SPLIT_BOUNDARY_PATTERN = re.compile(r'[a-z0-9]{3}[.!?]["”’)\]\}]* (?=["“‘(\[]?[A-ZА-ЯЁ])')
+# 在目标长度之后的该范围内找不到安全边界时，依次退而在任意句末标点、空格处切分，避免单块过大
+SPLIT_BOUNDARY_WINDOW = 4 * SPLIT_CHUNK_CHARS
+FALLBACK_SPLIT_BOUNDARY_PATTERNS = (re.compile(r'[.!?]["”’)\]\}]* '), re.compile(' '))
+
+# 分句结果缓存中所有句子的总字符数上限
+SENTENCE_CACHE_MAX_CHARS = 10_000_000
+
+# 流式分句时未结束句子的最大长度，超过后即使没有句末标点也直接输出，避免缓冲无限增长
+STREAM_MAX_PENDING_CHARS = 10000
+
+# normalize_text 使用的预编译正则
+# 连续空白合并为一个空格，单个普通空格本身无需替换，因此不匹配
+WHITESPACE_PATTERN = re.compile(r'[^\S ]\s*| \s+')
+# 逗号、分号、冒号后补充空格，逗号和冒号前是否为数字在替换函数中判断
+SEPARATOR_SPACE_PATTERN = re.compile(r'[,;:](?=\S)')
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'([.!?]["”’）\]\}]*)(?=(?:["“‘(\[]?[A-ZА-ЯЁ0-9]))')
+SPACE_BEFORE_QUOTE_PATTERN = re.compile(r'([.!?])\s+(["”’])')
+SPACE_AFTER_OPENER_PATTERN = re.compile(r'([(\[])(\s+)')
+# 去除标点和右括号、右引号之前的空白
+SPACE_BEFORE_CLOSER_PATTERN = re.compile(r'\s+([,.;:!?”’)\]\}])')
+JA_PUNCTUATION_SPACE_PATTERN = re.compile(r'([。！？、，；：…」』）])\s+')
+# 分句前在句末标点与下一句开头之间补充空格
+SPLITTER_BOUNDARY_PATTERN = re.compile(r'([.!?]["\'”’)\]\}]*)(?=(?:["“‘(\[]?[A-ZА-ЯЁ0-9]))')
+# canonicalize_text 使用的正则，任意连续空白合并为一个空格
+CANONICAL_WHITESPACE_PATTERN = re.compile(r'\s+')
 
 LEADING_CLOSER_PATTERN = re.compile(r'^([\'"”’」』）】\]\}]+[.,!?;:…]*)\s*(.*)$')
 PUNCTUATION_FRAGMENT_PATTERN = re.compile(r'^[\'"“”‘’「」『』()\[\]{}<>.,!?;:…]+$')
@@ -79,6 +137,92 @@ to_japanese_punctuation = {
     '’': "」",
 }
 
+class SentenceCache:
+    """
+    分句结果的内存 LRU 缓存
+
+    分句结果只取决于原文和语言，因此以 (原文哈希, 语言) 为键缓存，
+    同一段文本重复生成时（如只更换音色）可以跳过分句。
+    按所有句子的总字符数而不是条目数限制大小，超出上限时从最久未访问的条目开始淘汰。
+    """
+
+    def __init__(self, max_chars: int = SENTENCE_CACHE_MAX_CHARS):
+        """
+        Args:
+            max_chars (int, optional): 缓存中所有句子的总字符数上限。默认为 SENTENCE_CACHE_MAX_CHARS
+        """
+        self.max_chars = max_chars
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, tuple[str, ...]]" = OrderedDict()
+        self._total_chars = 0
+
+    @staticmethod
+    def make_key(paragraph: str, lang: str) -> tuple:
+        """根据原文哈希和语言生成缓存键"""
+        return hashlib.sha256(paragraph.encode('utf-8', 'surrogatepass')).hexdigest(), lang
+
+    def get(self, key: tuple) -> Optional[list[str]]:
+        """
+        查询缓存，命中时刷新访问顺序
+
+        Returns:
+            Optional[list[str]]: 命中时返回句子列表的副本，否则返回 None
+        """
+        with self._lock:
+            sentences = self._entries.get(key)
+            if sentences is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(sentences)
+
+    def put(self, key: tuple, sentences: list[str]):
+        """写入分句结果，总字符数超出上限时淘汰最久未访问的条目；单条结果超出上限时不缓存"""
+        size = sum(len(sentence) for sentence in sentences)
+        if size > self.max_chars:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_chars -= sum(len(sentence) for sentence in old)
+            self._entries[key] = tuple(sentences)
+            self._total_chars += size
+            while self._total_chars > self.max_chars:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_chars -= sum(len(sentence) for sentence in evicted)
+                self.evictions += 1
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._total_chars = 0
+
+    def stats(self) -> dict:
+        """
+        获取缓存统计信息
+
+        Returns:
+            dict: hits命中数 misses未命中数 hit_rate命中率 entries条目数 chars句子总字符数 evictions淘汰数
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "chars": self._total_chars,
+                "evictions": self.evictions,
+            }
+
+# 全局共享的分句结果缓存
+SENTENCE_CACHE = SentenceCache()
+
 def init_nltk():
     """
     初始化 nltk 库, 下载 punkt 词典
@@ -115,12 +259,70 @@ def get_sentences(paragraph: str, lang: str = "english") -> list[str]:
     """
     将段落分成句子
     
+    相同原文和语言的分句结果会被缓存，重复调用时直接返回
+    
     Args:
         paragraph (str): 待处理的段落
         
     Returns:
         list[str]: 分割后的句子列表
     """
+    key = SentenceCache.make_key(paragraph, lang)
+    sentences = SENTENCE_CACHE.get(key)
+    if sentences is not None:
+        logger.info(f"命中分句缓存，共 {len(sentences)} 个句子")
+        return sentences
+
+    sentences = [sentence for sentence in _split_paragraph(paragraph, lang) if len(sentence) > 2]
+    SENTENCE_CACHE.put(key, sentences)
+    logger.info(f"段落分割完成，共 {len(sentences)} 个句子")
+    return sentences
+
+
+def iter_sentences(chunks: Iterable[str], lang: str = "english") -> Iterator[str]:
+    """
+    对逐块到达的文本（如逐页读取的文档）进行流式分句
+    
+    每块文本单独规范化和分句，最后一个句子可能在下一块中才结束，
+    因此暂不输出，与下一块拼接后重新分句。内存占用只与单块文本大小有关，
+    第一块分句完成后即可得到前面的句子。
+    
+    Args:
+        chunks (Iterable[str]): 按顺序排列的文本块
+        lang (str, optional): 语言。默认为 'english'
+        
+    Yields:
+        str: 分割后的句子
+    """
+    pending = ""
+    pending_space = False
+    count = 0
+    for chunk in chunks:
+        if not chunk.strip():
+            pending_space = pending_space or bool(chunk)
+            continue
+        text = pending + (" " if pending and (pending_space or chunk[0].isspace()) else "") + chunk
+        pending_space = chunk[-1].isspace()
+        sentences = _split_paragraph(text, lang)
+        if not sentences:
+            pending = ""
+            continue
+        *finished, pending = sentences
+        if len(pending) > STREAM_MAX_PENDING_CHARS:
+            finished.append(pending)
+            pending = ""
+        for sentence in finished:
+            if len(sentence) > 2:
+                count += 1
+                yield sentence
+    if len(pending) > 2:
+        count += 1
+        yield pending
+    logger.info(f"流式分句完成，共 {count} 个句子")
+
+
+def _split_paragraph(paragraph: str, lang: str) -> list[str]:
+    """规范化文本后分句，并修正分句器产生的碎片。"""
     normalized_text = normalize_text(text=paragraph, lang=lang)
     splitter_input = _prepare_splitter_text(text=normalized_text, lang=lang)
 
@@ -129,17 +331,36 @@ def get_sentences(paragraph: str, lang: str = "english") -> list[str]:
     else:
         sentences = _split_sentences(text=splitter_input, lang=lang)
 
-    sentences = _postprocess_sentences(sentences=sentences, lang=lang)
-    sentences = [sentence for sentence in sentences if len(sentence) > 2]
-    logger.info(f"段落分割完成，共 {len(sentences)} 个句子")
-    return sentences
+    return _postprocess_sentences(sentences=sentences, lang=lang)
 
 
 def _split_sentences(text: str, lang: str) -> list[str]:
-    """根据语言选择合适的分句器。"""
+    """
+    根据语言选择合适的分句器
+    
+    长文本在有多个进程可用时切块并行分句；只有一个进程时逐块分句的耗时约为快速分句的数倍，
+    因此仍使用快速分句
+    """
     if len(text) >= FAST_SPLIT_TEXT_THRESHOLD:
+        if SPLIT_MAX_WORKERS > 1:
+            return _split_sentences_parallel(text, lang)
         return _fast_split_sentences(text)
+    return _segment_text(text, lang)
+
+
+def _fast_split_sentences(text: str) -> list[str]:
+    """大文本场景下的快速回退分句，优先保证性能。"""
+    protected_text, protected_tokens = _protect_text_fragments(text)
+    matches = FAST_SPLIT_PATTERN.findall(protected_text)
+    return [
+        _restore_text_fragments(match.strip(), protected_tokens)
+        for match in matches
+        if match.strip()
+    ]
+
 
+def _segment_text(text: str, lang: str) -> list[str]:
+    """使用缓存的 PySBD 分句器分句，不支持的语言或出错时回退到 NLTK。"""
     segmenter = _get_pysbd_segmenter(lang)
     if segmenter is not None:
         try:
@@ -151,15 +372,51 @@ def _split_sentences(text: str, lang: str) -> list[str]:
     return nltk.sent_tokenize(text=text, language=lang)
 
 
-def _fast_split_sentences(text: str) -> list[str]:
-    """大文本场景下的快速回退分句，优先保证性能。"""
-    protected_text, protected_tokens = _protect_text_fragments(text)
-    matches = re.findall(r'.+?(?:[.!?]["”’）\]\}]*)(?=\s+|$)|.+$', protected_text)
-    return [
-        _restore_text_fragments(match.strip(), protected_tokens)
-        for match in matches
-        if match.strip()
-    ]
+def _split_sentences_parallel(text: str, lang: str, max_workers: int = SPLIT_MAX_WORKERS) -> list[str]:
+    """
+    在安全的句子边界处把长文本切成多块，并行分句后按顺序拼接
+    
+    进程池不可用时退化为在当前进程中逐块分句
+    """
+    chunks = _split_text_chunks(text, SPLIT_CHUNK_CHARS)
+    workers = min(max_workers, len(chunks))
+    if workers > 1:
+        logger.info(f"文本共 {len(text)} 个字符，切分为 {len(chunks)} 块，使用 {workers} 个进程并行分句")
+        try:
+            results = run_in_processes(_segment_text, chunks, repeat(lang, len(chunks)),
+                                       chunksize=-(-len(chunks) // workers))
+            return [sentence for sentences in results for sentence in sentences]
+        except (OSError, BrokenProcessPool) as e:
+            logger.warning(f"并行分句失败，改为逐块分句: {e}")
+    return [sentence for chunk in chunks for sentence in _segment_text(chunk, lang)]
+
+
+def _split_text_chunks(text: str, chunk_chars: int) -> list[str]:
+    """
+    将文本切分为长度约为 chunk_chars 的多块
+    
+    优先在 SAFE_SPLIT_BOUNDARY_PATTERN 处切分；目标长度之后 SPLIT_BOUNDARY_WINDOW 个字符内没有安全边界时，
+    依次退而在句末标点或空格处切分，都没有时剩余文本整体作为一块
+    """
+    chunks = []
+    start = 0
+    while len(text) - start > chunk_chars:
+        pos = start + chunk_chars
+        endpos = pos + SPLIT_BOUNDARY_WINDOW
+        # 剩余文本不超过查找范围时不再退而求其次，整体作为最后一块
+        patterns = (SAFE_SPLIT_BOUNDARY_PATTERN,)
+        if endpos < len(text):
+            patterns += FALLBACK_SPLIT_BOUNDARY_PATTERNS
+        for pattern in patterns:
+            match = pattern.search(text, pos, endpos)
+            if match is not None:
+                break
+        else:
+            break
+        chunks.append(text[start:match.end()])
+        start = match.end()
+    chunks.append(text[start:])
+    return chunks
 
 
 @lru_cache(maxsize=None)
@@ -202,8 +459,8 @@ def _prepare_splitter_text(text: str, lang: str) -> str:
         return text.strip()
 
     text, protected_tokens = _protect_text_fragments(text)
-    text = re.sub(r'([.!?]["\'”’)\]\}]*)(?=(?:["“‘(\[]?[A-ZА-ЯЁ0-9]))', r'\1 ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = SPLITTER_BOUNDARY_PATTERN.sub(r'\1 ', text)
+    text = WHITESPACE_PATTERN.sub(' ', text).strip()
     return _restore_text_fragments(text, protected_tokens)
 
 
@@ -263,19 +520,31 @@ def _protect_text_fragments(text: str) -> tuple[str, list[str]]:
 
     def replace_match(match: re.Match) -> str:
         protected_tokens.append(match.group(0))
-        return f"__PROTECTED_TOKEN_{len(protected_tokens) - 1}__"
-
-    for pattern in PROTECTED_PATTERNS:
-        text = re.sub(pattern, replace_match, text)
+        return f"{PLACEHOLDER_START}{len(protected_tokens) - 1}{PLACEHOLDER_END}"
 
-    return text, protected_tokens
+    return PROTECTED_PATTERN.sub(replace_match, text), protected_tokens
 
 
 def _restore_text_fragments(text: str, protected_tokens: list[str]) -> str:
     """还原被占位符替换的特殊片段。"""
-    for index, token in enumerate(protected_tokens):
-        text = text.replace(f"__PROTECTED_TOKEN_{index}__", token)
-    return text
+    if not protected_tokens:
+        return text
+    return PLACEHOLDER_PATTERN.sub(lambda match: protected_tokens[int(match.group(1))], text)
+
+def canonicalize_text(text: str) -> str:
+    """
+    统一文本的 Unicode 形式并合并空白，用于生成缓存键
+    
+    仅排版不同的文本（如全角组合字符、换行与多个空格）得到相同的结果，
+    音频缓存键和翻译记忆库的原文哈希都基于该结果计算，两者命中规则保持一致。
+    
+    Args:
+        text (str): 原文
+        
+    Returns:
+        str: 规范化后的文本
+    """
+    return CANONICAL_WHITESPACE_PATTERN.sub(' ', unicodedata.normalize('NFC', text)).strip()
 
 def normalize_text(text: str, lang: str = 'english') -> str:
     """
@@ -289,28 +558,34 @@ def normalize_text(text: str, lang: str = 'english') -> str:
     """
     if lang == 'japanese':
         # 符号替换为日文符号
+        # str.replace 在文本中不含该符号时不会复制文本，逐项替换比合并为一个正则再查表替换更快
         for punct, japanese_punct in to_japanese_punctuation.items():
             text = text.replace(punct, japanese_punct)
-        
-        jp_punctuation = r'[。！？、，；：…」』）]'
-        text = re.sub(f'({jp_punctuation})\\s+', r'\1', text)
-    else:
-        # 中文符号替换为英文符号
-        for chinese_punct, english_punct in chinese_to_english_punctuation.items():
-            text = text.replace(chinese_punct, english_punct)
-
-        text, protected_tokens = _protect_text_fragments(text)
-        text = re.sub(r'(?<=\D),(?=\S)', r', ', text)
-        text = re.sub(r';(?=\S)', r'; ', text)
-        text = re.sub(r'(?<!\d):(?=\S)', r': ', text)
-        text = re.sub(r'([.!?]["”’）\]\}]*)(?=(?:["“‘(\[]?[A-ZА-ЯЁ0-9]))', r'\1 ', text)
-        text = re.sub(r'([.!?])\s+(["”’])', r'\1\2', text)
-        text = re.sub(r'\s+([,.;:!?])', r'\1', text)
-        text = re.sub(r'([(\[])(\s+)', r'\1', text)
-        text = re.sub(r'\s+([”’)\]\}])', r'\1', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        text = _restore_text_fragments(text, protected_tokens)
-
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    return text
\ No newline at end of file
+        text = JA_PUNCTUATION_SPACE_PATTERN.sub(r'\1', text)
+        return WHITESPACE_PATTERN.sub(' ', text).strip()
+
+    # 中文符号替换为英文符号
+    for chinese_punct, english_punct in chinese_to_english_punctuation.items():
+        text = text.replace(chinese_punct, english_punct)
+
+    text, protected_tokens = _protect_text_fragments(text)
+    text = SEPARATOR_SPACE_PATTERN.sub(_separator_space, text)
+    text = SENTENCE_BOUNDARY_PATTERN.sub(r'\1 ', text)
+    text = SPACE_BEFORE_QUOTE_PATTERN.sub(r'\1\2', text)
+    text = SPACE_AFTER_OPENER_PATTERN.sub(r'\1', text)
+    text = SPACE_BEFORE_CLOSER_PATTERN.sub(r'\1', text)
+    text = WHITESPACE_PATTERN.sub(' ', text).strip()
+    # 被保护的片段中不含空白，还原后无需再次合并空白
+    return _restore_text_fragments(text, protected_tokens)
+
+
+def _separator_space(match: re.Match) -> str:
+    """逗号前不是数字（且不在开头）、冒号前不是数字时才补充空格，分号后总是补充空格"""
+    punct = match.group(0)
+    if punct == ';':
+        return '; '
+    start = match.start()
+    previous = match.string[start - 1] if start else ''
+    if punct == ',' and not previous:
+        return punct
+    return punct if previous.isdecimal() else punct + ' '
@@ -1,6 +1,13 @@
-from typing import List
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
 import translators as ts
 from utils.logger import logger
+from utils.translation_memory import TranslationMemory, TRANSLATION_MEMORY
+from utils.translator_health import TranslatorHealth, TRANSLATOR_HEALTH
 
 # 翻译器列表
 TRANSLATORS = ['bing', 'sogou', 'youdao', 'alibaba', 'hujiang', 'iflyrec', 'caiyun', 'itranslate', 'lingvanex', 'translateCom', 'yandex']
@@ -10,10 +17,126 @@ TRANSLATORS = ['bing', 'sogou', 'youdao', 'alibaba', 'hujiang', 'iflyrec', 'caiy
 # 默认超时时间
 DEFAULT_TIMEOUT = 5.0
 
-def init_translators():
-    ts.preaccelerate_and_speedtest(timeout=DEFAULT_TIMEOUT)
+# 并发翻译的线程数上限
+TRANSLATE_MAX_WORKERS = 16
+# 单个翻译器同时处理的请求数上限
+PROVIDER_MAX_CONCURRENCY = 4
 
-def get_text_translated(text_list: List[str], from_lang: str = 'en', to_lang: str = 'zh') -> List[str]:
+# 批量翻译时每次请求的最大字符数
+BATCH_MAX_CHARS = 1500
+# 批量翻译时句子编号的标记，翻译器可能把方括号替换为全角或中文括号
+BATCH_MARKER = "[{index}] "
+BATCH_MARKER_PATTERN = re.compile(r'[\[［【]\s*(\d+)\s*[\]］】]\s*')
+
+# 启用对冲时建议的分位数：主翻译器超过该分位数耗时仍未返回时，向下一个翻译器发出对冲请求。
+# 对冲会增加翻译器的请求量，默认不启用，由调用方显式传入 hedge_percentile
+HEDGE_PERCENTILE = 95.0
+# 尚无耗时数据时的对冲等待时长，以及对冲等待时长的下限（秒）
+HEDGE_DEFAULT_DELAY = 1.0
+HEDGE_MIN_DELAY = 0.05
+# 执行对冲请求的线程数上限
+HEDGE_MAX_WORKERS = 32
+
+# 探测翻译器时使用的示例文本
+PROBE_TEXT = "Habits shape our thoughts, guide our actions, and ultimately determine the kind of life we live."
+
+# 翻译状态
+STATUS_SUCCESS = "success"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+# 翻译函数签名: (text, from_lang, to_lang, translator) -> translated
+TranslateFunc = Callable[[str, str, str, str], str]
+
+# 各翻译器的并发信号量，所有请求共享
+_provider_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_provider_semaphores_lock = threading.Lock()
+
+# 对冲请求使用的线程池，首次使用时创建
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor_lock = threading.Lock()
+
+class HedgeStats:
+    """对冲请求的统计：对冲模式下的翻译次数、对冲触发次数和对冲胜出次数"""
+
+    def __init__(self):
+        self.requests = 0
+        self.fired = 0
+        self.won = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_fired(self):
+        with self._lock:
+            self.fired += 1
+
+    def record_won(self):
+        with self._lock:
+            self.won += 1
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: requests翻译次数 fired对冲触发次数 won对冲胜出次数 fire_rate触发率 win_rate胜出率
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "fired": self.fired,
+                "won": self.won,
+                "fire_rate": self.fired / self.requests if self.requests else 0.0,
+                "win_rate": self.won / self.fired if self.fired else 0.0,
+            }
+
+HEDGE_STATS = HedgeStats()
+
+class _HedgeAttempt:
+    """对冲模式下发出的一次翻译请求，记录请求实际开始（取得翻译器并发名额）的时间"""
+
+    def __init__(self, translator: str, is_hedge: bool):
+        self.translator = translator
+        self.is_hedge = is_hedge
+        self.started = threading.Event()
+        self.started_at = 0.0
+
+    def mark_started(self):
+        self.started_at = time.monotonic()
+        self.started.set()
+
+def init_translators(health: Optional[TranslatorHealth] = None, translate_func: Optional[TranslateFunc] = None):
+    """
+    并发探测所有翻译器，将耗时和可用性记录到健康状态中，用于后续排序和熔断
+    
+    Args:
+        health (Optional[TranslatorHealth], optional): 翻译器健康状态。默认为全局共享的 TRANSLATOR_HEALTH
+        translate_func (Optional[TranslateFunc], optional): 翻译函数。默认调用 translators 库
+    """
+    logger.info(f"正在探测 {len(TRANSLATORS)} 个翻译器...")
+    health = health or TRANSLATOR_HEALTH
+    translate_func = translate_func or _call_translator
+
+    def probe(translator: str) -> bool:
+        start_time = time.monotonic()
+        try:
+            translate_func(PROBE_TEXT, 'en', 'zh', translator)
+        except Exception as e:
+            logger.warning(f"翻译器 {translator} 探测失败，原因: {e}")
+            health.record_failure(translator)
+            return False
+        health.record_success(translator, time.monotonic() - start_time)
+        return True
+
+    with ThreadPoolExecutor(max_workers=len(TRANSLATORS)) as executor:
+        success_count = sum(executor.map(probe, TRANSLATORS))
+    health.save()
+    logger.info(f"翻译器探测完成，{success_count}/{len(TRANSLATORS)} 个可用，尝试顺序: {', '.join(health.order(TRANSLATORS))}")
+
+def get_text_translated(text_list: List[str], from_lang: str = 'en', to_lang: str = 'zh', batch_chars: int = 0,
+                        hedge_percentile: Optional[float] = None,
+                        progress_callback: Optional[Callable[[int, int], None]] = None) -> List[str]:
     """
     获取文本的翻译, 失败时尝试其他翻译器
     
@@ -21,36 +144,347 @@ def get_text_translated(text_list: List[str], from_lang: str = 'en', to_lang: st
         text_list (List[str]): 需要翻译的文本列表
         from_lang (str, optional): 源语言。默认为 'en'。
         to_lang (str, optional): 目标语言。默认为 'zh'。
+        batch_chars (int, optional): 批量翻译时每次请求的最大字符数，为 0 时逐句翻译。默认为 0
+        hedge_percentile (Optional[float], optional): 对冲请求的耗时分位数，为 None 时不对冲。默认为 None
+        progress_callback (Optional[Callable[[int, int], None]], optional): 进度回调，参数为已完成数和总数
 
     Returns:
         List[str]: 翻译后的文本列表
     """
+    results = translate_sentences(text_list, from_lang=from_lang, to_lang=to_lang, batch_chars=batch_chars,
+                                  memory=TRANSLATION_MEMORY, health=TRANSLATOR_HEALTH,
+                                  hedge_percentile=hedge_percentile, progress_callback=progress_callback)
+    return format_translations(results)
+
+def format_translations(results: List[dict]) -> List[str]:
+    """
+    将翻译结果转换为展示用的译文列表，失败的句子在原文后标注翻译失败
+    
+    Args:
+        results (List[dict]): translate_sentences 返回的翻译结果
+
+    Returns:
+        List[str]: 译文列表
+    """
+    return [
+        result["translation"] if result["status"] == STATUS_SUCCESS else result["text"] + " 翻译失败"
+        for result in results
+    ]
+
+def translate_sentences(text_list: List[str], from_lang: str = 'en', to_lang: str = 'zh',
+                        translate_func: Optional[TranslateFunc] = None,
+                        max_workers: int = TRANSLATE_MAX_WORKERS,
+                        batch_chars: int = 0,
+                        memory: Optional[TranslationMemory] = None,
+                        health: Optional[TranslatorHealth] = None,
+                        hedge_percentile: Optional[float] = None,
+                        cancel_event: Optional[threading.Event] = None,
+                        progress_callback: Optional[Callable[[int, int], None]] = None) -> List[dict]:
+    """
+    并发翻译文本列表，结果按输入顺序返回
+    
+    Args:
+        text_list (List[str]): 需要翻译的文本列表
+        from_lang (str, optional): 源语言。默认为 'en'。
+        to_lang (str, optional): 目标语言。默认为 'zh'。
+        translate_func (Optional[TranslateFunc], optional): 翻译函数，用于替换在线翻译器。默认调用 translators 库
+        max_workers (int, optional): 并发线程数上限。默认为 TRANSLATE_MAX_WORKERS
+        batch_chars (int, optional): 批量翻译时每次请求的最大字符数，为 0 时逐句翻译。默认为 0
+        memory (Optional[TranslationMemory], optional): 翻译记忆库，命中的句子不再请求翻译器。默认不使用
+        health (Optional[TranslatorHealth], optional): 翻译器健康状态，用于调整尝试顺序和跳过熔断的翻译器。默认按固定顺序尝试
+        hedge_percentile (Optional[float], optional): 对冲请求的耗时分位数（0~100），为 None 时不对冲。默认为 None
+        cancel_event (Optional[threading.Event], optional): 取消信号，置位后尚未开始的句子不再翻译
+        progress_callback (Optional[Callable[[int, int], None]], optional): 进度回调，参数为已完成数和总数
+
+    Returns:
+        List[dict]: 每条文本的翻译结果，包含 text原文 translation译文 translator翻译器 status状态 error错误信息 cached是否来自记忆库
+    """
     logger.info(f"正在翻译 {len(text_list)} 条文本...")
-    translated_text = []
-    success_count = 0
-    for text in text_list:
-        translated = None
-        # 尝试使用所有翻译器
-        for translator in TRANSLATORS:
-            try:
-                translated = ts.translate_text(
-                    text,
-                    from_language=from_lang,
-                    to_language=to_lang,
-                    translator=translator,
-                    timeout=DEFAULT_TIMEOUT
-                )
-                success_count += 1
-                break  # 成功就跳出循环
-            except Exception as e:
-                logger.warning(f"使用 {translator} 翻译 {text} 时失败，原因: {e}")
-                continue
-        
-        if translated is not None:
-            translated_text.append(translated)
+    translate_func = translate_func or _call_translator
+    total = len(text_list)
+    done_count = 0
+    done_lock = threading.Lock()
+
+    def translate_batch(batch: List[str]) -> List[dict]:
+        nonlocal done_count
+        if cancel_event is not None and cancel_event.is_set():
+            batch_results = [_make_result(text, status=STATUS_CANCELLED) for text in batch]
+        elif len(batch) == 1:
+            batch_results = [_translate_with_fallback(batch[0], from_lang, to_lang, translate_func, health, hedge_percentile)]
         else:
-            logger.error(f"{text[:20]}... 翻译失败")
-            translated_text.append(text + " 翻译失败")
+            batch_results = _translate_batch(batch, from_lang, to_lang, translate_func, health, hedge_percentile)
+        if progress_callback is not None:
+            with done_lock:
+                done_count += len(batch)
+                progress_callback(done_count, total)
+        return batch_results
+
+    if total == 0:
+        return []
+
+    # 一次查询解析出所有已缓存的句子，剩余的才请求翻译器
+    results: List[Optional[dict]] = [None] * total
+    if memory is not None:
+        for i, (translation, translator) in memory.get_many(text_list, from_lang, to_lang).items():
+            results[i] = _make_result(text_list[i], translation=translation, translator=translator, cached=True)
+        done_count = total - results.count(None)
+        if done_count:
+            logger.info(f"翻译记忆库命中 {done_count}/{total} 条文本")
+            if progress_callback is not None:
+                progress_callback(done_count, total)
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    if pending:
+        batches = _make_batches([text_list[i] for i in pending], batch_chars)
+        translated = []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as executor:
+            for batch_results in executor.map(translate_batch, batches):
+                translated.extend(batch_results)
+        for i, result in zip(pending, translated):
+            results[i] = result
+
+        if memory is not None:
+            memory.put_many(
+                [(result["text"], result["translation"], result["translator"])
+                 for result in translated if result["status"] == STATUS_SUCCESS],
+                from_lang, to_lang
+            )
+
+    success_count = sum(1 for result in results if result["status"] == STATUS_SUCCESS)
+    logger.info(f"共 {success_count}/{total} 条文本翻译完成")
+    return results
+
+def _translate_with_fallback(text: str, from_lang: str, to_lang: str, translate_func: TranslateFunc,
+                             health: Optional[TranslatorHealth] = None, hedge_percentile: Optional[float] = None,
+                             log_failure: bool = True, record_health: bool = True) -> dict:
+    """
+    依次尝试所有翻译器，直到有一个成功
+    
+    提供 health 时按健康状态排序并跳过熔断中的翻译器，只有全部熔断时才逐个兜底尝试；
+    提供 hedge_percentile 时启用对冲请求；record_health 为 False 时不把成败和耗时记入健康状态
+    """
+    translators = health.order(TRANSLATORS) if health is not None else TRANSLATORS
+    result, skipped = _run_translators(text, from_lang, to_lang, translate_func, translators, health, hedge_percentile,
+                                       True, record_health)
+    if result is None and len(skipped) == len(translators):
+        result, _ = _run_translators(text, from_lang, to_lang, translate_func, skipped, health, hedge_percentile,
+                                     False, record_health)
+    if result is not None:
+        return result
+
+    if log_failure:
+        logger.error(f"{text[:20]}... 翻译失败")
+    return _make_result(text, status=STATUS_FAILED, error="所有翻译器均翻译失败")
+
+def _run_translators(text: str, from_lang: str, to_lang: str, translate_func: TranslateFunc, translators: List[str],
+                     health: Optional[TranslatorHealth], hedge_percentile: Optional[float],
+                     check_available: bool, record_health: bool = True) -> Tuple[Optional[dict], List[str]]:
+    """
+    按顺序尝试翻译器，返回翻译结果和因熔断被跳过的翻译器
+    
+    对冲模式下，若当前翻译器在其历史耗时的 hedge_percentile 分位数内仍未返回，
+    就把同一句子同时发给下一个翻译器，先成功的结果胜出，其余请求的结果被丢弃
+    """
+    queue = deque(translators)
+    skipped: List[str] = []
+
+    def next_translator() -> Optional[str]:
+        while queue:
+            translator = queue.popleft()
+            if not check_available or health is None or health.is_available(translator):
+                return translator
+            skipped.append(translator)
+        return None
+
+    if hedge_percentile is None:
+        while (translator := next_translator()) is not None:
+            result = _try_translator(text, from_lang, to_lang, translate_func, translator, health,
+                                     record_health=record_health)
+            if result is not None:
+                return result, skipped
+        return None, skipped
+
+    executor = _get_hedge_executor()
+    in_flight: Dict[Future, _HedgeAttempt] = {}
+
+    def launch(is_hedge: bool) -> bool:
+        translator = next_translator()
+        if translator is None:
+            return False
+        attempt = _HedgeAttempt(translator, is_hedge)
+        future = executor.submit(_try_translator, text, from_lang, to_lang, translate_func, translator, health,
+                                 attempt.mark_started, record_health)
+        in_flight[future] = attempt
+        return True
+
+    HEDGE_STATS.record_request()
+    launch(False)
+    while in_flight:
+        timeout = None
+        if queue and len(in_flight) == 1:
+            attempt = next(iter(in_flight.values()))
+            # 分位数只统计请求本身的耗时，等待线程和翻译器并发名额的时间不计入对冲等待
+            attempt.started.wait()
+            delay = _hedge_delay(attempt.translator, health, hedge_percentile)
+            timeout = max(0.0, attempt.started_at + delay - time.monotonic())
+        done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            if launch(True):
+                HEDGE_STATS.record_fired()
+            continue
+
+        for future in done:
+            attempt = in_flight.pop(future)
+            result = future.result()
+            if result is not None:
+                if attempt.is_hedge:
+                    HEDGE_STATS.record_won()
+                # 尚未开始的请求直接取消，已在进行中的请求结果将被丢弃
+                for other, other_attempt in in_flight.items():
+                    if other.cancel() and health is not None:
+                        # 被取消的请求不会记录成败，需归还半开状态下放行的探测名额
+                        health.release_probe(other_attempt.translator)
+                return result, skipped
+        if not in_flight:
+            launch(False)
+    return None, skipped
+
+def _hedge_delay(translator: str, health: Optional[TranslatorHealth], hedge_percentile: float) -> float:
+    """根据翻译器的历史耗时计算发出对冲请求前的等待时长"""
+    delay = health.percentile(translator, hedge_percentile) if health is not None else None
+    if delay is None:
+        delay = HEDGE_DEFAULT_DELAY
+    return max(HEDGE_MIN_DELAY, delay)
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="hedge")
+        return _hedge_executor
+
+def _try_translator(text: str, from_lang: str, to_lang: str, translate_func: TranslateFunc,
+                    translator: str, health: Optional[TranslatorHealth],
+                    on_start: Optional[Callable[[], None]] = None, record_health: bool = True) -> Optional[dict]:
+    """
+    使用指定翻译器翻译一次，失败时返回 None；取得并发名额后调用 on_start
+    
+    record_health 为 True 时把耗时和成败记入健康状态，否则只归还半开状态下放行的探测名额
+    """
+    with _get_provider_semaphore(translator):
+        if on_start is not None:
+            on_start()
+        start_time = time.monotonic()
+        try:
+            translated = translate_func(text, from_lang, to_lang, translator)
+        except Exception as e:
+            logger.warning("使用 %s 翻译 %s 时失败，原因: %s", translator, text, e)
+            if health is not None and record_health:
+                health.record_failure(translator)
+            elif health is not None:
+                health.release_probe(translator)
+            return None
+    if health is not None and record_health:
+        health.record_success(translator, time.monotonic() - start_time)
+    elif health is not None:
+        health.release_probe(translator)
+    return _make_result(text, translation=translated, translator=translator)
+
+def _make_batches(text_list: List[str], batch_chars: int) -> List[List[str]]:
+    """把连续的句子按字符预算打包，batch_chars 为 0 时每句单独成批"""
+    if batch_chars <= 0:
+        return [[text] for text in text_list]
+
+    batches: List[List[str]] = []
+    batch: List[str] = []
+    batch_size = 0
+    for text in text_list:
+        text_size = len(text) + len(BATCH_MARKER.format(index=len(batch) + 1)) + 1
+        if batch and batch_size + text_size > batch_chars:
+            batches.append(batch)
+            batch, batch_size = [], 0
+            text_size = len(text) + len(BATCH_MARKER.format(index=1)) + 1
+        batch.append(text)
+        batch_size += text_size
+    if batch:
+        batches.append(batch)
+    return batches
+
+def _translate_batch(batch: List[str], from_lang: str, to_lang: str, translate_func: TranslateFunc,
+                     health: Optional[TranslatorHealth] = None, hedge_percentile: Optional[float] = None) -> List[dict]:
+    """
+    将一批句子加上编号标记合并为一次请求翻译，再按标记拆回单句
+    
+    标记对不齐时（翻译器丢失或改写了标记），退化为逐句翻译。
+    批量请求的耗时与单句请求相差很大，有的翻译器还会拒绝过长的合并文本，
+    因此批量请求的成败和耗时都不计入健康状态，也不发出对冲请求，
+    避免打乱翻译器排序、单句的对冲时机，或使逐句回退时跳过实际可用的翻译器
+    """
+    joined = "\n".join(BATCH_MARKER.format(index=i + 1) + text for i, text in enumerate(batch))
+    batch_result = _translate_with_fallback(joined, from_lang, to_lang, translate_func, health, None,
+                                            log_failure=False, record_health=False)
+    if batch_result["status"] == STATUS_SUCCESS:
+        translations = split_batch_translation(batch_result["translation"], len(batch))
+        if translations is not None:
+            return [
+                _make_result(text, translation=translation, translator=batch_result["translator"])
+                for text, translation in zip(batch, translations)
+            ]
+        logger.warning(f"批量翻译的句子标记无法对齐，退化为逐句翻译 {len(batch)} 条文本")
+    return [_translate_with_fallback(text, from_lang, to_lang, translate_func, health, hedge_percentile) for text in batch]
+
+def split_batch_translation(translated: str, count: int) -> Optional[List[str]]:
+    """
+    按编号标记把批量翻译的结果拆分为单句译文
+    
+    Args:
+        translated (str): 批量翻译的结果
+        count (int): 批内句子数
+
+    Returns:
+        Optional[List[str]]: 单句译文列表，标记缺失、重复、乱序或译文为空时返回 None
+    """
+    matches = list(BATCH_MARKER_PATTERN.finditer(translated))
+    if [int(match.group(1)) for match in matches] != list(range(1, count + 1)):
+        return None
+    # 第一个标记之前只能是空白
+    if translated[:matches[0].start()].strip():
+        return None
+
+    translations = []
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(translated)
+        translation = translated[match.end():end].strip()
+        if not translation:
+            return None
+        translations.append(translation)
+    return translations
+
+def _call_translator(text: str, from_lang: str, to_lang: str, translator: str) -> str:
+    """调用 translators 库进行在线翻译"""
+    return ts.translate_text(
+        text,
+        from_language=from_lang,
+        to_language=to_lang,
+        translator=translator,
+        timeout=DEFAULT_TIMEOUT
+    )
+
+def _get_provider_semaphore(translator: str) -> threading.BoundedSemaphore:
+    with _provider_semaphores_lock:
+        semaphore = _provider_semaphores.get(translator)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(PROVIDER_MAX_CONCURRENCY)
+            _provider_semaphores[translator] = semaphore
+        return semaphore
 
-    logger.info(f"共 {success_count}/{len(translated_text)} 条文本翻译完成")
-    return translated_text
\ No newline at end of file
+def _make_result(text: str, translation: Optional[str] = None, translator: Optional[str] = None,
+                 status: str = STATUS_SUCCESS, error: Optional[str] = None, cached: bool = False) -> dict:
+    return {
+        "text": text,
+        "translation": translation,
+        "translator": translator,
+        "status": status,
+        "error": error,
+        "cached": cached,
+    }
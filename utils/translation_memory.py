@@ -0,0 +1,175 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.logger import logger
+from utils.text_processor import canonicalize_text
+
+# 翻译记忆库的数据库路径
+TM_DB_PATH = "cache/translation_memory.db"
+# 条目有效期（秒）
+TM_TTL_SECONDS = 30 * 24 * 3600
+# 记忆库中译文总大小上限（字节）
+TM_MAX_BYTES = 64 * 1024 * 1024
+
+# SQLite 单条语句的参数数量有限，批量查询时分段进行
+_QUERY_CHUNK_SIZE = 500
+
+class TranslationMemory:
+    """
+    基于 SQLite 的翻译记忆库
+
+    以 (源语言, 目标语言, 规范化原文哈希) 为键保存译文及产生译文的翻译器，
+    支持按有效期和总大小淘汰，并支持一次查询整批句子。
+    """
+
+    def __init__(self, db_path: str = TM_DB_PATH, ttl: float = TM_TTL_SECONDS, max_bytes: int = TM_MAX_BYTES):
+        """
+        Args:
+            db_path (str, optional): 数据库文件路径，传入 ':memory:' 时使用内存数据库。默认为 TM_DB_PATH
+            ttl (float, optional): 条目有效期（秒）。默认为 TM_TTL_SECONDS
+            max_bytes (int, optional): 译文总大小上限（字节）。默认为 TM_MAX_BYTES
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def get_many(self, text_list: List[str], from_lang: str, to_lang: str) -> Dict[int, Tuple[str, str]]:
+        """
+        批量查询译文
+
+        Args:
+            text_list (List[str]): 原文列表
+            from_lang (str): 源语言
+            to_lang (str): 目标语言
+
+        Returns:
+            Dict[int, Tuple[str, str]]: 命中条目在 text_list 中的下标到 (译文, 翻译器) 的映射
+        """
+        hashes = [_hash_text(text) for text in text_list]
+        unique_hashes = list(dict.fromkeys(hashes))
+        now = time.time()
+        found: Dict[str, Tuple[str, str]] = {}
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(unique_hashes), _QUERY_CHUNK_SIZE):
+                chunk = unique_hashes[start:start + _QUERY_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT text_hash, translation, provider FROM translations "
+                    f"WHERE from_lang = ? AND to_lang = ? AND created_at >= ? AND text_hash IN ({placeholders})",
+                    [from_lang, to_lang, now - self.ttl, *chunk],
+                ).fetchall()
+                for text_hash, translation, provider in rows:
+                    found[text_hash] = (translation, provider)
+            if found:
+                conn.executemany(
+                    "UPDATE translations SET accessed_at = ? WHERE from_lang = ? AND to_lang = ? AND text_hash = ?",
+                    [(now, from_lang, to_lang, text_hash) for text_hash in found],
+                )
+                conn.commit()
+
+            result = {i: found[text_hash] for i, text_hash in enumerate(hashes) if text_hash in found}
+            self.hits += len(result)
+            self.misses += len(text_list) - len(result)
+        return result
+
+    def put_many(self, entries: Iterable[Tuple[str, str, str]], from_lang: str, to_lang: str):
+        """
+        批量写入译文，并按需淘汰旧条目
+
+        Args:
+            entries (Iterable[Tuple[str, str, str]]): (原文, 译文, 翻译器) 列表
+            from_lang (str): 源语言
+            to_lang (str): 目标语言
+        """
+        now = time.time()
+        rows = [
+            (from_lang, to_lang, _hash_text(text), translation, provider, now, now, len(translation.encode('utf-8')))
+            for text, translation, provider in entries
+        ]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations "
+                "(from_lang, to_lang, text_hash, translation, provider, created_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict(conn, now)
+            conn.commit()
+
+    def stats(self) -> dict:
+        """
+        获取记忆库统计信息
+
+        Returns:
+            dict: hits命中数 misses未命中数 hit_rate命中率 entries条目数 bytes译文占用字节数
+        """
+        with self._lock:
+            conn = self._connect()
+            entries, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM translations").fetchone()
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": entries,
+                "bytes": total_bytes,
+            }
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.db_path != ":memory:":
+                Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "from_lang TEXT NOT NULL, to_lang TEXT NOT NULL, text_hash TEXT NOT NULL, "
+                "translation TEXT NOT NULL, provider TEXT, created_at REAL NOT NULL, "
+                "accessed_at REAL NOT NULL, size INTEGER NOT NULL, "
+                "PRIMARY KEY (from_lang, to_lang, text_hash))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_accessed ON translations (accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """删除过期条目，总大小超限时按最近访问时间从旧到新删除"""
+        conn.execute("DELETE FROM translations WHERE created_at < ?", (now - self.ttl,))
+        total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM translations").fetchone()[0]
+        if total_bytes <= self.max_bytes:
+            return
+
+        overflow = total_bytes - self.max_bytes
+        doomed = []
+        for rowid, size in conn.execute("SELECT rowid, size FROM translations ORDER BY accessed_at"):
+            if overflow <= 0:
+                break
+            doomed.append((rowid,))
+            overflow -= size
+        conn.executemany("DELETE FROM translations WHERE rowid = ?", doomed)
+        logger.info(f"翻译记忆库超出大小上限，淘汰 {len(doomed)} 条旧译文")
+
+def _hash_text(text: str) -> str:
+    """对规范化后的原文计算哈希"""
+    return hashlib.sha256(canonicalize_text(text).encode('utf-8')).hexdigest()
+
+# 全局共享的翻译记忆库
+TRANSLATION_MEMORY = TranslationMemory()
@@ -0,0 +1,258 @@
+import atexit
+import json
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.logger import logger
+
+# 健康状态的持久化文件路径
+HEALTH_FILE_PATH = "cache/translator_health.json"
+# 每个翻译器保留的最近请求数量
+HEALTH_WINDOW_SIZE = 50
+# 连续失败达到该次数后熔断
+CIRCUIT_FAILURE_THRESHOLD = 3
+# 最近请求的错误率达到该值后熔断（样本数不少于 CIRCUIT_MIN_SAMPLES 时生效）
+CIRCUIT_ERROR_RATE = 0.5
+CIRCUIT_MIN_SAMPLES = 10
+# 熔断后的冷却时间（秒），冷却结束后放行一个探测请求
+CIRCUIT_COOLDOWN_SECONDS = 60.0
+# 两次持久化之间的最短间隔（秒）
+HEALTH_SAVE_INTERVAL = 30.0
+
+# 熔断器状态
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+class ProviderStats:
+    """单个翻译器的滚动统计"""
+
+    def __init__(self, window_size: int = HEALTH_WINDOW_SIZE):
+        self.latencies: deque = deque(maxlen=window_size)
+        self.outcomes: deque = deque(maxlen=window_size)
+        self.consecutive_failures = 0
+        self.state = CIRCUIT_CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    @property
+    def mean_latency(self) -> Optional[float]:
+        if not self.latencies:
+            return None
+        return sum(self.latencies) / len(self.latencies)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """最近成功请求耗时的 p 分位数（p 取值 0~100）"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * (len(ordered) - 1)))))
+        return ordered[index]
+
+class TranslatorHealth:
+    """
+    翻译器健康状态注册表
+
+    记录各翻译器的滚动耗时和错误率，对持续失败的翻译器熔断，
+    并按健康程度和耗时给出尝试顺序。状态在所有请求间共享，并持久化到磁盘。
+    """
+
+    def __init__(self, file_path: Optional[str] = HEALTH_FILE_PATH, window_size: int = HEALTH_WINDOW_SIZE,
+                 cooldown: float = CIRCUIT_COOLDOWN_SECONDS):
+        """
+        Args:
+            file_path (Optional[str], optional): 持久化文件路径，为 None 时不持久化。默认为 HEALTH_FILE_PATH
+            window_size (int, optional): 每个翻译器保留的最近请求数量。默认为 HEALTH_WINDOW_SIZE
+            cooldown (float, optional): 熔断后的冷却时间（秒）。默认为 CIRCUIT_COOLDOWN_SECONDS
+        """
+        self.file_path = file_path
+        self.window_size = window_size
+        self.cooldown = cooldown
+        self._providers: Dict[str, ProviderStats] = {}
+        self._lock = threading.Lock()
+        self._last_saved_at = 0.0
+        self._loaded = False
+
+    def record_success(self, provider: str, latency: float):
+        """记录一次成功请求及其耗时"""
+        with self._lock:
+            stats = self._get(provider)
+            stats.latencies.append(latency)
+            stats.outcomes.append(True)
+            stats.consecutive_failures = 0
+            stats.probing = False
+            if stats.state != CIRCUIT_CLOSED:
+                logger.info(f"翻译器 {provider} 已恢复，关闭熔断")
+                stats.state = CIRCUIT_CLOSED
+        self._maybe_save()
+
+    def record_failure(self, provider: str):
+        """记录一次失败请求，必要时打开熔断器"""
+        with self._lock:
+            stats = self._get(provider)
+            stats.outcomes.append(False)
+            stats.consecutive_failures += 1
+            stats.probing = False
+            should_open = (
+                stats.state == CIRCUIT_HALF_OPEN
+                or stats.consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD
+                or (len(stats.outcomes) >= CIRCUIT_MIN_SAMPLES and stats.error_rate >= CIRCUIT_ERROR_RATE)
+            )
+            if should_open:
+                if stats.state != CIRCUIT_OPEN:
+                    logger.warning(f"翻译器 {provider} 持续失败，熔断 {self.cooldown:.0f} 秒")
+                stats.state = CIRCUIT_OPEN
+                stats.opened_at = time.time()
+        self._maybe_save()
+
+    def is_available(self, provider: str) -> bool:
+        """
+        判断翻译器当前是否可用
+
+        熔断冷却结束后进入半开状态，只放行一个探测请求。
+        """
+        with self._lock:
+            return self._check_available(self._get(provider))
+
+    def release_probe(self, provider: str):
+        """
+        放弃已放行但未实际发出的探测请求
+
+        半开状态下放行的请求在开始前被取消时调用，否则该翻译器会一直等待一个不会返回的探测结果。
+        """
+        with self._lock:
+            self._get(provider).probing = False
+
+    def order(self, providers: List[str]) -> List[str]:
+        """
+        按健康程度给出尝试顺序
+
+        可用的翻译器在前，按平均耗时从快到慢排列，尚无耗时数据的保持原有顺序并排在已知翻译器之后；
+        熔断中的翻译器排在最后，作为所有翻译器都不可用时的兜底。
+
+        Args:
+            providers (List[str]): 翻译器列表
+
+        Returns:
+            List[str]: 排序后的翻译器列表
+        """
+        with self._lock:
+            known, unknown, opened = [], [], []
+            for provider in providers:
+                stats = self._get(provider)
+                if stats.state == CIRCUIT_OPEN and time.time() - stats.opened_at < self.cooldown:
+                    opened.append(provider)
+                elif stats.mean_latency is None:
+                    unknown.append(provider)
+                else:
+                    known.append((stats.mean_latency, provider))
+            available = [provider for _, provider in sorted(known, key=lambda item: item[0])] + unknown
+            return available + opened
+
+    def percentile(self, provider: str, p: float) -> Optional[float]:
+        """获取翻译器最近成功请求耗时的 p 分位数"""
+        with self._lock:
+            return self._get(provider).percentile(p)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        获取所有翻译器的健康状态
+
+        Returns:
+            Dict[str, dict]: 翻译器名称到 state熔断状态 error_rate错误率 mean_latency平均耗时 samples样本数 的映射
+        """
+        with self._lock:
+            self._load()
+            return {
+                provider: {
+                    "state": stats.state,
+                    "error_rate": stats.error_rate,
+                    "mean_latency": stats.mean_latency,
+                    "samples": len(stats.outcomes),
+                }
+                for provider, stats in self._providers.items()
+            }
+
+    def save(self):
+        """将健康状态写入磁盘"""
+        if self.file_path is None:
+            return
+        with self._lock:
+            self._load()
+            # 没有任何记录时不写文件，避免只导入模块的进程（如测试）在退出时创建空文件
+            if not self._providers:
+                return
+            data = {
+                provider: {
+                    "latencies": list(stats.latencies),
+                    "outcomes": list(stats.outcomes),
+                    "consecutive_failures": stats.consecutive_failures,
+                    "state": stats.state,
+                    "opened_at": stats.opened_at,
+                }
+                for provider, stats in self._providers.items()
+            }
+            self._last_saved_at = time.time()
+        try:
+            path = Path(self.file_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(data), encoding="utf-8")
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning(f"保存翻译器健康状态失败: {e}")
+
+    def _check_available(self, stats: ProviderStats) -> bool:
+        if stats.state == CIRCUIT_CLOSED:
+            return True
+        if stats.state == CIRCUIT_OPEN and time.time() - stats.opened_at >= self.cooldown:
+            stats.state = CIRCUIT_HALF_OPEN
+        if stats.state == CIRCUIT_HALF_OPEN and not stats.probing:
+            stats.probing = True
+            return True
+        return False
+
+    def _get(self, provider: str) -> ProviderStats:
+        self._load()
+        stats = self._providers.get(provider)
+        if stats is None:
+            stats = ProviderStats(self.window_size)
+            self._providers[provider] = stats
+        return stats
+
+    def _load(self):
+        """首次使用时从磁盘恢复健康状态"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.file_path is None or not Path(self.file_path).exists():
+            return
+        try:
+            data = json.loads(Path(self.file_path).read_text(encoding="utf-8"))
+            for provider, item in data.items():
+                stats = ProviderStats(self.window_size)
+                stats.latencies.extend(item.get("latencies", []))
+                stats.outcomes.extend(item.get("outcomes", []))
+                stats.consecutive_failures = item.get("consecutive_failures", 0)
+                stats.state = item.get("state", CIRCUIT_CLOSED)
+                stats.opened_at = item.get("opened_at", 0.0)
+                self._providers[provider] = stats
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取翻译器健康状态失败，将重新统计: {e}")
+
+    def _maybe_save(self):
+        if self.file_path is not None and time.time() - self._last_saved_at >= HEALTH_SAVE_INTERVAL:
+            self.save()
+
+# 全局共享的翻译器健康状态
+TRANSLATOR_HEALTH = TranslatorHealth()
+atexit.register(TRANSLATOR_HEALTH.save)
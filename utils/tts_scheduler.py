@@ -0,0 +1,186 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Dict, Optional
+
+import edge_tts
+from utils.logger import logger
+
+# 同时进行的 TTS 合成数量上限
+TTS_MAX_CONCURRENCY = 8
+# 单条音频的最大重试次数
+TTS_MAX_RETRIES = 3
+# 重试退避的基础时长和最大时长（秒）
+TTS_RETRY_BASE_DELAY = 0.5
+TTS_RETRY_MAX_DELAY = 8.0
+# 全局限流：每秒允许发起的 TTS 请求数及突发容量
+TTS_RATE_LIMIT = 10.0
+TTS_RATE_BURST = 20
+
+class TokenBucket:
+    """
+    令牌桶限流器
+
+    不依赖具体的事件循环，可在多个任务、多个事件循环之间共享。
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        """
+        Args:
+            rate (float): 每秒补充的令牌数
+            capacity (int): 桶容量，即允许的突发请求数
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """
+        尝试取出一个令牌
+
+        Returns:
+            float: 取到令牌时返回 0，否则返回需要等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    async def acquire(self):
+        """等待直到取到一个令牌"""
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+class EdgeTTSBackend:
+    """调用 edge-tts 在线合成音频"""
+
+    async def synthesize(self, text: str, voice_name: str, file_path: Path, rate: str, pitch: str):
+        communicate = edge_tts.Communicate(text, voice_name, rate=rate, pitch=pitch)
+        await communicate.save(str(file_path))
+
+class FakeTTSBackend:
+    """
+    本地模拟的 TTS 后端，用于离线测试吞吐量和失败恢复
+
+    按设定的延迟写出假音频，并可按概率或按次数注入失败。
+    """
+
+    def __init__(self, latency: float = 0.01, failure_rate: float = 0.0, fail_times: int = 0, seed: Optional[int] = None):
+        """
+        Args:
+            latency (float, optional): 每次合成的模拟耗时（秒）。默认为 0.01
+            failure_rate (float, optional): 每次合成随机失败的概率。默认为 0
+            fail_times (int, optional): 每条文本前若干次合成必定失败。默认为 0
+            seed (Optional[int], optional): 随机种子，便于复现。默认为 None
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.fail_times = fail_times
+        self.calls = 0
+        self.failures = 0
+        self.active = 0
+        self.max_active = 0
+        self._attempts: Dict[str, int] = {}
+        self._random = random.Random(seed)
+
+    async def synthesize(self, text: str, voice_name: str, file_path: Path, rate: str, pitch: str):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.latency)
+            attempt = self._attempts.get(text, 0) + 1
+            self._attempts[text] = attempt
+            if attempt <= self.fail_times or self._random.random() < self.failure_rate:
+                self.failures += 1
+                raise ConnectionError(f"模拟 TTS 失败: {text[:20]}")
+            Path(file_path).write_bytes(f"{voice_name}|{rate}|{pitch}|{text}".encode('utf-8'))
+        finally:
+            self.active -= 1
+
+class TTSScheduler:
+    """
+    TTS 合成调度器
+
+    限制同时合成的数量，失败时按带抖动的指数退避重试，
+    并通过共享的令牌桶对所有任务的请求统一限流。
+    """
+
+    def __init__(self, backend=None, max_concurrency: int = TTS_MAX_CONCURRENCY, max_retries: int = TTS_MAX_RETRIES,
+                 base_delay: float = TTS_RETRY_BASE_DELAY, max_delay: float = TTS_RETRY_MAX_DELAY,
+                 rate_limiter: Optional[TokenBucket] = None):
+        """
+        Args:
+            backend (optional): TTS 后端，需提供 async synthesize 方法。默认为 EdgeTTSBackend
+            max_concurrency (int, optional): 同时合成的数量上限。默认为 TTS_MAX_CONCURRENCY
+            max_retries (int, optional): 失败后的最大重试次数。默认为 TTS_MAX_RETRIES
+            base_delay (float, optional): 退避的基础时长（秒）。默认为 TTS_RETRY_BASE_DELAY
+            max_delay (float, optional): 退避的最大时长（秒）。默认为 TTS_RETRY_MAX_DELAY
+            rate_limiter (Optional[TokenBucket], optional): 限流器，为 None 时不限流。默认为 None
+        """
+        self.backend = backend or EdgeTTSBackend()
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate_limiter = rate_limiter
+        self.retries = 0
+        # asyncio.Semaphore 绑定事件循环，因此为每个事件循环单独创建
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    async def synthesize(self, text: str, voice_name: str, file_path: Path, rate: str, pitch: str):
+        """
+        合成单条音频，失败时自动重试，重试耗尽后抛出最后一次的异常
+
+        Args:
+            text (str): 文本
+            voice_name (str): 音色名称
+            file_path (Path): 输出文件路径
+            rate (str): 语速
+            pitch (str): 音调
+        """
+        semaphore = self._get_semaphore()
+        attempt = 0
+        while True:
+            async with semaphore:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire()
+                try:
+                    await self.backend.synthesize(text, voice_name, file_path, rate, pitch)
+                    return
+                except Exception as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    logger.warning("合成 %s... 失败，将进行第 %d 次重试，原因: %s", text[:20], attempt + 1, e)
+            # 退避等待期间释放并发名额
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+            self.retries += 1
+
+    def _backoff(self, attempt: int) -> float:
+        """计算带完全抖动的指数退避时长"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+# 所有任务共享的全局限流器和默认调度器
+TTS_RATE_LIMITER = TokenBucket(TTS_RATE_LIMIT, TTS_RATE_BURST)
+TTS_SCHEDULER = TTSScheduler(rate_limiter=TTS_RATE_LIMITER)
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import edge_tts
+from utils.logger import logger
+
+# 音色目录的磁盘快照路径，冷启动时无需联网即可使用
+VOICE_SNAPSHOT_PATH = "cache/voices.json"
+# 音色目录的有效期（秒），过期后仍先返回旧数据，同时在后台刷新
+VOICE_CATALOG_TTL = 24 * 3600
+# 刷新失败后，至少间隔该时长（秒）才再次尝试
+VOICE_REFRESH_RETRY_SECONDS = 300
+
+class VoiceCatalog:
+    """
+    音色目录服务
+
+    启动时从磁盘快照或 edge-tts 加载全部音色，按地区代码建立索引常驻内存，
+    查询时不再联网。数据超过有效期后先返回旧数据，同时在后台刷新（stale-while-revalidate），
+    刷新成功后更新内存索引并写入磁盘快照。
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = VOICE_SNAPSHOT_PATH, ttl: float = VOICE_CATALOG_TTL,
+                 fetcher: Optional[Callable[[], Awaitable[List[dict]]]] = None):
+        """
+        Args:
+            snapshot_path (Optional[str], optional): 磁盘快照路径，为 None 时不读写快照。默认为 VOICE_SNAPSHOT_PATH
+            ttl (float, optional): 音色目录的有效期（秒）。默认为 VOICE_CATALOG_TTL
+            fetcher (Optional[Callable[[], Awaitable[List[dict]]]], optional): 获取全部音色的协程函数，
+                返回 edge-tts 格式的音色列表。默认为 edge_tts.list_voices
+        """
+        self.snapshot_path = snapshot_path
+        self.ttl = ttl
+        self.fetcher = fetcher or edge_tts.list_voices
+        self.fetched_at = 0.0
+        self.refreshes = 0
+        self._by_locale: Dict[str, List[dict]] = {}
+        self._loaded = False
+        self._last_attempt_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def stale(self) -> bool:
+        return time.time() - self.fetched_at > self.ttl
+
+    async def load(self):
+        """
+        加载音色目录：优先读取磁盘快照，没有快照时联网获取；快照已过期时在后台刷新
+        """
+        if not self._loaded:
+            self._loaded = self._load_snapshot()
+        if not self._loaded:
+            await self._get_refresh_task()
+        elif self.stale:
+            self._schedule_refresh()
+
+    async def get(self, locale: str) -> List[dict]:
+        """
+        获取指定地区的音色列表
+
+        Args:
+            locale (str): 地区代码，如 en-US
+
+        Returns:
+            List[dict]: 音色列表，每项包含 name音色名称 gender性别 style风格标签
+
+        Raises:
+            RuntimeError: 没有快照且联网获取失败
+        """
+        if not self._loaded:
+            await self.load()
+            if not self._loaded:
+                raise RuntimeError("音色目录尚未加载，且联网获取失败")
+        elif self.stale:
+            self._schedule_refresh()
+        return [dict(voice) for voice in self._by_locale.get(locale, [])]
+
+    async def refresh(self) -> bool:
+        """
+        联网获取全部音色并更新索引和磁盘快照，失败时保留原有数据
+
+        Returns:
+            bool: 是否刷新成功
+        """
+        self._last_attempt_at = time.time()
+        try:
+            voices = await self.fetcher()
+        except Exception as e:
+            logger.warning(f"获取音色列表失败，继续使用已有的音色目录: {e}")
+            return False
+
+        self._index(voices, time.time())
+        self._loaded = True
+        self.refreshes += 1
+        logger.info(f"音色目录已更新，共 {len(voices)} 个音色、{len(self._by_locale)} 个地区")
+        self._save_snapshot(voices)
+        return True
+
+    async def close(self):
+        """取消正在进行的后台刷新"""
+        task = self._refresh_task
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def _schedule_refresh(self):
+        """在后台刷新音色目录，同一时间只进行一次刷新，失败后间隔一段时间再重试"""
+        if time.time() - self._last_attempt_at < VOICE_REFRESH_RETRY_SECONDS:
+            return
+        self._get_refresh_task()
+
+    def _get_refresh_task(self) -> asyncio.Task:
+        """获取当前事件循环中正在进行的刷新任务，没有时新建一个"""
+        task = self._refresh_task
+        # 任务绑定创建它的事件循环，旧事件循环中的任务不再复用
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self.refresh())
+            self._refresh_task = task
+        return task
+
+    def _index(self, voices: List[dict], fetched_at: float):
+        """按地区代码建立音色索引"""
+        by_locale: Dict[str, List[dict]] = {}
+        for voice in voices:
+            tag = voice.get("VoiceTag") or {}
+            by_locale.setdefault(voice["Locale"], []).append({
+                "name": voice["ShortName"],
+                "gender": voice.get("Gender"),
+                "style": tag.get("ContentCategories", []) + tag.get("VoicePersonalities", []),
+            })
+        self._by_locale = by_locale
+        self.fetched_at = fetched_at
+
+    def _load_snapshot(self) -> bool:
+        """从磁盘快照恢复音色目录"""
+        if self.snapshot_path is None or not Path(self.snapshot_path).exists():
+            return False
+        try:
+            data = json.loads(Path(self.snapshot_path).read_text(encoding="utf-8"))
+            self._index(data["voices"], data["fetched_at"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"读取音色目录快照失败，将重新获取: {e}")
+            return False
+        logger.info(f"已从快照加载音色目录，共 {len(self._by_locale)} 个地区")
+        return True
+
+    def _save_snapshot(self, voices: List[dict]):
+        """将音色目录写入磁盘快照"""
+        if self.snapshot_path is None:
+            return
+        try:
+            path = Path(self.snapshot_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({"fetched_at": self.fetched_at, "voices": voices}, ensure_ascii=False),
+                                encoding="utf-8")
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning(f"保存音色目录快照失败: {e}")
+
+# 全局共享的音色目录
+VOICE_CATALOG = VoiceCatalog()